@@ -1,152 +1,97 @@
-import sys
-import types
-import os
-
-try:
-    import pkg_resources
-except ModuleNotFoundError:
-    pkg_resources = types.ModuleType("pkg_resources")
-    
-    # pykrx가 폰트 경로를 찾을 때 사용하는 함수만 구현
-    def _resource_filename(package_or_requirement, resource_name):
-        import importlib.util
-        spec = importlib.util.find_spec(package_or_requirement)
-        if spec and spec.origin:
-            package_dir = os.path.dirname(spec.origin)
-            return os.path.join(package_dir, resource_name)
-        return resource_name
-    
-    pkg_resources.resource_filename = _resource_filename
-    sys.modules["pkg_resources"] = pkg_resources
-    
 import streamlit as st
 import pandas as pd
-from pykrx import stock
-import yfinance as yf
 import numpy as np
-from datetime import datetime, timedelta
-import time
-import requests
+from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import fear_and_greed
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from market_data import (
+    get_krx_market_caps,
+    get_krx_top_by_market_cap,
+    get_market_snapshot,
+    get_us_company_info,
+)
+from symbol_directory import get_symbol_directory, lookup_symbol
+from ticker_search import TickerSearchIndex
+from metrics import REGISTRY, span
+from watchlist_store import TICKER_PATTERN, WATCHLIST_NAME_PATTERN, get_watchlist_store
+from scans import (
+    DEFAULT_US_TICKERS,
+    US_INDICATOR_NAMESPACE,
+    US_WATCHLIST,
+    compute_kr_indicators,
+    get_us_indicators,
+    scan_korean_stocks,
+    scan_krx_full_market,
+    scan_us_stocks,
+)
+from precompute import (
+    KRX_FULL_SCAN_RESULT,
+    KRX_SCAN_RESULT,
+    KRX_SCHEDULE,
+    US_SCAN_RESULT,
+    US_SCHEDULE,
+    load_current_result,
+)
 
 # 페이지 설정
 st.set_page_config(page_title="KR/US Stock", layout="wide")
 
-# 기본 미국 주식 시총 상위 50개 티커 (기본값)
-DEFAULT_US_TICKERS = ["MSFT", "GOOG", "META", "AMZN", "AAPL", "TSLA", "NVDA", "AVGO"]
+# 주요 지수 모니터링 심볼 (키, yfinance 심볼, 표시 이름, 통화 기호)
+MARKET_INDEX_SYMBOLS = [
+    ('VIX', '^VIX', 'VIX 지수', ''),
+    ('SP500', '^GSPC', 'S&P 500', ''),
+    ('NASDAQ100', '^IXIC', '나스닥 100', ''),
+    ('USDKRW', 'KRW=X', '원/달러 환율', '₩'),
+    ('BTC', 'BTC-USD', '비트코인', '$'),
+    ('ETH', 'ETH-USD', '이더리움', '$'),
+]
 
 @st.cache_data(ttl=1800)  # 30분 캐시
 def get_market_indicators():
-    """주요 지수들 조회"""
+    """주요 지수들 조회 (지수 일괄 요청과 CNN 공탐지수 요청을 동시에 실행)"""
     indicators = {}
     
     try:
-        # CNN 공탐지수 가져오기
-        try:
-            fg = fear_and_greed.get()        
-            fg_score = float(fg[0])
-            fg_score = round(fg_score,2)
-            fg_status = fg[1]
-   
-            indicators['CNN_FEAR_GREED'] = {
-                'name': '공탐지수' +'(' + fg_status + ')',
-                'current': fg_score,
-                'previous': fg_score,
-                'symbol': '',
-                'format': 'str'                
-            }
-        except Exception as e:
-            st.warning(f"CNN 공탐지수 조회 실패: {e}")
-        
-        # VIX 지수
-        try:
-            vix = yf.Ticker("^VIX")
-            vix_data = vix.history(period="2d")
-            if len(vix_data) >= 2:
-                indicators['VIX'] = {
-                    'name': 'VIX 지수',
-                    'current': vix_data['Close'].iloc[-1],
-                    'previous': vix_data['Close'].iloc[-2],
-                    'symbol': '',
-                    'format': 'float'
-                }
-        except:
-            pass
-        
-        # S&P 500
-        try:
-            sp500 = yf.Ticker("^GSPC")
-            sp500_data = sp500.history(period="2d")
-            if len(sp500_data) >= 2:
-                indicators['SP500'] = {
-                    'name': 'S&P 500',
-                    'current': sp500_data['Close'].iloc[-1],
-                    'previous': sp500_data['Close'].iloc[-2],
-                    'symbol': '',
-                    'format': 'float'
-                }
-        except:
-            pass
-        
-        # 나스닥 100
-        try:
-            nasdaq = yf.Ticker("^IXIC")
-            nasdaq_data = nasdaq.history(period="2d")
-            if len(nasdaq_data) >= 2:
-                indicators['NASDAQ100'] = {
-                    'name': '나스닥 100',
-                    'current': nasdaq_data['Close'].iloc[-1],
-                    'previous': nasdaq_data['Close'].iloc[-2],
+        with span('app.get_market_indicators'), ThreadPoolExecutor(max_workers=1) as executor:
+            # CNN 공탐지수는 별도 스레드에서 동시에 조회
+            fg_future = executor.submit(fear_and_greed.get)
+            
+            # VIX, S&P 500, 나스닥, 환율, 코인 일괄 조회
+            try:
+                snapshot = get_market_snapshot([symbol for _, symbol, _, _ in MARKET_INDEX_SYMBOLS])
+            except Exception:
+                snapshot = {}
+            
+            # CNN 공탐지수 가져오기
+            try:
+                fg = fg_future.result()
+                fg_score = float(fg[0])
+                fg_score = round(fg_score,2)
+                fg_status = fg[1]
+       
+                indicators['CNN_FEAR_GREED'] = {
+                    'name': '공탐지수' +'(' + fg_status + ')',
+                    'current': fg_score,
+                    'previous': fg_score,
                     'symbol': '',
-                    'format': 'float'
+                    'format': 'str'                
                 }
-        except:
-            pass
-        
-        # 원달러 환율
-        try:
-            usdkrw = yf.Ticker("KRW=X")
-            usdkrw_data = usdkrw.history(period="2d")
-            if len(usdkrw_data) >= 2:
-                indicators['USDKRW'] = {
-                    'name': '원/달러 환율',
-                    'current': usdkrw_data['Close'].iloc[-1],
-                    'previous': usdkrw_data['Close'].iloc[-2],
-                    'symbol': '₩',
-                    'format': 'float'
-                }
-        except:
-            pass
-        
-        # 비트코인
-        try:
-            btc = yf.Ticker("BTC-USD")
-            btc_data = btc.history(period="2d")
-            if len(btc_data) >= 2:
-                indicators['BTC'] = {
-                    'name': '비트코인',
-                    'current': btc_data['Close'].iloc[-1],
-                    'previous': btc_data['Close'].iloc[-2],
-                    'symbol': '$',
-                    'format': 'float'
-                }
-        except:
-            pass
-        
-        # 이더리움
-        try:
-            eth = yf.Ticker("ETH-USD")
-            eth_data = eth.history(period="2d")
-            if len(eth_data) >= 2:
-                indicators['ETH'] = {
-                    'name': '이더리움',
-                    'current': eth_data['Close'].iloc[-1],
-                    'previous': eth_data['Close'].iloc[-2],
-                    'symbol': '$',
+            except Exception as e:
+                st.warning(f"CNN 공탐지수 조회 실패: {e}")
+        
+        for key, symbol, name, currency in MARKET_INDEX_SYMBOLS:
+            if symbol in snapshot:
+                current, previous = snapshot[symbol]
+                indicators[key] = {
+                    'name': name,
+                    'current': current,
+                    'previous': previous,
+                    'symbol': currency,
                     'format': 'float'
                 }
-        except:
-            pass
             
     except Exception as e:
         st.error(f"지수 데이터 조회 중 오류: {e}")
@@ -244,77 +189,31 @@ def display_indicator_box(indicator_data):
     </div>
     """, unsafe_allow_html=True)
 
-def format_market_cap(value):
-    """시가총액을 축약 형태로 표시"""
-    if value >= 1e12:  # 1조 이상
-        return f"{value/1e12:.1f}T"
-    elif value >= 1e9:  # 10억 이상  
-        return f"{value/1e9:.1f}B"
-    elif value >= 1e6:  # 100만 이상
-        return f"{value/1e6:.1f}M"
-    else:
-        return f"{value:,.0f}"
-
 @st.cache_data(ttl=3600)
 def get_market_cap_top100():
     """KRX API 직접 호출로 시총 상위 100개 종목 조회"""
     try:
-        import requests
-        
-        # 최근 영업일 찾기
-        def get_latest_business_day():
-            from datetime import datetime, timedelta
-            for i in range(10):
-                date = (datetime.now() - timedelta(days=i)).strftime("%Y%m%d")
-                # 주말 제외
-                d = datetime.now() - timedelta(days=i)
-                if d.weekday() < 5:  # 월~금
-                    return date
-            return datetime.now().strftime("%Y%m%d")
+        with span('app.get_market_cap_top100'):
+            df = get_krx_top_by_market_cap(100)
         
-        date = get_latest_business_day()
+        if df.empty:
+            st.error("KRX 데이터를 가져올 수 없습니다.")
+            return pd.DataFrame()
         
-        # KRX 공식 API 직접 호출
-        url = "http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd"
+        return df
         
-        results = []
-        for market in ["STK", "KSQ"]:  # STK=코스피, KSQ=코스닥
-            payload = {
-                "bld": "dbms/MDC/STAT/standard/MDCSTAT01501",
-                "mktId": market,
-                "trdDd": date,
-                "share": "1",
-                "money": "1",
-                "csvxls_isNo": "false",
-            }
-            headers = {
-                "Referer": "http://data.krx.co.kr/",
-                "User-Agent": "Mozilla/5.0"
-            }
-            
-            resp = requests.post(url, data=payload, headers=headers, timeout=10)
-            data = resp.json()
-            
-            if "OutBlock_1" in data:
-                for item in data["OutBlock_1"]:
-                    try:
-                        results.append({
-                            "ticker": item.get("ISU_SRT_CD", ""),
-                            "name": item.get("ISU_ABBRV", ""),
-                            "market_cap": int(item.get("MKTCAP", "0").replace(",", "")),
-                        })
-                    except:
-                        continue
+    except Exception as e:
+        st.error(f"시가총액 데이터 조회 오류: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=3600)
+def get_market_caps_all():
+    """KRX API 직접 호출로 코스피+코스닥 전 종목 시가총액 조회"""
+    try:
+        df = get_krx_market_caps()
         
-        if not results:
+        if df.empty:
             st.error("KRX 데이터를 가져올 수 없습니다.")
-            return pd.DataFrame()
-        
-        df = pd.DataFrame(results)
-        df = df[df["market_cap"] > 0]
-        df = df.nlargest(100, "market_cap").reset_index(drop=True)
-        df = df.set_index("ticker")
-        df = df.rename(columns={"market_cap": "시가총액", "name": "종목명"})
         
         return df
         
@@ -323,52 +222,35 @@ def get_market_cap_top100():
         return pd.DataFrame()
 
 def validate_ticker(ticker):
-    """티커가 유효한지 검증"""
+    """티커가 유효한지 검증 (로컬 종목 목록 우선, 없는 종목만 Yahoo Finance 조회)"""
     try:
-        stock_info = yf.Ticker(ticker)
-        info = stock_info.info
-        # 기본적인 정보가 있는지 확인
-        if info.get('symbol') or info.get('shortName') or info.get('longName'):
-            return True
-        return False
+        return lookup_symbol(ticker) is not None
     except:
         return False
 
+@st.cache_resource(ttl=3600)
+def get_ticker_search_index():
+    """티커 검색 인덱스 (미국 종목 목록 + KRX 전 종목 한글명, KRX 목록은 전 종목 스캔과 같은 캐시 사용)"""
+    krx_listing = get_market_caps_all()
+    if krx_listing.empty:
+        st.warning("KRX 종목 목록을 가져올 수 없어 미국 종목만 검색합니다.")
+        krx_listing = None
+    return TickerSearchIndex.from_sources(get_symbol_directory(), krx_listing)
+
 def get_us_stock_data(tickers_list):
     """미국 주식 정보 조회 (사용자 정의 티커 리스트 사용)"""
     try:
-        results = []
         progress_placeholder = st.empty()
         
-        for i, ticker in enumerate(tickers_list):
-            progress_placeholder.text(f"미국 주식 정보 조회 중... ({i+1}/{len(tickers_list)})")
-            
-            try:
-                stock_info = yf.Ticker(ticker)
-                info = stock_info.info
-                
-                # 시가총액과 회사명 추출
-                market_cap = info.get('marketCap', 0)
-                company_name = info.get('longName', info.get('shortName', ticker))
-                
-                results.append({
-                    'ticker': ticker,
-                    'name': company_name,
-                    'market_cap': market_cap
-                })
-                
-                time.sleep(0.1)  # API 제한 방지
-                
-            except Exception as e:
-                st.warning(f"종목 {ticker} 정보 조회 실패: {e}")
-                continue
+        def on_progress(i, total):
+            progress_placeholder.text(f"미국 주식 정보 조회 중... ({i+1}/{total})")
         
-        progress_placeholder.empty()
+        def on_error(ticker, error):
+            st.warning(f"종목 {ticker} 정보 조회 실패: {error}")
+        
+        df = get_us_company_info(tickers_list, on_progress=on_progress, on_error=on_error)
         
-        # DataFrame 생성하고 시가총액 기준 정렬
-        df = pd.DataFrame(results)
-        if not df.empty:
-            df = df.sort_values('market_cap', ascending=False).reset_index(drop=True)
+        progress_placeholder.empty()
         
         return df
         
@@ -380,162 +262,45 @@ def get_us_stock_data(tickers_list):
 def calculate_technical_indicators_kr(ticker, period_days=252):
     """한국 주식 기술적 지표 계산"""
     try:
-        # 데이터 조회 기간 설정 (1년 + 여유분)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=period_days + 100)
-        
-        end_str = end_date.strftime("%Y%m%d")
-        start_str = start_date.strftime("%Y%m%d")
-        
-        # 주가 데이터 조회
-        df = stock.get_market_ohlcv_by_date(start_str, end_str, ticker)
-        
-        if df.empty or len(df) < 20:
-            return None
-        
-        # 현재가 (최신 종가)
-        current_price = df['종가'].iloc[-1]
-        
-        # RSI 계산 (14일) - Wilder's Smoothing 방식
-        def calculate_rsi(prices, window=14):
-            delta = prices.diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            
-            # 첫 번째 평균은 단순 평균
-            avg_gain = gain.rolling(window=window).mean()
-            avg_loss = loss.rolling(window=window).mean()
-            
-            # Wilder's Smoothing 적용
-            for i in range(window, len(gain)):
-                avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (window-1) + gain.iloc[i]) / window
-                avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (window-1) + loss.iloc[i]) / window
-            
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-            return rsi
-        
-        rsi = calculate_rsi(df['종가']).iloc[-1]
-        
-        # 볼린저 밴드 계산 (20일)
-        def calculate_bollinger_bands(prices, window=20, num_std=2):
-            rolling_mean = prices.rolling(window).mean()
-            rolling_std = prices.rolling(window).std()
-            upper_band = rolling_mean + (rolling_std * num_std)
-            lower_band = rolling_mean - (rolling_std * num_std)
-            
-            # %B 계산
-            percent_b = (prices - lower_band) / (upper_band - lower_band)
-            
-            # 밴드폭 계산 (상대적)
-            band_width = (upper_band - lower_band) / rolling_mean
-            
-            return percent_b, band_width
-        
-        percent_b, band_width = calculate_bollinger_bands(df['종가'])
-        
-        # 최신 볼린저 밴드 %B값
-        current_percent_b = percent_b.iloc[-1] if not pd.isna(percent_b.iloc[-1]) else 0
-        
-        # 최신 볼린저 밴드폭
-        current_band_width = band_width.iloc[-1] if not pd.isna(band_width.iloc[-1]) else 0
-        
-        # 52주(약 252일) 볼린저 밴드폭 평균
-        if len(band_width) >= 252:
-            avg_52w_band_width = band_width.tail(252).mean()
-        else:
-            avg_52w_band_width = band_width.mean()
-        
-        return {
-            'current_price': current_price,
-            'rsi': rsi if not pd.isna(rsi) else 0,
-            'percent_b': current_percent_b,
-            'band_width': current_band_width,
-            'avg_52w_band_width': avg_52w_band_width if not pd.isna(avg_52w_band_width) else 0
-        }
+        with span('app.calculate_technical_indicators_kr'):
+            return compute_kr_indicators(ticker, period_days)
         
     except Exception as e:
         st.warning(f"종목 {ticker} 데이터 처리 오류: {e}")
         return None
 
-@st.cache_data(ttl=1800)  # 30분 캐시
-def calculate_technical_indicators_us(ticker, period_days=252):
-    """미국 주식 기술적 지표 계산"""
+def calculate_technical_indicators_us(tickers):
+    """
+    미국 주식 기술적 지표 계산 (종목별 결과를 관심 종목 저장소에 30분 캐시)
+    저장된 결과가 없는 종목만 한 번에 다운로드하므로 다른 세션/목록과 겹치는 종목은 다시 계산하지 않음
+    """
     try:
-        # yfinance로 1년 + 여유분 데이터 조회
-        stock_data = yf.Ticker(ticker)
-        df = stock_data.history(period="2y")  # 2년 데이터로 충분한 여유 확보
-        
-        if df.empty or len(df) < 20:
-            return None
-        
-        # 현재가 (최신 종가)
-        current_price = df['Close'].iloc[-1]
-        
-        # RSI 계산 (14일)
-        def calculate_rsi(prices, window=14):
-            delta = prices.diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            
-            # 첫 번째 평균은 단순 평균
-            avg_gain = gain.rolling(window=window).mean()
-            avg_loss = loss.rolling(window=window).mean()
-            
-            # Wilder's Smoothing 적용
-            for i in range(window, len(gain)):
-                avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (window-1) + gain.iloc[i]) / window
-                avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (window-1) + loss.iloc[i]) / window
-            
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-            return rsi
-        
-        rsi = calculate_rsi(df['Close']).iloc[-1]
-        
-        # 볼린저 밴드 계산 (20일)
-        def calculate_bollinger_bands(prices, window=20, num_std=2):
-            rolling_mean = prices.rolling(window).mean()
-            rolling_std = prices.rolling(window).std()
-            upper_band = rolling_mean + (rolling_std * num_std)
-            lower_band = rolling_mean - (rolling_std * num_std)
-            
-            # %B 계산
-            percent_b = (prices - lower_band) / (upper_band - lower_band)
-            
-            # 밴드폭 계산 (상대적)
-            band_width = (upper_band - lower_band) / rolling_mean
-            
-            return percent_b, band_width
-        
-        percent_b, band_width = calculate_bollinger_bands(df['Close'])
-        
-        # 최신 볼린저 밴드 %B값
-        current_percent_b = percent_b.iloc[-1] if not pd.isna(percent_b.iloc[-1]) else 0
-        
-        # 최신 볼린저 밴드폭
-        current_band_width = band_width.iloc[-1] if not pd.isna(band_width.iloc[-1]) else 0
-        
-        # 52주(약 252일) 볼린저 밴드폭 평균
-        if len(band_width) >= 252:
-            avg_52w_band_width = band_width.tail(252).mean()
-        else:
-            avg_52w_band_width = band_width.mean()
-        
-        return {
-            'current_price': current_price,
-            'rsi': rsi if not pd.isna(rsi) else 0,
-            'percent_b': current_percent_b,
-            'band_width': current_band_width,
-            'avg_52w_band_width': avg_52w_band_width if not pd.isna(avg_52w_band_width) else 0
-        }
-        
+        with span('app.calculate_technical_indicators_us'):
+            return get_us_indicators(
+                tickers,
+                on_error=lambda ticker, e: st.warning(f"종목 {ticker} 데이터 처리 오류: {e}")
+            )
     except Exception as e:
-        st.warning(f"종목 {ticker} 데이터 처리 오류: {e}")
+        st.warning(f"미국 주식 가격 데이터 조회 오류: {e}")
+        return {}
+
+def load_precomputed_result(name, schedule):
+    """
+    백그라운드 워커(precompute.py)가 계산해 둔 최신 결과 조회
+    새로고침 직후에는 사용하지 않고 직접 조회
+    """
+    if st.session_state.get('force_live_scan'):
         return None
+    return load_current_result(name, schedule)
 
 def load_korean_stocks():
     """한국 주식 데이터 로딩"""
+    # 사전 계산된 최신 결과가 있으면 바로 사용
+    precomputed = load_precomputed_result(KRX_SCAN_RESULT, KRX_SCHEDULE)
+    if precomputed is not None:
+        st.session_state.korean_computed_at = precomputed['computed_at']
+        return precomputed['value']
+    
     with st.spinner("한국 주식 시가총액 상위 100개 종목 조회 중..."):
         top100_data = get_market_cap_top100()
     
@@ -549,46 +314,99 @@ def load_korean_stocks():
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    # 결과 저장할 리스트
-    results = []
+    # 워커 스레드에서도 st.cache_data/st.warning이 동작하도록 스크립트 컨텍스트 전달
+    ctx = get_script_run_ctx()
     
-    # 각 종목별 기술적 지표 계산
-    for i, (ticker, row) in enumerate(top100_data.iterrows()):
-        status_text.text(f"처리 중: {row['종목명']} ({i+1}/{len(top100_data)})")
-        progress_bar.progress((i + 1) / len(top100_data))
-        
-        indicators = calculate_technical_indicators_kr(ticker)
-        
-        if indicators:
-            results.append({
-                '종목코드': ticker,
-                '종목명': row['종목명'],
-                '현재가': f"{indicators['current_price']:,}원",
-                'RSI': f"{indicators['rsi']:.2f}",
-                '볼린저밴드%B': f"{indicators['percent_b']:.4f}",
-                '볼린저밴드폭': f"{indicators['band_width']:.4f}",
-                '52주볼린저밴드폭평균': f"{indicators['avg_52w_band_width']:.4f}",
-                '시가총액': format_market_cap(row['시가총액']),
-                # 필터링용 원본 값 저장
-                'RSI_raw': indicators['rsi'],
-                'percent_b_raw': indicators['percent_b'],
-                'band_width_raw': indicators['band_width'],
-                'avg_52w_band_width_raw': indicators['avg_52w_band_width']
-            })
-        
-        # API 호출 제한을 위한 짧은 대기
-        time.sleep(0.1)
+    def attach_script_run_ctx():
+        add_script_run_ctx(threading.current_thread(), ctx)
+    
+    def on_progress(done, total, ticker):
+        status_text.text(f"처리 완료: {top100_data.loc[ticker, '종목명']} ({done}/{total})")
+        progress_bar.progress(done / total)
+    
+    def on_error(ticker, error):
+        st.warning(f"종목 {ticker} 데이터 처리 오류: {error}")
+    
+    # 각 종목별 기술적 지표 동시 계산
+    results = scan_korean_stocks(
+        top100_data,
+        compute=calculate_technical_indicators_kr,
+        initializer=attach_script_run_ctx,
+        on_progress=on_progress,
+        on_error=on_error
+    )
     
     # 진행 상태 숨기기
     progress_bar.empty()
     status_text.empty()
     
-    return pd.DataFrame(results)
+    st.session_state.korean_computed_at = datetime.now()
+    return results
+
+def load_korean_full_market():
+    """한국 전 종목(코스피+코스닥) 데이터 로딩"""
+    # 사전 계산된 최신 결과가 있으면 바로 사용
+    precomputed = load_precomputed_result(KRX_FULL_SCAN_RESULT, KRX_SCHEDULE)
+    if precomputed is not None:
+        st.session_state.korean_computed_at = precomputed['computed_at']
+        return precomputed['value']
+    
+    with st.spinner("코스피+코스닥 전 종목 조회 중..."):
+        market_caps = get_market_caps_all()
+    
+    if market_caps.empty:
+        st.error("데이터를 불러올 수 없습니다. 잠시 후 다시 시도해주세요.")
+        return None
+    
+    st.success(f"총 {len(market_caps)}개 종목 조회 완료")
+    
+    # 진행 상태 표시 (종목별이 아닌 거래일별 전 종목 일괄 조회)
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    def on_progress(done, total, date):
+        status_text.text(f"일별 전 종목 시세 조회: {date:%Y-%m-%d} ({done}/{total})")
+        progress_bar.progress(done / total)
+    
+    try:
+        results = scan_krx_full_market(market_caps, on_progress=on_progress)
+    except Exception as e:
+        st.error(f"전 종목 시세 조회 오류: {e}")
+        results = None
+    
+    # 진행 상태 숨기기
+    progress_bar.empty()
+    status_text.empty()
+    
+    st.session_state.korean_computed_at = datetime.now()
+    return results
+
+def get_us_tickers():
+    """선택한 미국 관심 종목 목록 (저장소에서 조회, 기본 목록은 없으면 기본 티커로 생성)"""
+    store = get_watchlist_store()
+    name = st.session_state.get('us_watchlist', US_WATCHLIST)
+    if name == US_WATCHLIST:
+        return store.ensure(name, DEFAULT_US_TICKERS)
+    return store.get(name) or []
+
+def reset_us_data():
+    """미국 종목 목록이 바뀌면 결과를 다시 조회하도록 표시"""
+    st.session_state.us_data = None
+    st.session_state.data_loaded = False
 
 def load_us_stocks():
     """미국 주식 데이터 로딩"""
-    # 세션 상태에서 사용자 정의 티커 리스트 가져오기
-    current_tickers = st.session_state.get('us_tickers', DEFAULT_US_TICKERS.copy())
+    # 관심 종목 저장소에서 선택한 목록의 티커 가져오기 (모든 세션이 공유)
+    current_tickers = get_us_tickers()
+    if not current_tickers:
+        st.warning("관심 종목 목록이 비어 있습니다. 사이드바에서 티커를 추가해주세요.")
+        return None
+    
+    # 같은 티커 목록으로 사전 계산된 최신 결과가 있으면 바로 사용
+    precomputed = load_precomputed_result(US_SCAN_RESULT, US_SCHEDULE)
+    if precomputed is not None and precomputed['meta'].get('tickers') == list(current_tickers):
+        st.session_state.us_computed_at = precomputed['computed_at']
+        return precomputed['value']
     
     with st.spinner(f"미국 주식 {len(current_tickers)}개 종목 조회 중..."):
         us_stocks = get_us_stock_data(current_tickers)
@@ -599,97 +417,101 @@ def load_us_stocks():
     
     st.success(f"총 {len(us_stocks)}개 종목 조회 완료")
     
-    # 진행 상태 표시
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    # 전체 종목 가격 데이터 일괄 조회 및 기술적 지표 계산
+    with st.spinner("미국 주식 가격 데이터 일괄 조회 중..."):
+        us_indicators = calculate_technical_indicators_us(tuple(us_stocks['ticker']))
     
-    # 결과 저장할 리스트
-    results = []
-    
-    # 각 종목별 기술적 지표 계산
-    for i, row in us_stocks.iterrows():
-        ticker = row['ticker']
-        name = row['name']
-        market_cap = row['market_cap']
-        
-        status_text.text(f"처리 중: {name} ({i+1}/{len(us_stocks)})")
-        progress_bar.progress((i + 1) / len(us_stocks))
-        
-        indicators = calculate_technical_indicators_us(ticker)
-        
-        if indicators:
-            results.append({
-                '종목코드': ticker,
-                '종목명': name,
-                '현재가': f"${indicators['current_price']:.2f}",
-                'RSI': f"{indicators['rsi']:.2f}",
-                '볼린저밴드%B': f"{indicators['percent_b']:.4f}",
-                '볼린저밴드폭': f"{indicators['band_width']:.4f}",
-                '52주볼린저밴드폭평균': f"{indicators['avg_52w_band_width']:.4f}",
-                '시가총액': format_market_cap(market_cap),
-                # 필터링용 원본 값 저장
-                'RSI_raw': indicators['rsi'],
-                'percent_b_raw': indicators['percent_b'],
-                'band_width_raw': indicators['band_width'],
-                'avg_52w_band_width_raw': indicators['avg_52w_band_width']
-            })
-        
-        # API 호출 제한을 위한 짧은 대기
-        time.sleep(0.2)
-    
-    # 진행 상태 숨기기
-    progress_bar.empty()
-    status_text.empty()
-    
-    return pd.DataFrame(results)
+    st.session_state.us_computed_at = datetime.now()
+    return scan_us_stocks(us_stocks, us_indicators)
 
 def manage_us_tickers():
     """미국 주식 티커 관리 인터페이스"""
     st.sidebar.subheader("🔧 미국 주식 티커 관리")
     
-    # 세션 상태에서 현재 티커 리스트 가져오기
-    if 'us_tickers' not in st.session_state:
-        st.session_state.us_tickers = DEFAULT_US_TICKERS.copy()
+    store = get_watchlist_store()
+    store.ensure(US_WATCHLIST, DEFAULT_US_TICKERS)
+    
+    # 관심 종목 목록 선택 (저장소에 보관, 모든 세션이 공유)
+    watchlist_names = store.names()
+    selected = st.session_state.get('us_watchlist', US_WATCHLIST)
+    if selected not in watchlist_names:
+        selected = US_WATCHLIST
+    watchlist = st.sidebar.selectbox(
+        "📋 관심 종목 목록",
+        watchlist_names,
+        index=watchlist_names.index(selected)
+    )
+    if watchlist != st.session_state.get('us_watchlist', US_WATCHLIST):
+        st.session_state.us_watchlist = watchlist
+        reset_us_data()
+    
+    with st.sidebar.expander("🆕 새 목록 만들기", expanded=False):
+        new_name = st.text_input("목록 이름", key="new_watchlist_name").strip()
+        if st.button("현재 목록 복사해서 만들기", key="create_watchlist"):
+            if not new_name:
+                st.warning("목록 이름을 입력해주세요.")
+            elif not WATCHLIST_NAME_PATTERN.fullmatch(new_name):
+                st.warning("목록 이름은 한글/영문/숫자/_/-/공백으로 최대 40자까지 입력할 수 있습니다.")
+            elif new_name in watchlist_names:
+                st.warning(f"'{new_name}' 목록이 이미 있습니다.")
+            else:
+                store.save(new_name, get_us_tickers())
+                st.session_state.us_watchlist = new_name
+                reset_us_data()
+                st.rerun()
     
-    current_tickers = st.session_state.us_tickers
+    current_tickers = get_us_tickers()
     
     # 현재 티커 수 표시
     st.sidebar.write(f"현재 등록된 종목: {len(current_tickers)}개")
     
     # 티커 추가 섹션
     with st.sidebar.expander("➕ 티커 추가", expanded=False):
-        new_ticker = st.text_input(
-            "추가할 티커 입력",
-            placeholder="예: NFLX, DIS, etc.",
+        query = st.text_input(
+            "추가할 티커 또는 종목명 입력",
+            placeholder="예: NFLX, Netflix, 삼성전자",
             key="new_ticker_input"
-        ).upper().strip()
+        ).strip()
+        
+        # 로컬 검색 인덱스에서 추천 종목 검색 (네트워크 조회 없음)
+        search_index = get_ticker_search_index()
+        suggestions = {entry['symbol']: entry for entry in search_index.search(query)} if query else {}
+        if suggestions:
+            new_ticker = st.selectbox(
+                "검색 결과",
+                list(suggestions),
+                format_func=lambda symbol: f"{symbol} · {suggestions[symbol]['name']}",
+                key="ticker_suggestion"
+            )
+        else:
+            new_ticker = query.upper()
         
         col1, col2 = st.columns(2)
         with col1:
             if st.button("✅ 추가", key="add_ticker"):
-                if new_ticker:
-                    if new_ticker not in current_tickers:
-                        # 티커 유효성 검증
-                        with st.spinner(f"{new_ticker} 유효성 검증 중..."):
-                            if validate_ticker(new_ticker):
-                                st.session_state.us_tickers.append(new_ticker)
-                                st.success(f"{new_ticker} 추가됨!")
-                                # 데이터 새로고침 필요
-                                st.session_state.us_data = None
-                                st.session_state.data_loaded = False
-                                st.rerun()
-                            else:
-                                st.error(f"{new_ticker}는 유효하지 않은 티커입니다.")
-                    else:
-                        st.warning(f"{new_ticker}는 이미 등록된 티커입니다.")
-                else:
+                if not new_ticker:
                     st.warning("티커를 입력해주세요.")
+                elif not TICKER_PATTERN.fullmatch(new_ticker):
+                    # 형식이 맞지 않으면 네트워크 검증 없이 거부
+                    st.error(f"{new_ticker}는 티커 형식이 아닙니다. (영문 대문자/숫자/.-^=, 최대 15자)")
+                elif new_ticker in current_tickers:
+                    st.warning(f"{new_ticker}는 이미 등록된 티커입니다.")
+                else:
+                    # 티커 유효성 검증 (검색 인덱스에 있는 종목은 바로 추가)
+                    with st.spinner(f"{new_ticker} 유효성 검증 중..."):
+                        if new_ticker in search_index or validate_ticker(new_ticker):
+                            store.add(watchlist, new_ticker)
+                            st.success(f"{new_ticker} 추가됨!")
+                            # 데이터 새로고침 필요
+                            reset_us_data()
+                            st.rerun()
+                        else:
+                            st.error(f"{new_ticker}는 유효하지 않은 티커입니다.")
         
         with col2:
             if st.button("🔄 초기화", key="reset_tickers"):
-                st.session_state.us_tickers = DEFAULT_US_TICKERS.copy()
-                st.session_state.us_data = None
-                st.session_state.data_loaded = False
+                store.save(watchlist, DEFAULT_US_TICKERS)
+                reset_us_data()
                 st.success("티커 목록이 초기화되었습니다!")
                 st.rerun()
     
@@ -708,13 +530,10 @@ def manage_us_tickers():
             
             if st.button("🗑️ 선택 항목 제거", key="remove_tickers"):
                 if tickers_to_remove:
-                    for ticker in tickers_to_remove:
-                        if ticker in st.session_state.us_tickers:
-                            st.session_state.us_tickers.remove(ticker)
+                    store.remove(watchlist, tickers_to_remove)
                     
                     # 데이터 새로고침 필요
-                    st.session_state.us_data = None
-                    st.session_state.data_loaded = False
+                    reset_us_data()
                     st.success(f"{len(tickers_to_remove)}개 티커가 제거되었습니다!")
                     st.rerun()
                 else:
@@ -733,72 +552,101 @@ def manage_us_tickers():
             st.write("등록된 티커가 없습니다.")
 
 def apply_filters(df, rsi_filter, bb_percent_filter, bb_width_filter):
-    """필터 적용 (메모리에서 빠르게 처리)"""
+    """필터 적용 (조건별 불리언 마스크를 합쳐 한 번만 선택, 필터가 없으면 원본 그대로 반환)"""
     if df is None or df.empty:
         return df, False
     
-    filtered_df = df.copy()
+    mask = np.ones(len(df), dtype=bool)
     filter_applied = False
     
     # RSI 필터 - 50 미만 옵션 추가
     if rsi_filter == "40 미만":
-        filtered_df = filtered_df[filtered_df['RSI_raw'] < 40]
+        mask &= df['RSI'].to_numpy() < 40
         filter_applied = True
     elif rsi_filter == "50 미만":
-        filtered_df = filtered_df[filtered_df['RSI_raw'] < 50]
+        mask &= df['RSI'].to_numpy() < 50
         filter_applied = True
     
     # 볼린저 밴드 %B 필터
     if bb_percent_filter == "0.5 미만":
-        filtered_df = filtered_df[filtered_df['percent_b_raw'] < 0.5]
+        mask &= df['볼린저밴드%B'].to_numpy() < 0.5
         filter_applied = True
     
     # 볼린저 밴드폭 필터
     if bb_width_filter == "52주 평균보다 작음":
-        filtered_df = filtered_df[filtered_df['band_width_raw'] < filtered_df['avg_52w_band_width_raw']]
+        mask &= df['볼린저밴드폭'].to_numpy() < df['52주볼린저밴드폭평균'].to_numpy()
         filter_applied = True
     
-    return filtered_df, filter_applied
+    if not filter_applied:
+        return df, False
+    return df[mask], True
+
+def format_market_cap(value):
+    """시가총액을 축약 형태로 표시"""
+    if value >= 1e12:  # 1조 이상
+        return f"{value/1e12:.1f}T"
+    elif value >= 1e9:  # 10억 이상
+        return f"{value/1e9:.1f}B"
+    elif value >= 1e6:  # 100만 이상
+        return f"{value/1e6:.1f}M"
+    else:
+        return f"{value:,.0f}"
 
-def display_results(df, original_count, filter_applied, country):
-    """결과 표시"""
+def format_result_table(df, country):
+    """CSV 내보내기용 표시 문자열 테이블 생성"""
+    if country == "한국":
+        price = df['현재가'].map(lambda v: f"{v:,.0f}원")
+    else:
+        price = df['현재가'].map(lambda v: f"${v:.2f}")
+    
+    return df.assign(**{
+        '현재가': price,
+        'RSI': df['RSI'].map(lambda v: f"{v:.2f}"),
+        '볼린저밴드%B': df['볼린저밴드%B'].map(lambda v: f"{v:.4f}"),
+        '볼린저밴드폭': df['볼린저밴드폭'].map(lambda v: f"{v:.4f}"),
+        '52주볼린저밴드폭평균': df['52주볼린저밴드폭평균'].map(lambda v: f"{v:.4f}"),
+        '시가총액': df['시가총액'].map(format_market_cap),
+    })
+
+def display_results(df, original_count, filter_applied, country, computed_at=None):
+    """결과 표시 (computed_at: 결과 계산 시각, 숫자 형식은 column_config로 지정)"""
     if df is None or df.empty:
         if df is None:
             return
         st.warning("선택한 필터 조건에 맞는 종목이 없습니다.")
         return
     
-    # 필터링용 원본 컬럼 제거
-    display_df = df.drop(columns=['RSI_raw', 'percent_b_raw', 'band_width_raw', 'avg_52w_band_width_raw'])
-    
     st.markdown(f"### 📊 {country} 주식 기술적 지표 결과")
     
     if filter_applied:
-        st.markdown(f"**필터링 결과**: {len(display_df)}개 종목 (전체 {original_count}개 중)")
+        st.markdown(f"**필터링 결과**: {len(df)}개 종목 (전체 {original_count}개 중)")
     else:
-        st.markdown(f"**전체 종목**: {len(display_df)}개")
+        st.markdown(f"**전체 종목**: {len(df)}개")
         
-    st.markdown(f"**업데이트 시간**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    computed_at = computed_at or datetime.now()
+    st.markdown(f"**업데이트 시간**: {computed_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    price_format = "%d원" if country == "한국" else "dollar"
     
     # 테이블 표시
     st.dataframe(
-        display_df,
+        df,
         use_container_width=True,
         hide_index=True,
         column_config={
             '종목코드': st.column_config.TextColumn('종목코드', width=100),
             '종목명': st.column_config.TextColumn('종목명', width=120),
-            '현재가': st.column_config.TextColumn('현재가', width=100),
-            'RSI': st.column_config.TextColumn('RSI', width=80),
-            '볼린저밴드%B': st.column_config.TextColumn('볼린저밴드%B', width=120),
-            '볼린저밴드폭': st.column_config.TextColumn('볼린저밴드폭', width=120),
-            '52주볼린저밴드폭평균': st.column_config.TextColumn('52주볼린저밴드폭평균', width=150),
-            '시가총액': st.column_config.TextColumn('시가총액', width=100)
+            '현재가': st.column_config.NumberColumn('현재가', format=price_format, width=100),
+            'RSI': st.column_config.NumberColumn('RSI', format="%.2f", width=80),
+            '볼린저밴드%B': st.column_config.NumberColumn('볼린저밴드%B', format="%.4f", width=120),
+            '볼린저밴드폭': st.column_config.NumberColumn('볼린저밴드폭', format="%.4f", width=120),
+            '52주볼린저밴드폭평균': st.column_config.NumberColumn('52주볼린저밴드폭평균', format="%.4f", width=150),
+            '시가총액': st.column_config.NumberColumn('시가총액', format="compact", width=100)
         }
     )
     
     # CSV 다운로드
-    csv_data = display_df.to_csv(index=False, encoding='utf-8-sig')
+    csv_data = format_result_table(df, country).to_csv(index=False, encoding='utf-8-sig')
     st.download_button(
         label="💾 CSV 파일 다운로드",
         data=csv_data,
@@ -806,6 +654,57 @@ def display_results(df, original_count, filter_applied, country):
         mime="text/csv"
     )
 
+def display_metrics_panel():
+    """단계별 소요 시간 디버그 패널 (KRX/Yahoo 조회, 지표 계산, 화면 표시 구분)"""
+    with st.expander("🛠 디버그: 단계별 소요 시간"):
+        snapshot = REGISTRY.snapshot()
+        if not snapshot['histograms']:
+            st.write("아직 기록된 구간이 없습니다.")
+            return
+        
+        st.caption("프로세스 전체 누적값 (캐시에 적중한 호출은 기록되지 않음)")
+        timings = pd.DataFrame([
+            {
+                '구간': h['name'],
+                '라벨': ', '.join(f"{k}={v}" for k, v in h['labels'].items()),
+                '호출 수': h['count'],
+                '합계(초)': h['sum'],
+                '평균(ms)': h['mean'] * 1000,
+                'p95(ms)': h['p95'] * 1000,
+                '최대(ms)': h['max'] * 1000,
+            }
+            for h in snapshot['histograms']
+        ]).sort_values('합계(초)', ascending=False)
+        st.dataframe(
+            timings,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                '합계(초)': st.column_config.NumberColumn('합계(초)', format="%.3f"),
+                '평균(ms)': st.column_config.NumberColumn('평균(ms)', format="%.1f"),
+                'p95(ms)': st.column_config.NumberColumn('p95(ms)', format="%.1f"),
+                '최대(ms)': st.column_config.NumberColumn('최대(ms)', format="%.1f"),
+            }
+        )
+        
+        if snapshot['counters']:
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        '카운터': c['name'],
+                        '라벨': ', '.join(f"{k}={v}" for k, v in c['labels'].items()),
+                        '값': c['value'],
+                    }
+                    for c in snapshot['counters']
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        if st.button("🧹 계측 초기화"):
+            REGISTRY.reset()
+            st.rerun()
+
 def main():
     st.title("🌍 KR/US Stock")
     st.markdown("### 시가총액 상위 종목의 기술적 지표 분석")
@@ -822,8 +721,10 @@ def main():
         st.session_state.data_loaded = False
     if 'current_country' not in st.session_state:
         st.session_state.current_country = "한국"
-    if 'us_tickers' not in st.session_state:
-        st.session_state.us_tickers = DEFAULT_US_TICKERS.copy()
+    if 'us_watchlist' not in st.session_state:
+        st.session_state.us_watchlist = US_WATCHLIST
+    if 'korean_full_market' not in st.session_state:
+        st.session_state.korean_full_market = False
     
     # 사이드바 설정
     st.sidebar.header("설정")
@@ -838,6 +739,16 @@ def main():
     # 미국 선택 시 티커 관리 인터페이스 표시
     if country == "미국":
         manage_us_tickers()
+    else:
+        # 한국: 시총 상위 100개 대신 전 종목 스캔
+        full_market = st.sidebar.checkbox(
+            "🔎 전 종목 스캔 (코스피+코스닥)",
+            value=st.session_state.korean_full_market
+        )
+        if full_market != st.session_state.korean_full_market:
+            st.session_state.korean_full_market = full_market
+            st.session_state.korean_data = None
+            st.session_state.data_loaded = False
     
     # 국가가 변경되었는지 확인
     if country != st.session_state.current_country:
@@ -875,31 +786,43 @@ def main():
     # 새로고침 처리
     if refresh_button:
         st.cache_data.clear()
+        get_watchlist_store().clear_results(US_INDICATOR_NAMESPACE)
         st.session_state.korean_data = None
         st.session_state.us_data = None
         st.session_state.data_loaded = False
+        # 사전 계산 결과 대신 직접 조회
+        st.session_state.force_live_scan = True
         st.rerun()
     
     # 데이터 로딩 처리
     if load_button or not st.session_state.data_loaded:
         if country == "한국":
             if st.session_state.korean_data is None:
-                st.session_state.korean_data = load_korean_stocks()
+                if st.session_state.korean_full_market:
+                    st.session_state.korean_data = load_korean_full_market()
+                else:
+                    st.session_state.korean_data = load_korean_stocks()
             st.session_state.data_loaded = True
         else:  # 미국
             if st.session_state.us_data is None:
                 st.session_state.us_data = load_us_stocks()
             st.session_state.data_loaded = True
+        st.session_state.force_live_scan = False
     
     # 데이터가 로딩되지 않은 경우 안내
     if not st.session_state.data_loaded:
-        ticker_count = len(st.session_state.us_tickers) if country == "미국" else 100
-        st.info(f"👆 사이드바에서 '📊 데이터 로딩' 버튼을 클릭하여 {country} 주식 데이터({ticker_count}개 종목)를 불러오세요.")
+        if country == "미국":
+            ticker_count = f"{len(get_us_tickers())}개 종목"
+        elif st.session_state.korean_full_market:
+            ticker_count = "전 종목"
+        else:
+            ticker_count = "100개 종목"
+        st.info(f"👆 사이드바에서 '📊 데이터 로딩' 버튼을 클릭하여 {country} 주식 데이터({ticker_count})를 불러오세요.")
         
         # 미국 주식인 경우 현재 등록된 티커 미리보기
         if country == "미국":
             with st.expander("📋 현재 등록된 미국 주식 티커 미리보기"):
-                current_tickers = st.session_state.us_tickers
+                current_tickers = get_us_tickers()
                 st.write(f"총 {len(current_tickers)}개 종목이 등록되어 있습니다.")
                 # 10개씩 한 줄에 표시
                 ticker_chunks = [current_tickers[i:i+10] for i in range(0, len(current_tickers), 10)]
@@ -910,8 +833,10 @@ def main():
     # 현재 선택된 국가의 데이터 가져오기
     if country == "한국":
         current_data = st.session_state.korean_data
+        computed_at = st.session_state.get('korean_computed_at')
     else:
         current_data = st.session_state.us_data
+        computed_at = st.session_state.get('us_computed_at')
     
     if current_data is None or current_data.empty:
         st.error("데이터를 불러올 수 없습니다. 새로고침 후 다시 시도해주세요.")
@@ -921,7 +846,8 @@ def main():
     filtered_data, filter_applied = apply_filters(current_data, rsi_filter, bb_percent_filter, bb_width_filter)
     
     # 결과 표시
-    display_results(filtered_data, len(current_data), filter_applied, country)
+    with span('render.display_results', country=country):
+        display_results(filtered_data, len(current_data), filter_applied, country, computed_at)
     
     # 지표 설명
     with st.expander("📖 지표 설명"):
@@ -958,6 +884,8 @@ def main():
         - **원/달러 환율**: KRW/USD 환율
         - **비트코인/이더리움**: 주요 암호화폐 가격
         """)
+    
+    display_metrics_panel()
 
 if __name__ == "__main__":
     main()
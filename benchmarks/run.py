@@ -0,0 +1,319 @@
+"""
+지표 계산/스캔/Flask 엔드포인트 벤치마크
+
+    python benchmarks/run.py                                  # 기본 크기, 합성 데이터
+    python benchmarks/run.py --suites kernels --full          # 5,000 종목 x 5,000 봉까지
+    python benchmarks/run.py --source replay                  # 기록된 네트워크 응답 재생
+    python benchmarks/run.py --source record                  # 실제 yf.download 응답 기록
+    python benchmarks/run.py --source record --record-from synthetic   # 합성 데이터로 기록 (네트워크 없음)
+    python benchmarks/run.py --output new.json --compare old.json   # 커밋 간 비교
+
+결과는 JSON(메타데이터 + 항목별 min/median/mean 초)으로 저장
+"""
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 가격/결과/상태 저장소는 임시 폴더 사용 (실행 환경의 캐시에 영향 없음)
+WORK_DIR = tempfile.mkdtemp(prefix='stock_port_bench_')
+os.environ['STOCK_PORT_DATA_DIR'] = os.path.join(WORK_DIR, 'ohlcv')
+os.environ['STOCK_PORT_RESULT_DIR'] = os.path.join(WORK_DIR, 'results')
+os.environ['STOCK_PORT_STATE_DIR'] = os.path.join(WORK_DIR, 'indicator_state')
+os.environ['STOCK_PORT_CALENDAR_DIR'] = os.path.join(WORK_DIR, 'calendar')
+os.environ['STOCK_PORT_WATCHLIST_DB'] = os.path.join(WORK_DIR, 'watchlists.sqlite3')
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from indicators import calculate_bollinger_bands, calculate_rsi, calculate_stochastic, compute_indicators
+from indicator_state import IndicatorState
+from market_data import RecordedDownloader, get_us_ohlcv
+from panel import Panel, panel_bollinger_bands, panel_rsi
+from price_store import PriceStore
+from scans import compute_panel_indicators, scan_korean_stocks, summarize_technical_indicators
+
+from synthetic import (
+    SyntheticDownloader,
+    synthetic_close_matrix,
+    synthetic_cross_sections,
+    synthetic_frames,
+    synthetic_ohlcv,
+    synthetic_panel,
+    synthetic_tickers,
+)
+
+# 기록된 네트워크 응답 폴더
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Flask 분석 페이지 종목 (flask_app과 동일)
+FLASK_TICKERS = ["MSFT", "GOOG", "META", "AMZN", "AAPL", "TSLA", "NVDA", "AVGO", "ORCL",
+                 "PLTR", "IONQ", "RKLB", "TEM", "HIMS", "CRDO", "CLS", "MSTY"]
+
+# 기본/전체 실행 크기 (종목 수, 봉 수)
+DEFAULT_TICKERS = (1, 100, 1000)
+FULL_TICKERS = (1, 100, 1000, 5000)
+DEFAULT_BARS = (100, 1000, 5000)
+
+# 한 번에 만들 최대 행렬 크기 (기본 실행에서 메모리 사용 제한)
+DEFAULT_MAX_CELLS = 2_000_000
+FULL_MAX_CELLS = 25_000_000
+
+
+def measure(func, repeat=5, setup=None):
+    """func 실행 시간 측정 (setup은 매 회 실행 전 호출되며 측정에서 제외)"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'repeat': repeat,
+    }
+
+
+class Recorder:
+    """벤치마크 결과 수집"""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, suite, name, func, repeat=None, setup=None, **params):
+        timing = measure(func, repeat or self.repeat, setup)
+        self.results.append({'suite': suite, 'name': name, 'params': params, **timing})
+        label = ', '.join(f"{k}={v}" for k, v in params.items())
+        print(f"[{suite}] {name} ({label}): median {timing['median'] * 1000:.2f}ms, min {timing['min'] * 1000:.2f}ms")
+
+
+def sizes(tickers, bars, max_cells):
+    return [(n, b) for n in tickers for b in bars if n * b <= max_cells]
+
+
+def bench_kernels(rec, ticker_sizes, max_cells):
+    """지표 커널 (종목 수 x 봉 수)"""
+    for n, bars in sizes(ticker_sizes, DEFAULT_BARS, max_cells):
+        close = synthetic_close_matrix(n, bars)
+        frame = pd.DataFrame(close)
+        high, low = frame * 1.01, frame * 0.99
+        panel = synthetic_panel(n, bars)
+
+        rec.run('kernels', 'calculate_rsi', lambda: calculate_rsi(frame), tickers=n, bars=bars)
+        rec.run('kernels', 'calculate_bollinger_bands', lambda: calculate_bollinger_bands(frame, 20, 2),
+                tickers=n, bars=bars)
+        rec.run('kernels', 'calculate_stochastic', lambda: calculate_stochastic(high, low, frame, 14, 3, 3),
+                tickers=n, bars=bars)
+        rec.run('kernels', 'panel_rsi', lambda: panel_rsi(panel, 14), tickers=n, bars=bars)
+        rec.run('kernels', 'panel_bollinger_bands', lambda: panel_bollinger_bands(panel, 20, 2),
+                tickers=n, bars=bars)
+
+    # 종목 하나의 전체 지표 명세 계산과 누적 상태 1봉 갱신
+    spec = "MA 5/20/50/120/200, RSI14, BB20x2, STOCH 5/3/3, STOCH 10/6/6, STOCH 20/12/12"
+    for bars in DEFAULT_BARS:
+        df = synthetic_ohlcv(bars)
+        rec.run('kernels', 'compute_indicators', lambda: compute_indicators(df, spec), bars=bars)
+
+        state = IndicatorState(spec)
+        for date, bar in zip(df.index[:-1], df.iloc[:-1].to_dict('records')):
+            state.update(date, bar)
+        last_date, last_bar = df.index[-1], df.iloc[-1].to_dict()
+
+        # 갱신은 상태를 바꾸므로 매 회 복사본으로 측정
+        current = {}
+        rec.run('kernels', 'IndicatorState.update', lambda: current['state'].update(last_date, last_bar),
+                setup=lambda: current.update(state=copy.deepcopy(state)), bars=bars)
+
+
+def make_downloader(source, history_bars=1000, record_from='yfinance'):
+    """
+    데이터 소스별 yf.download 대체 함수
+    record_from: 기록할 응답의 출처 (yfinance: 실제 조회, synthetic: 합성 데이터)
+    """
+    if source == 'synthetic':
+        return SyntheticDownloader(history_bars=history_bars)
+    if source == 'record' and record_from == 'synthetic':
+        return RecordedDownloader(FIXTURE_DIR, mode='record', downloader=SyntheticDownloader(history_bars=history_bars))
+    return RecordedDownloader(FIXTURE_DIR, mode=source)
+
+
+def bench_scans(rec, downloader, full):
+    """스캔 전체 흐름 (합성 데이터 또는 기록된 응답)"""
+    # 한국 시총 상위 100개: 종목별 지표 계산 (KRX 조회 대신 합성 데이터)
+    kr_frames = synthetic_frames(synthetic_tickers(100, prefix='K'), 350)
+    top_data = pd.DataFrame(
+        {'종목명': list(kr_frames), '시가총액': np.arange(len(kr_frames), 0, -1) * 10 ** 12},
+        index=list(kr_frames)
+    )
+    rec.run('scans', 'scan_korean_stocks',
+            lambda: scan_korean_stocks(top_data, compute=lambda t: summarize_technical_indicators(kr_frames[t])),
+            repeat=3, tickers=len(top_data), bars=350)
+
+    # 한국 전 종목: 날짜별 단면 -> 패널 -> 지표
+    n_full = 2500 if full else 1000
+    daily = synthetic_cross_sections(n_full, 250)
+    rec.run('scans', 'panel_from_cross_sections', lambda: Panel.from_cross_sections(daily),
+            repeat=3, tickers=n_full, bars=250)
+    panel = Panel.from_cross_sections(daily)
+    rec.run('scans', 'compute_panel_indicators', lambda: compute_panel_indicators(panel),
+            repeat=3, tickers=n_full, bars=250)
+
+    # 미국 관심 종목: 가격 저장소 델타 조회 + 패널 지표 (처음 조회 / 저장본 재사용)
+    us_tickers = FLASK_TICKERS
+    start = datetime.now() - timedelta(days=730)
+    store_dir = os.path.join(WORK_DIR, 'scan_store')
+    holder = {}
+
+    def fresh_store():
+        holder['store'] = PriceStore(tempfile.mkdtemp(dir=WORK_DIR))
+
+    def us_scan():
+        frames = get_us_ohlcv(us_tickers, start, store=holder['store'], downloader=downloader)
+        return compute_panel_indicators(Panel.from_frames(frames))
+
+    rec.run('scans', 'us_scan_cold_store', us_scan, repeat=3, setup=fresh_store, tickers=len(us_tickers))
+    holder['store'] = PriceStore(store_dir)
+    us_scan()
+    rec.run('scans', 'us_scan_warm_store', us_scan, repeat=3, tickers=len(us_tickers))
+
+
+def bench_flask(rec, downloader):
+    """Flask 엔드포인트 (결과 캐시 비움 / 캐시 적중)"""
+    # 네트워크를 쓰는 부분은 데이터 소스로 대체
+    yf.download = downloader
+
+    import flask_app
+    from watchlist_store import get_watchlist_store
+    flask_app.get_vix_data = lambda: {'value': 15.0, 'timestamp': '2025-01-01 00:00:00'}
+    flask_app.get_fear_greed_index = lambda: {'value': 50, 'classification': 'Neutral', 'timestamp': '0'}
+
+    # 500 응답도 상태 코드로 기록하므로 예외 로그는 생략
+    flask_app.app.logger.disabled = True
+    client = flask_app.app.test_client()
+    endpoints = [
+        ('/analysis/json', 'analysis_json'),
+        ('/analysis', 'analysis_html'),
+        ('/chart/data/AAPL', 'chart_data'),
+        ('/chart/AAPL', 'chart_html'),
+    ]
+
+    def clear_caches():
+        flask_app.RESULT_CACHE.invalidate()
+        get_watchlist_store().clear_results()
+
+    for path, name in endpoints:
+        status = {}
+
+        def request():
+            status['code'] = client.get(path).status_code
+
+        rec.run('flask', f'{name}_cold', request, repeat=3, setup=clear_caches, path=path)
+        rec.results[-1]['status'] = status['code']
+        rec.run('flask', f'{name}_warm', request, path=path)
+        rec.results[-1]['status'] = status['code']
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """
+    이전 결과와 비교해 min이 threshold배 이상 느려진 항목 출력 (회귀 수 반환)
+    반복 간 잡음이 적은 최솟값으로 비교
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    def key(result):
+        return result['suite'], result['name'], json.dumps(result['params'], sort_keys=True)
+
+    previous = {key(result): result for result in baseline['results']}
+    regressions = 0
+    print(f"\n비교 기준: {baseline_path} ({baseline['meta'].get('commit')})")
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        ratio = result['min'] / old['min'] if old['min'] else float('inf')
+        mark = ''
+        if ratio >= threshold:
+            mark = '  <-- 느려짐'
+            regressions += 1
+        print(f"{result['suite']}/{result['name']} {result['params']}: {ratio:.2f}x{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="지표/스캔/Flask 벤치마크")
+    parser.add_argument('--suites', default='kernels,scans,flask', help="실행할 묶음 (쉼표 구분)")
+    parser.add_argument('--source', choices=['synthetic', 'replay', 'record'], default='synthetic',
+                        help="가격 데이터 소스 (합성 / 기록 재생 / 실제 응답 기록)")
+    parser.add_argument('--record-from', choices=['yfinance', 'synthetic'], default='yfinance',
+                        help="--source record일 때 기록할 응답의 출처")
+    parser.add_argument('--full', action='store_true', help="5,000 종목까지 전체 크기로 실행")
+    parser.add_argument('--repeat', type=int, default=5, help="항목별 반복 횟수")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로")
+    parser.add_argument('--compare', default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument('--threshold', type=float, default=1.25, help="회귀로 볼 min 배율")
+    args = parser.parse_args()
+
+    suites = set(args.suites.split(','))
+    rec = Recorder(args.repeat)
+    downloader = make_downloader(args.source, record_from=args.record_from)
+
+    if 'kernels' in suites:
+        bench_kernels(rec, FULL_TICKERS if args.full else DEFAULT_TICKERS,
+                      FULL_MAX_CELLS if args.full else DEFAULT_MAX_CELLS)
+    if 'scans' in suites:
+        bench_scans(rec, downloader, args.full)
+    if 'flask' in suites:
+        bench_flask(rec, downloader)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'source': args.source,
+            'full': args.full,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+        },
+        'results': rec.results,
+    }
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results',
+        f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare and compare(rec.results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+벤치마크용 합성 OHLCV 생성기 (같은 시드면 항상 같은 데이터)
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from panel import Panel
+
+
+def ticker_seed(ticker, seed=0):
+    """티커별 고정 시드"""
+    return (zlib.crc32(ticker.encode('utf-8')) + seed) % (2 ** 32)
+
+
+def synthetic_ohlcv(bars, seed=0, end=None, start_price=100.0):
+    """
+    기하 랜덤워크 OHLCV (공통 컬럼명, 영업일 인덱스)
+    end: 마지막 거래일 (기본: 오늘)
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    open_ = close * np.exp(rng.normal(0, 0.005, bars))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, bars))
+    volume = rng.integers(10_000, 1_000_000, bars)
+
+    index = pd.bdate_range(end=pd.Timestamp(end or pd.Timestamp.now()).normalize(), periods=bars, name='Date')
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def synthetic_tickers(n, prefix='T'):
+    return [f"{prefix}{i:05d}" for i in range(n)]
+
+
+def synthetic_frames(tickers, bars, seed=0, end=None):
+    """{티커: OHLCV}"""
+    return {ticker: synthetic_ohlcv(bars, ticker_seed(ticker, seed), end) for ticker in tickers}
+
+
+def synthetic_close_matrix(n_tickers, bars, seed=0):
+    """(bars, n_tickers) 종가 행렬"""
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.02, (bars, n_tickers)), axis=0))
+
+
+def synthetic_panel(n_tickers, bars, seed=0, end=None):
+    """날짜×종목 패널 (고가/저가는 종가 기준 ±1%)"""
+    close = synthetic_close_matrix(n_tickers, bars, seed)
+    index = pd.bdate_range(end=pd.Timestamp(end or pd.Timestamp.now()).normalize(), periods=bars, name='Date')
+    values = {
+        'Open': close,
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': np.full(close.shape, 100_000.0),
+    }
+    return Panel(index, synthetic_tickers(n_tickers, prefix='K'), values)
+
+
+def synthetic_cross_sections(n_tickers, bars, seed=0, end=None):
+    """날짜별 전 종목 단면 {날짜: DataFrame(인덱스: 종목코드)} (pykrx get_market_ohlcv(date, market="ALL") 형태)"""
+    panel = synthetic_panel(n_tickers, bars, seed, end)
+    tickers = pd.Index([f"{i:06d}" for i in range(n_tickers)], name='티커')
+    return {
+        date: pd.DataFrame({field: panel[field][i] for field in ('Open', 'High', 'Low', 'Close', 'Volume')},
+                           index=tickers)
+        for i, date in enumerate(panel.dates)
+    }
+
+
+class SyntheticDownloader:
+    """
+    yf.download와 같은 시그니처의 합성 데이터 다운로더 (네트워크 호출 없음)
+    티커마다 고정 시드의 history_bars개 봉을 만들고 start/end 구간만 반환
+    """
+
+    def __init__(self, history_bars=1000, seed=0):
+        self.history_bars = history_bars
+        self.seed = seed
+        self.calls = 0
+        self._frames = {}
+
+    def _frame(self, ticker):
+        if ticker not in self._frames:
+            self._frames[ticker] = synthetic_ohlcv(self.history_bars, ticker_seed(ticker, self.seed))
+        return self._frames[ticker]
+
+    def __call__(self, tickers, start=None, end=None, period=None, **kwargs):
+        self.calls += 1
+        if isinstance(tickers, str):
+            tickers = [tickers]
+
+        frames = {}
+        for ticker in tickers:
+            df = self._frame(ticker)
+            if start is not None:
+                df = df[df.index >= pd.Timestamp(start).normalize()]
+            if end is not None:
+                df = df[df.index < pd.Timestamp(end)]
+            frames[ticker] = df
+        return pd.concat(frames, axis=1)
@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def lttb_indices(y, n_out, x=None):
+    """
+    LTTB(Largest-Triangle-Three-Buckets) 다운샘플링으로 남길 행 번호 선택
+    첫/마지막 점은 항상 포함하고, 나머지는 구간마다 이전 선택점과 다음 구간 평균점이 이루는
+    삼각형 넓이가 가장 큰 점 하나를 남김 (급등락 같은 모양이 보존됨)
+    y: 기준 값 배열 (NaN은 직전 값으로 채워 계산), x: 가로축 값 (기본: 행 번호)
+    반환: 오름차순 행 번호 배열 (n_out 이상이면 전체)
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    if np.isnan(y).any():
+        # 직전 유효값으로 채우고, 앞부분 NaN은 첫 유효값으로 채움
+        valid = ~np.isnan(y)
+        if not valid.any():
+            return np.linspace(0, n - 1, n_out).round().astype(int)
+        filled = np.where(valid, np.arange(n), 0)
+        np.maximum.accumulate(filled, out=filled)
+        y = y[filled]
+        y[:np.argmax(valid)] = y[np.argmax(valid)]
+
+    every = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        # 다음 구간 평균점
+        avg_start = int(np.floor((i + 1) * every)) + 1
+        avg_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        # 현재 구간에서 삼각형 넓이가 가장 큰 점
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    indices[-1] = n - 1
+    return indices
@@ -0,0 +1,92 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+
+class TokenBucket:
+    """
+    토큰 버킷 방식의 호출 속도 제한기
+    rate: 초당 토큰 충전 수 (평균 허용 호출 수)
+    capacity: 버킷 크기 (순간적으로 허용되는 최대 연속 호출 수)
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """토큰이 있으면 즉시 사용하고 True, 없으면 False"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """토큰이 충전될 때까지 대기 후 사용"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def run_concurrent(func, items, max_workers=8, rate_limiter=None, initializer=None):
+    """
+    items의 각 항목에 func를 동시에 실행하고 완료되는 순서대로 (항목, 결과)를 반환하는 제너레이터
+    max_workers: 동시에 진행 중인 최대 호출 수
+    rate_limiter: 호출 직전에 acquire()할 속도 제한기 (TokenBucket 등)
+    initializer: 워커 스레드 시작 시 실행할 함수
+    예외가 발생한 항목은 결과 대신 예외 객체를 반환
+    """
+    def call(item):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return func(item)
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=initializer) as executor:
+        futures = {executor.submit(call, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result()
+            except Exception as e:
+                yield item, e
+
+
+def gather_with_deadline(calls, timeout, max_workers=None):
+    """
+    calls({키: 인자 없는 함수})를 동시에 실행하고 timeout초 안에 끝난 결과만 모아 반환
+    반환: {키: 결과} (예외가 발생한 항목은 예외 객체, 기한 안에 끝나지 않은 항목은 TimeoutError)
+    timeout이 None이면 모두 끝날 때까지 대기
+    기한이 지난 호출은 중단할 수 없으므로 백그라운드에서 마저 실행되고 결과만 버림
+    calls는 등록 순서대로 시작되므로 앞선 호출을 기다리는 호출은 뒤에 등록
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers or max(len(calls), 1))
+    try:
+        futures = {key: executor.submit(call) for key, call in calls.items()}
+        wait(futures.values(), timeout=timeout)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {}
+    for key, future in futures.items():
+        if future.cancelled() or not future.done():
+            results[key] = TimeoutError(f"{timeout}초 안에 끝나지 않음")
+        elif future.exception() is not None:
+            results[key] = future.exception()
+        else:
+            results[key] = future.result()
+    return results
@@ -1,19 +1,130 @@
-from flask import Flask, jsonify, render_template
+import os
+import hmac
+import time
+import queue
+import hashlib
+import threading
+from flask import Flask, Response, g, jsonify, render_template, request
 import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import json
-import requests
+from datetime import datetime, timedelta, timezone
+
+import http_client
+from indicators import compute_indicators
+from downsample import lttb_indices
+from response_encoding import (
+    ARROW_MIME,
+    JSON_MIME,
+    PACKED_MIME,
+    FastJSONProvider,
+    compress,
+    dumps_json,
+    encode_arrow,
+    encode_packed,
+    negotiate,
+)
+from market_data import get_us_ohlcv
+from ttl_cache import TTLCache, memoize
+from fetch_scheduler import gather_with_deadline
+from trading_calendar import get_trading_calendar
+from metrics import REGISTRY, span, timed
+from live_feed import LiveFeed
+from watchlist_store import get_watchlist_store, normalize_ticker, validate_watchlist_name
+from precompute import (
+    DEFAULT_JOBS,
+    FLASK_ANALYSIS_RESULT,
+    US_SCHEDULE,
+    PrecomputeScheduler,
+    load_current_result,
+)
 
 app = Flask(__name__)
+# numpy 값(bool_ 등)도 직렬화하는 빠른 JSON (orjson이 있으면 사용)
+app.json = FastJSONProvider(app)
+
+# 엔드포인트 결과 캐시 (10분 TTL, 최대 256개 항목, 같은 키 동시 요청은 한 번만 조회)
+RESULT_CACHE = TTLCache(maxsize=256, ttl=600)
+
+# 티커별 계산 프레임 지표 명세 (이동평균 5종 + 스토캐스틱 3종, 요약 카드와 차트 공용)
+FRAME_INDICATOR_SPEC = "MA 5/20/50/120/200, STOCH 5/3/3, STOCH 10/6/6, STOCH 20/12/12"
+
+# 지표 명세 해시 (응답 버전에 포함, 명세가 바뀌면 클라이언트 캐시 무효화)
+FRAME_SPEC_HASH = hashlib.sha1(FRAME_INDICATOR_SPEC.encode('utf-8')).hexdigest()[:8]
+
+# 응답 브라우저 캐시 기간 (초): 장중에는 짧게, 장 마감 후에는 다음 장 시작까지 (최대 6시간)
+MARKET_OPEN_MAX_AGE = 60
+MARKET_CLOSED_MAX_AGE = 6 * 3600
+
+# ETag에 붙이는 응답 형식 구분
+FORMAT_TAGS = {
+    JSON_MIME: 'json',
+    ARROW_MIME: 'arrow',
+    PACKED_MIME: 'f32',
+}
+
+# 200일 이동평균을 위해 최소 300 거래일 필요 (약 430 캘린더 일)
+FRAME_HISTORY_DAYS = 500
+
+# 차트 기본 표시 구간 (200일선이 계산된 최근 60거래일)
+CHART_DEFAULT_ROWS = 60
+
+# 구간 지정 차트: 기본/최대 점 개수, 최대 조회 기간, 200일선 계산용 여유 기간 (캘린더 일)
+CHART_DEFAULT_MAX_POINTS = 500
+CHART_MAX_POINTS_LIMIT = 2000
+CHART_MAX_HISTORY_DAYS = 3650
+CHART_WARMUP_DAYS = 300
+
+# 차트 JSON 키 -> 계산 프레임 컬럼
+CHART_SERIES = {
+    "close": 'Close',
+    "ma5": 'MA5',
+    "ma20": 'MA20',
+    "ma50": 'MA50',
+    "ma120": 'MA120',
+    "ma200": 'MA200',
+    "stoch_5_3_3_k": 'Stoch_5_3_3_K',
+    "stoch_5_3_3_d": 'Stoch_5_3_3_D',
+    "stoch_10_6_6_k": 'Stoch_10_6_6_K',
+    "stoch_10_6_6_d": 'Stoch_10_6_6_D',
+    "stoch_20_12_12_k": 'Stoch_20_12_12_K',
+    "stoch_20_12_12_d": 'Stoch_20_12_12_D',
+}
+
+# 분석 페이지 기본 관심 종목 목록 이름과 초기 종목 (VIX 제외, 저장소에 목록이 없을 때 사용)
+ANALYSIS_WATCHLIST = 'analysis'
+DEFAULT_ANALYSIS_TICKERS = ["MSFT", "GOOG", "META", "AMZN", "AAPL", "TSLA", "NVDA", "AVGO", "ORCL", "PLTR", "IONQ", "RKLB", "TEM", "HIMS", "CRDO", "CLS", "MSTY"]
+
+# 종목별 분석 결과 저장소 구분과 유효 기간 (초, 장 마감 후 확정된 결과는 다음 장 시작까지 유효)
+TICKER_RESULT_NAMESPACE = 'flask_analysis'
+TICKER_RESULT_TTL = 600
+
+# 관심 종목 목록 최대 종목 수
+WATCHLIST_MAX_TICKERS = 100
+
+# 관심 종목 목록 변경(PUT/DELETE) 토큰 (환경변수, 없으면 변경 API 비활성)
+# 리버스 프록시 뒤에서는 모든 요청이 루프백 주소로 보이므로 접속 주소로는 허용하지 않음
+WATCHLIST_TOKEN = os.environ.get('STOCK_PORT_WATCHLIST_TOKEN')
+
+# 실시간 스트림 연결 유지 주석 간격 (초), 끊긴 연결은 다음 전송 때 정리됨
+LIVE_KEEPALIVE = 15
+
+# 스트림이 끊겼을 때 브라우저 재연결 대기 시간 (밀리초)
+LIVE_RETRY_MS = 5000
+
+# 여러 티커 분석 응답 기한 (초), 기한 안에 끝나지 않은 티커는 오류로 표시하고 부분 결과 반환
+ANALYSIS_DEADLINE = 8.0
+
+# 부분 결과는 짧게만 캐시 (기한 뒤에도 계속 진행된 조회 결과가 다음 요청에 반영되도록)
+PARTIAL_RESULT_TTL = 30
 
 def get_fear_greed_index():
     """CNN 공포탐욕지수 가져오기"""
     try:
         # alternative.me API를 사용 (CNN과 유사한 공포탐욕지수 제공)
         url = "https://api.alternative.me/fng/"
-        response = requests.get(url, timeout=10)
+        with span('fetch.alternative_me'):
+            response = http_client.get(url, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -36,7 +147,8 @@ def get_vix_data():
         end_date = datetime.now()
         start_date = end_date - timedelta(days=5)
 
-        data = vix_ticker.history(start=start_date, end=end_date)
+        with span('fetch.vix'):
+            data = vix_ticker.history(start=start_date, end=end_date)
 
         if not data.empty:
             current_vix = data['Close'].iloc[-1]
@@ -49,66 +161,76 @@ def get_vix_data():
 
     return None
 
-def calculate_stochastic(high, low, close, k_period, d_period, smooth_k=1):
+def build_ticker_frame(data):
+    """OHLCV에 이동평균/스토캐스틱 컬럼을 모두 계산한 티커별 프레임 생성"""
+    if data is None or data.empty:
+        return None
+    return compute_indicators(data, FRAME_INDICATOR_SPEC)
+
+@memoize(RESULT_CACHE)
+def get_ticker_frame(ticker_symbol, history_days=FRAME_HISTORY_DAYS):
     """
-    스토캐스틱 오실레이터 계산
-    k_period: %K 기간
-    d_period: %D 기간 (이동평균)
-    smooth_k: %K 스무딩 기간
+    티커별 계산 프레임 조회 (500일 OHLCV + 모든 지표 컬럼)
+    요약 카드(analyze_ticker)와 차트(get_chart_data)가 같은 프레임을 공유
+    history_days: 조회 기간 (긴 구간 차트용, 기본 기간은 인자 없이 호출해 같은 캐시 항목 사용)
     """
-    # 최고가와 최저가의 기간별 값 계산
-    lowest_low = low.rolling(window=k_period).min()
-    highest_high = high.rolling(window=k_period).max()
+    try:
+        start_date = datetime.now() - timedelta(days=history_days)
 
-    # %K 계산
-    k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
+        # 로컬 저장소 + 마지막 저장일 이후 구간만 다운로드
+        data = get_us_ohlcv([ticker_symbol], start_date).get(ticker_symbol)
+        return build_ticker_frame(data)
 
-    # %K 스무딩 (기본값 1이면 스무딩 안함)
-    if smooth_k > 1:
-        k_percent = k_percent.rolling(window=smooth_k).mean()
+    except Exception as e:
+        print(f"{ticker_symbol} 데이터 가져오기 실패: {e}")
+        return None
 
-    # %D 계산 (%K의 이동평균)
-    d_percent = k_percent.rolling(window=d_period).mean()
+def prefetch_ticker_frames(tickers, refresh=False):
+    """
+    캐시에 없는 티커들의 계산 프레임을 일괄 다운로드로 한 번에 준비
+    refresh=True면 캐시에 있어도 다시 조회 (가격 저장소 덕분에 마지막 봉 이후 구간만 다운로드)
+    """
+    if refresh:
+        missing = list(tickers)
+    else:
+        missing = [t for t in tickers if RESULT_CACHE.get(get_ticker_frame.cache_key(t)) is None]
+    if not missing:
+        return
+
+    start_date = datetime.now() - timedelta(days=FRAME_HISTORY_DAYS)
+    try:
+        price_frames = get_us_ohlcv(missing, start_date)
+    except Exception as e:
+        print(f"일괄 데이터 가져오기 실패: {e}")
+        return
 
-    return k_percent, d_percent
+    for ticker, data in price_frames.items():
+        frame = build_ticker_frame(data)
+        if frame is not None:
+            RESULT_CACHE.set(get_ticker_frame.cache_key(ticker), frame)
 
-def analyze_ticker(ticker_symbol):
-    """개별 티커 분석"""
+def analyze_ticker(ticker_symbol, frame=None):
+    """
+    개별 티커 분석
+    frame: 미리 계산한 티커별 프레임 (없으면 캐시에서 조회)
+    """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=150)
-
-        data = ticker.history(start=start_date, end=end_date)
+        if frame is None:
+            frame = get_ticker_frame(ticker_symbol)
 
-        if data.empty:
+        if frame is None or frame.empty:
             return None
 
-        # 최근 종가
-        current_price = data['Close'].iloc[-1]
-
-        # 20일 이동평균선 계산
-        ma_20 = data['Close'].rolling(window=20).mean().iloc[-1]
-
-        # 스토캐스틱 계산
-        high = data['High']
-        low = data['Low']
-        close = data['Close']
-
-        # 스토캐스틱 5,3,3
-        stoch_5_k, stoch_5_d = calculate_stochastic(high, low, close, 5, 3, 3)
-        stoch_5_k_current = stoch_5_k.iloc[-1]
-
-        # 스토캐스틱 10,6,6
-        stoch_10_k, stoch_10_d = calculate_stochastic(high, low, close, 10, 6, 6)
-        stoch_10_k_current = stoch_10_k.iloc[-1]
-
-        # 스토캐스틱 20,12,12
-        stoch_20_k, stoch_20_d = calculate_stochastic(high, low, close, 20, 12, 12)
-        stoch_20_k_current = stoch_20_k.iloc[-1]
+        # 최근 종가, 20일 이동평균선, 스토캐스틱 5,3,3 / 10,6,6 / 20,12,12
+        current_price = frame['Close'].iloc[-1]
+        ma_20 = frame['MA20'].iloc[-1]
+        stoch_5_k_current = frame['Stoch_5_3_3_K'].iloc[-1]
+        stoch_10_k_current = frame['Stoch_10_6_6_K'].iloc[-1]
+        stoch_20_k_current = frame['Stoch_20_12_12_K'].iloc[-1]
 
         return {
             "ticker": ticker_symbol,
+            "as_of": frame.index[-1].strftime('%Y-%m-%d'),
             "current_price": round(current_price, 2),
             "ma_20": round(ma_20, 2),
             "price_below_ma20": current_price < ma_20,
@@ -140,108 +262,337 @@ def analyze_ticker(ticker_symbol):
     except Exception as e:
         return None
 
-def get_chart_data(ticker_symbol):
-    """차트용 데이터 생성"""
+def data_version(*parts):
+    """응답 데이터 버전 (지표 명세 해시 + 마지막 봉 등 데이터를 결정하는 값들의 해시)"""
+    digest = hashlib.sha1(dumps_json([FRAME_SPEC_HASH, *parts])).hexdigest()[:16]
+    return f"{FRAME_SPEC_HASH}-{digest}"
+
+def chart_history_days(start):
+    """
+    start부터 차트를 그리는 데 필요한 계산 프레임 조회 기간 (200일선 계산 여유 포함)
+    기본 기간을 넘으면 1년 단위로 올려 비슷한 구간 요청끼리 같은 프레임을 재사용
+    """
+    if start is None:
+        return FRAME_HISTORY_DAYS
+    days = (datetime.now() - start).days + CHART_WARMUP_DAYS
+    if days <= FRAME_HISTORY_DAYS:
+        return FRAME_HISTORY_DAYS
+    return min(-(-days // 365) * 365, CHART_MAX_HISTORY_DAYS)
+
+def parse_chart_range(args):
+    """
+    차트 구간 쿼리 파라미터 파싱 (start, end: YYYY-MM-DD, max_points: 최대 점 개수)
+    구간을 지정하면 max_points 기본값 적용, 잘못된 값이면 ValueError
+    반환: (start, end, max_points) (캐시 키로 쓰도록 날짜는 문자열)
+    """
+    start, end = args.get('start'), args.get('end')
+    start = pd.Timestamp(start).strftime('%Y-%m-%d') if start else None
+    end = pd.Timestamp(end).strftime('%Y-%m-%d') if end else None
+    if start and end and start > end:
+        raise ValueError("start가 end보다 늦습니다.")
+
+    max_points = args.get('max_points')
+    if max_points:
+        max_points = min(max(int(max_points), 3), CHART_MAX_POINTS_LIMIT)
+    elif start or end:
+        max_points = CHART_DEFAULT_MAX_POINTS
+    else:
+        max_points = None
+    return start, end, max_points
+
+@memoize(RESULT_CACHE)
+def get_chart_data(ticker_symbol, start=None, end=None, max_points=None):
+    """
+    차트용 데이터 생성
+    구간을 지정하지 않으면 200일선이 계산된 최근 60거래일, 지정하면 start~end 구간
+    max_points보다 많으면 종가 기준 LTTB로 줄인 행만 반환 (모든 계열에 같은 행 사용)
+    """
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        end_date = datetime.now()
-        # 200일 이동평균을 위해 최소 300 거래일 필요 (약 430 캘린더 일)
-        start_date = end_date - timedelta(days=500)  # 500일로 증가
+        start = pd.Timestamp(start) if start else None
+        end = pd.Timestamp(end) if end else None
 
-        data = ticker.history(start=start_date, end=end_date)
+        # 요약 카드와 공유하는 계산 프레임 사용 (긴 구간이면 더 긴 프레임을 별도로 캐시)
+        history_days = chart_history_days(start)
+        if history_days == FRAME_HISTORY_DAYS:
+            data = get_ticker_frame(ticker_symbol)
+        else:
+            data = get_ticker_frame(ticker_symbol, history_days)
 
-        if data.empty:
+        if data is None or data.empty:
             return None
 
-        # 이동평균선 계산
-        data['MA5'] = data['Close'].rolling(window=5).mean()
-        data['MA20'] = data['Close'].rolling(window=20).mean()
-        data['MA50'] = data['Close'].rolling(window=50).mean()
-        data['MA120'] = data['Close'].rolling(window=120).mean()
-        data['MA200'] = data['Close'].rolling(window=200).mean()
-
-        # 스토캐스틱 계산
-        high = data['High']
-        low = data['Low']
-        close = data['Close']
-
-        # 스토캐스틱 5,3,3
-        stoch_5_k, stoch_5_d = calculate_stochastic(high, low, close, 5, 3, 3)
-        data['Stoch_5_3_3_K'] = stoch_5_k
-        data['Stoch_5_3_3_D'] = stoch_5_d
-
-        # 스토캐스틱 10,6,6
-        stoch_10_k, stoch_10_d = calculate_stochastic(high, low, close, 10, 6, 6)
-        data['Stoch_10_6_6_K'] = stoch_10_k
-        data['Stoch_10_6_6_D'] = stoch_10_d
-
-        # 스토캐스틱 20,12,12
-        stoch_20_k, stoch_20_d = calculate_stochastic(high, low, close, 20, 12, 12)
-        data['Stoch_20_12_12_K'] = stoch_20_k
-        data['Stoch_20_12_12_D'] = stoch_20_d
-
-        # 200일 이동평균이 계산된 데이터만 사용 (최근 60일)
-        # 200일 이동평균이 NaN이 아닌 구간부터 사용
-        valid_data = data.dropna(subset=['MA200'])
-
-        if len(valid_data) < 60:
-            # 유효한 데이터가 60일보다 적으면 전체 사용
-            chart_data = valid_data.copy()
+        if start is None and end is None:
+            # 200일 이동평균이 NaN이 아닌 구간부터 사용 (유효한 데이터가 60일보다 적으면 전체)
+            chart_data = data.dropna(subset=['MA200']).tail(CHART_DEFAULT_ROWS)
         else:
-            # 최근 60일 사용
-            chart_data = valid_data.tail(60).copy()
+            chart_data = data.loc[start:end]
+
+        total_points = len(chart_data)
+        if max_points and total_points > max_points:
+            chart_data = chart_data.iloc[lttb_indices(chart_data['Close'].to_numpy(), max_points)]
+
+        # 계열은 실수 배열로 보관 (JSON 직렬화 시 NaN은 null, Arrow/float32 형식은 그대로 사용)
+        payload = {"dates": chart_data.index.strftime('%Y-%m-%d').tolist()}
+        for key, column in CHART_SERIES.items():
+            payload[key] = np.ascontiguousarray(chart_data[column].to_numpy(dtype=float))
+        payload["total_points"] = total_points
+        payload["downsampled"] = len(chart_data) < total_points
+
+        # 데이터 버전: 마지막 봉 날짜 + 마지막 종가(장중 갱신 반영) + 지표 명세 + 요청 구간
+        last_bar = data.index[-1]
+        payload["as_of"] = last_bar.strftime('%Y-%m-%d')
+        payload["version"] = data_version(
+            ticker_symbol, payload["as_of"], float(data['Close'].iloc[-1]), start, end, max_points
+        )
+        payload["computed_at"] = datetime.now(timezone.utc)
+        return payload
 
-        # 날짜를 문자열로 변환
-        chart_data.index = chart_data.index.strftime('%Y-%m-%d')
+    except Exception as e:
+        return None
 
-        # NaN 값을 None으로 변경 (JSON 직렬화를 위해)
-        chart_data = chart_data.where(pd.notnull(chart_data), None)
+def watchlist_tickers(name=ANALYSIS_WATCHLIST):
+    """관심 종목 목록 조회 (기본 목록은 없으면 초기 종목으로 생성, 그 외 없는 목록이면 None)"""
+    store = get_watchlist_store()
+    if name == ANALYSIS_WATCHLIST:
+        return store.ensure(name, DEFAULT_ANALYSIS_TICKERS)
+    return store.get(name)
 
-        return {
-            "dates": chart_data.index.tolist(),
-            "close": chart_data['Close'].tolist(),
-            "ma5": chart_data['MA5'].tolist(),
-            "ma20": chart_data['MA20'].tolist(),
-            "ma50": chart_data['MA50'].tolist(),
-            "ma120": chart_data['MA120'].tolist(),
-            "ma200": chart_data['MA200'].tolist(),
-            "stoch_5_3_3_k": chart_data['Stoch_5_3_3_K'].tolist(),
-            "stoch_5_3_3_d": chart_data['Stoch_5_3_3_D'].tolist(),
-            "stoch_10_6_6_k": chart_data['Stoch_10_6_6_K'].tolist(),
-            "stoch_10_6_6_d": chart_data['Stoch_10_6_6_D'].tolist(),
-            "stoch_20_12_12_k": chart_data['Stoch_20_12_12_K'].tolist(),
-            "stoch_20_12_12_d": chart_data['Stoch_20_12_12_D'].tolist()
-        }
+def save_ticker_results(rows):
+    """종목별 분석 결과 저장 (다른 관심 종목 목록/프로세스와 공유)"""
+    get_watchlist_store().save_results(TICKER_RESULT_NAMESPACE, rows, as_of=lambda row: row['as_of'])
 
-    except Exception as e:
-        return None
+@memoize(RESULT_CACHE, ttl=lambda result: PARTIAL_RESULT_TTL if result['partial'] else None)
+@timed('flask.multi_ticker_analysis')
+def get_multi_ticker_analysis(tickers, deadline=ANALYSIS_DEADLINE):
+    """
+    여러 티커 분석 데이터 수집
+    티커 분석, VIX, 공포탐욕지수를 동시에 실행하여 응답 시간을 가장 느린 호출 하나로 제한
+    tickers: 종목 튜플 (관심 종목 목록), 저장소에 유효한 종목별 결과가 있으면 다시 계산하지 않음
+    deadline: 전체 기한 (초, None이면 모두 끝날 때까지 대기), 기한을 넘긴 항목은 제외하고 부분 결과 반환
+    """
+    stored = get_watchlist_store().load_results(TICKER_RESULT_NAMESPACE, tickers, TICKER_RESULT_TTL, market='nyse')
+    pending = [ticker for ticker in tickers if ticker not in stored]
+
+    # 캐시에 없는 티커만 일괄 조회하여 계산 프레임 준비 (차트 페이지에서 재사용)
+    # 티커별 분석은 일괄 조회가 끝난 뒤 시작하고, 일괄 조회에서 빠진 티커만 개별 조회
+    prefetched = threading.Event()
+
+    def prefetch():
+        try:
+            prefetch_ticker_frames(pending)
+        finally:
+            prefetched.set()
+
+    def analyze_after_prefetch(ticker):
+        prefetched.wait()
+        return analyze_ticker(ticker)
+
+    calls = {
+        'vix': get_vix_data,
+        'fear_greed': get_fear_greed_index,
+        'prefetch': prefetch,
+    }
+    for ticker in pending:
+        calls[ticker] = lambda ticker=ticker: analyze_after_prefetch(ticker)
+
+    outcomes = gather_with_deadline(calls, deadline)
+    save_ticker_results({
+        ticker: outcomes[ticker] for ticker in pending if isinstance(outcomes[ticker], dict)
+    })
 
-def get_multi_ticker_analysis():
-    """여러 티커 분석 데이터 수집"""
-    # VIX를 제외한 종목들
-    tickers = ["MSFT", "GOOG", "META", "AMZN", "AAPL", "TSLA", "NVDA", "AVGO", "ORCL", "PLTR", "IONQ", "RKLB", "TEM", "HIMS", "CRDO", "CLS", "MSTY"]
     results = []
     errors = []
-
     for ticker in tickers:
-        analysis = analyze_ticker(ticker)
-        if analysis:
-            results.append(analysis)
-        else:
+        analysis = stored[ticker] if ticker in stored else outcomes[ticker]
+        if isinstance(analysis, TimeoutError):
+            errors.append(f"{ticker} 분석 시간 초과 ({deadline:g}초)")
+        elif isinstance(analysis, Exception) or not analysis:
             errors.append(f"{ticker} 데이터를 가져올 수 없습니다.")
+        else:
+            results.append(analysis)
 
-    # VIX와 공포탐욕지수 별도 수집
-    vix_data = get_vix_data()
-    fear_greed_data = get_fear_greed_index()
+    # VIX와 공포탐욕지수는 실패/시간 초과 시 None
+    vix_data = outcomes['vix']
+    fear_greed_data = outcomes['fear_greed']
+    timed_out = [key for key, outcome in outcomes.items() if isinstance(outcome, TimeoutError)]
 
     return {
         "results": results,
         "errors": errors,
-        "vix_data": vix_data,
-        "fear_greed_data": fear_greed_data,
+        "vix_data": None if isinstance(vix_data, Exception) else vix_data,
+        "fear_greed_data": None if isinstance(fear_greed_data, Exception) else fear_greed_data,
+        "partial": bool(timed_out),
         "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
 
+def analysis_columns(result):
+    """분석 결과 카드 목록 -> 열 단위 표 (Arrow 응답용)"""
+    rows = result['results']
+
+    def column(*keys):
+        values = []
+        for row in rows:
+            for key in keys:
+                row = row[key]
+            values.append(row)
+        return values
+
+    columns = {
+        'ticker': column('ticker'),
+        'as_of': [row.get('as_of') for row in rows],
+        'current_price': column('current_price'),
+        'ma_20': column('ma_20'),
+        'price_below_ma20': column('price_below_ma20'),
+    }
+    for name in ('stoch_5_3_3', 'stoch_10_6_6', 'stoch_20_12_12'):
+        columns[f'{name}_k'] = column('stochastic_analysis', name, 'k_value')
+        columns[f'{name}_k_below_30'] = column('stochastic_analysis', name, 'k_below_30')
+    columns['all_stoch_oversold'] = column('summary', 'all_stoch_oversold')
+    columns['price_and_stoch_bearish'] = column('summary', 'price_and_stoch_bearish')
+    return columns
+
+def encoded_response(body, mimetype):
+    """클라이언트가 허용하는 방식(brotli/gzip)으로 압축한 응답"""
+    body, encoding = compress(body, request.accept_encodings)
+    response = Response(body, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.update(['Accept', 'Accept-Encoding'])
+    return response
+
+def analysis_version(result):
+    """분석 결과 버전 (종목별 마지막 봉 날짜/종가 + VIX/공포탐욕지수 + 지표 명세)"""
+    rows = [(row['ticker'], row.get('as_of'), row['current_price']) for row in result['results']]
+    return data_version(rows, result['vix_data'], result['fear_greed_data'], result['errors'])
+
+def cache_max_age(now=None):
+    """
+    브라우저 캐시 기간 (초)
+    미국 정규장 중에는 짧게, 장 마감 후에는 새 봉이 생기지 않으므로 다음 장 시작까지
+    """
+    calendar = get_trading_calendar('nyse')
+    now = now or datetime.now(calendar.tz)
+    if calendar.is_open(now):
+        return MARKET_OPEN_MAX_AGE
+    until_open = (calendar.next_open(now) - now).total_seconds()
+    return int(max(MARKET_OPEN_MAX_AGE, min(until_open, MARKET_CLOSED_MAX_AGE)))
+
+def conditional_response(version, last_modified, mimetype, encode, max_age=None):
+    """
+    데이터 버전을 ETag로, 계산 시각을 Last-Modified로 붙인 응답
+    If-None-Match(우선) 또는 If-Modified-Since가 일치하면 본문 직렬화 없이 304 반환
+    encode(): 본문 바이트를 만드는 함수 (200일 때만 호출)
+    max_age: 브라우저 캐시 기간 (초, 기본: 장 운영 시간 기준, 0이면 매번 재검증)
+    """
+    etag = f"{version}-{FORMAT_TAGS[mimetype]}"
+    last_modified = last_modified.replace(microsecond=0)
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+    if not_modified:
+        response = Response(status=304)
+        response.vary.update(['Accept', 'Accept-Encoding'])
+    else:
+        response = encoded_response(encode(), mimetype)
+    # 압축 방식에 따라 본문이 달라지므로 약한 ETag 사용
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    if max_age is None:
+        max_age = cache_max_age()
+    if max_age > 0:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+def analysis_max_age(result):
+    """
+    분석 결과 브라우저 캐시 기간
+    기한 초과로 빠진 항목이 있는 부분 결과는 서버에서도 잠깐만 캐시하므로 매번 재검증,
+    조회 실패 항목이 있으면 부분 결과 캐시 기간 이내
+    """
+    if result['partial']:
+        return 0
+    if result['errors']:
+        return min(cache_max_age(), PARTIAL_RESULT_TTL)
+    return None
+
+def poll_live_rows():
+    """
+    실시간 스트림용 기본 관심 종목 분석 행
+    계산 프레임을 새로 받아 갱신하고 (차트 페이지도 같은 프레임 사용), 종목별 결과 저장소에도 기록
+    """
+    tickers = watchlist_tickers()
+    prefetch_ticker_frames(tickers, refresh=True)
+    rows = {}
+    for ticker in tickers:
+        analysis = analyze_ticker(ticker)
+        if analysis:
+            rows[ticker] = analysis
+    save_ticker_results(rows)
+    return rows
+
+# 분석 페이지 실시간 갱신 (접속자 수와 관계없이 폴링은 한 곳에서, 캐시 기간과 같은 주기)
+LIVE_FEED = LiveFeed(poll_live_rows, cache_max_age, name='analysis-live')
+
+def sse_event(event, data):
+    """Server-Sent Events 메시지 바이트"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps_json(data) + b"\n\n"
+
+def get_latest_analysis(tickers):
+    """백그라운드 워커가 같은 종목으로 계산해 둔 최신 분석 결과가 있으면 사용, 없으면 직접 계산"""
+    precomputed = load_current_result(FLASK_ANALYSIS_RESULT, US_SCHEDULE)
+    if precomputed is not None and precomputed['meta'].get('tickers') == list(tickers):
+        return precomputed['value']
+    return get_multi_ticker_analysis(tuple(tickers))
+
+def parse_watchlist_tickers(payload):
+    """관심 종목 목록 요청 본문 {"tickers": [...]} 파싱 (대문자로 통일, 잘못된 값이면 ValueError)"""
+    tickers = payload.get('tickers') if isinstance(payload, dict) else None
+    if not isinstance(tickers, list):
+        raise ValueError("tickers는 티커 문자열 목록이어야 합니다.")
+    if len(tickers) > WATCHLIST_MAX_TICKERS:
+        raise ValueError(f"종목은 최대 {WATCHLIST_MAX_TICKERS}개까지 등록할 수 있습니다.")
+    return [normalize_ticker(t) for t in tickers]
+
+def watchlist_write_allowed():
+    """
+    관심 종목 목록 변경 허용 여부
+    X-Watchlist-Token 또는 Authorization: Bearer 헤더가 STOCK_PORT_WATCHLIST_TOKEN과 일치해야 함
+    (토큰이 설정되지 않았으면 항상 거부)
+    """
+    if not WATCHLIST_TOKEN:
+        return False
+    token = request.headers.get('X-Watchlist-Token')
+    if token is None:
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        token = value.strip() if scheme.lower() == 'bearer' else ''
+    return hmac.compare_digest(token.encode('utf-8'), WATCHLIST_TOKEN.encode('utf-8'))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def count_response(response):
+    REGISTRY.inc('flask.responses', endpoint=request.endpoint or 'unknown', status=response.status_code)
+    return response
+
+@app.teardown_request
+def record_request_time(exc):
+    """라우트별 응답 시간 기록 (처리되지 않은 예외도 포함)"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    endpoint = request.endpoint or 'unknown'
+    REGISTRY.observe('flask.request', time.perf_counter() - started, endpoint=endpoint)
+    if exc is not None:
+        REGISTRY.inc('flask.request.errors', endpoint=endpoint)
+
 @app.route('/')
 def home():
     """메인 페이지 (모바일 최적화)"""
@@ -249,40 +600,178 @@ def home():
 
 @app.route('/analysis')
 def analysis_page():
-    """분석 결과 HTML 페이지 (모바일 최적화)"""
-    result = get_multi_ticker_analysis()
+    """분석 결과 HTML 페이지 (모바일 최적화, ?watchlist=이름으로 관심 종목 목록 선택)"""
+    watchlist = request.args.get('watchlist', ANALYSIS_WATCHLIST)
+    tickers = watchlist_tickers(watchlist)
+    if not tickers:
+        return render_template('error.html', errors=[f"관심 종목 목록 '{watchlist}'이(가) 없거나 비어 있습니다."])
+
+    result = get_latest_analysis(tickers)
 
     if not result['results']:
         error_msg = result['errors'] if result['errors'] else ["데이터를 가져올 수 없습니다."]
         return render_template('error.html', errors=error_msg)
 
-    return render_template('analysis.html', data=result)
+    # 실시간 갱신은 기본 관심 종목 목록만 지원
+    return render_template('analysis.html', data=result, watchlist=watchlist, live=watchlist == ANALYSIS_WATCHLIST)
 
 @app.route('/analysis/json')
 def analysis_json():
-    """분석 결과 JSON 반환"""
-    result = get_multi_ticker_analysis()
-    return jsonify(result)
+    """
+    분석 결과 반환 (기본 JSON, Accept: application/vnd.apache.arrow.stream이면 Arrow IPC)
+    Arrow 응답은 종목별 카드를 열 단위 표로 바꾸고, 나머지 항목은 스키마 메타데이터로 전달
+    ?watchlist=이름으로 관심 종목 목록 선택
+    """
+    watchlist = request.args.get('watchlist', ANALYSIS_WATCHLIST)
+    tickers = watchlist_tickers(watchlist)
+    if not tickers:
+        return jsonify({"error": f"관심 종목 목록 '{watchlist}'이(가) 없거나 비어 있습니다."}), 404
+
+    result = get_latest_analysis(tickers)
+    mimetype = negotiate(request.accept_mimetypes, [JSON_MIME, ARROW_MIME])
+    last_modified = datetime.strptime(result['last_updated'], "%Y-%m-%d %H:%M:%S").astimezone(timezone.utc)
+
+    def encode():
+        if mimetype == ARROW_MIME:
+            metadata = {key: value for key, value in result.items() if key != 'results'}
+            return encode_arrow(analysis_columns(result), metadata)
+        return dumps_json(result)
+
+    return conditional_response(
+        analysis_version(result), last_modified, mimetype, encode, max_age=analysis_max_age(result)
+    )
+
+@app.route('/analysis/stream')
+def analysis_stream():
+    """
+    분석 표 실시간 갱신 스트림 (text/event-stream)
+    연결 직후 snapshot 이벤트로 전체 행, 이후 rows 이벤트로 달라진 행만 전송
+    """
+    def stream():
+        subscriber = LIVE_FEED.subscribe()
+        try:
+            yield f"retry: {LIVE_RETRY_MS}\n\n".encode()
+            yield sse_event('snapshot', {"rows": list(LIVE_FEED.snapshot().values())})
+            while True:
+                try:
+                    changed = subscriber.get(timeout=LIVE_KEEPALIVE)
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+                    continue
+                yield sse_event('rows', {
+                    "rows": list(changed.values()),
+                    "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                })
+        finally:
+            LIVE_FEED.unsubscribe(subscriber)
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # 프록시(nginx) 버퍼링 해제
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/watchlists')
+def list_watchlists():
+    """저장된 관심 종목 목록 {이름: [티커...]}"""
+    watchlist_tickers()
+    store = get_watchlist_store()
+    return jsonify({name: store.get(name) for name in store.names()})
+
+@app.route('/watchlists/<name>', methods=['GET', 'PUT', 'DELETE'])
+def watchlist(name):
+    """
+    관심 종목 목록 조회/저장/삭제
+    PUT 본문: {"tickers": ["AAPL", ...]} (목록 전체 교체, 모든 세션/프로세스가 공유)
+    PUT/DELETE는 STOCK_PORT_WATCHLIST_TOKEN 토큰이 있는 요청만 허용 (설정하지 않으면 변경 불가)
+    """
+    store = get_watchlist_store()
+    if request.method in ('PUT', 'DELETE') and not watchlist_write_allowed():
+        if not WATCHLIST_TOKEN:
+            return jsonify({"error": "관심 종목 목록 변경 API가 비활성 상태입니다 (STOCK_PORT_WATCHLIST_TOKEN 설정 필요)."}), 403
+        return jsonify({"error": "관심 종목 목록을 변경할 권한이 없습니다."}), 403
+
+    if request.method == 'PUT':
+        try:
+            name = validate_watchlist_name(name)
+            tickers = parse_watchlist_tickers(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"name": name, "tickers": store.save(name, tickers)})
+
+    if request.method == 'DELETE':
+        store.delete(name)
+        return '', 204
+
+    tickers = watchlist_tickers(name)
+    if tickers is None:
+        return jsonify({"error": f"관심 종목 목록 '{name}'이(가) 없습니다."}), 404
+    return jsonify({"name": name, "tickers": tickers})
 
 @app.route('/chart/<ticker>')
 def chart_page(ticker):
-    """개별 종목 차트 페이지"""
-    chart_data = get_chart_data(ticker.upper())
+    """개별 종목 차트 페이지 (start, end, max_points로 첫 표시 구간 지정 가능)"""
+    try:
+        chart_range = parse_chart_range(request.args)
+    except ValueError as e:
+        return render_template('error.html', errors=[f"잘못된 차트 구간: {e}"])
+
+    chart_data = get_chart_data(ticker.upper(), *chart_range)
 
     if not chart_data:
         return render_template('error.html', errors=[f"{ticker} 차트 데이터를 가져올 수 없습니다."])
 
-    return render_template('chart.html', ticker=ticker.upper(), chart_data=json.dumps(chart_data))
+    return render_template('chart.html', ticker=ticker.upper(), chart_data=dumps_json(chart_data).decode('utf-8'))
 
 @app.route('/chart/data/<ticker>')
 def chart_data_json(ticker):
-    """차트 데이터 JSON 반환"""
-    chart_data = get_chart_data(ticker.upper())
+    """
+    차트 데이터 JSON 반환
+    ?start=YYYY-MM-DD&end=YYYY-MM-DD&max_points=N 으로 구간과 최대 점 개수 지정 (긴 구간은 LTTB로 축소)
+    """
+    try:
+        chart_range = parse_chart_range(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"잘못된 차트 구간: {e}"}), 400
+
+    chart_data = get_chart_data(ticker.upper(), *chart_range)
 
     if not chart_data:
         return jsonify({"error": f"{ticker} 데이터를 가져올 수 없습니다."}), 404
 
-    return jsonify(chart_data)
+    # 응답 형식: JSON(기본) / Arrow IPC / float32 묶음 (Accept 헤더로 선택)
+    mimetype = negotiate(request.accept_mimetypes, [JSON_MIME, ARROW_MIME, PACKED_MIME])
+
+    def encode():
+        if mimetype == JSON_MIME:
+            return dumps_json(chart_data)
+        series = {key: chart_data[key] for key in CHART_SERIES}
+        metadata = {key: chart_data[key] for key in ("total_points", "downsampled", "as_of", "version")}
+        if mimetype == ARROW_MIME:
+            columns = {"date": pd.to_datetime(chart_data["dates"]).to_numpy(dtype='datetime64[D]'), **series}
+            return encode_arrow(columns, metadata)
+        return encode_packed(chart_data["dates"], series, metadata)
+
+    return conditional_response(chart_data["version"], chart_data["computed_at"], mimetype, encode)
+
+@app.route('/cache/stats')
+def cache_stats():
+    """결과 캐시 hit/miss 카운터 반환"""
+    return jsonify(RESULT_CACHE.stats())
+
+@app.route('/metrics')
+def metrics():
+    """
+    단계별 소요 시간/카운터 반환
+    기본은 Prometheus 텍스트 형식, ?format=json이면 요약 JSON (건수, 합계, 평균, p50/p95, 최대)
+    """
+    if request.args.get('format') == 'json':
+        return jsonify(REGISTRY.snapshot())
+    return Response(REGISTRY.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
+    # STOCK_PORT_PRECOMPUTE=1이면 분석 결과를 일정에 맞춰 백그라운드에서 미리 계산
+    # (디버그 리로더의 감시 프로세스에서는 실행하지 않음)
+    if os.environ.get('STOCK_PORT_PRECOMPUTE') == '1' and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        PrecomputeScheduler([job for job in DEFAULT_JOBS if job.name == 'flask']).start()
     app.run(debug=True, host='0.0.0.0')
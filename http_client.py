@@ -0,0 +1,92 @@
+import random
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 기본 요청 제한 시간 (초)
+HTTP_TIMEOUT = 10
+
+# 5xx/429/타임아웃/연결 오류 재시도 횟수와 백오프 (0.5초, 1초, 2초를 상한으로 무작위 대기)
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# 호스트별 연결 유지 풀 크기
+HTTP_POOL_MAXSIZE = 16
+
+# 호스트별 동시 요청 수 제한 (없는 호스트는 기본값)
+HOST_CONCURRENCY = {
+    'data.krx.co.kr': 4,
+    'api.alternative.me': 2,
+    'www.nasdaqtrader.com': 1,
+}
+DEFAULT_HOST_CONCURRENCY = 4
+
+
+class JitteredRetry(Retry):
+    """지수 백오프 대기 시간을 0~상한 사이에서 무작위로 선택 (동시 재시도가 한꺼번에 몰리지 않도록)"""
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+def create_session(retries=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR, pool_maxsize=HTTP_POOL_MAXSIZE):
+    """
+    연결 유지(keep-alive) 풀과 재시도가 설정된 세션 생성
+    KRX 조회는 POST지만 조회 전용이므로 POST도 재시도
+    재시도 후에도 실패 상태 코드면 예외 대신 마지막 응답 반환
+    """
+    retry = JitteredRetry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=HTTP_RETRY_STATUS,
+        allowed_methods=frozenset(['GET', 'POST', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=len(HOST_CONCURRENCY) + 1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_session = None
+_host_semaphores = {}
+_lock = threading.Lock()
+
+
+def get_http_session():
+    """프로세스 공용 세션"""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def _host_semaphore(host):
+    with _lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY))
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def request(method, url, timeout=HTTP_TIMEOUT, **kwargs):
+    """공용 세션으로 요청 (호스트별 동시 요청 수 제한, 재시도 대기 시간도 제한에 포함)"""
+    with _host_semaphore(urlsplit(url).hostname):
+        return get_http_session().request(method, url, timeout=timeout, **kwargs)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
@@ -0,0 +1,353 @@
+import os
+import copy
+import math
+from collections import deque
+
+import numpy as np
+
+from indicators import parse_indicator_spec
+from result_store import load_result, save_result
+
+# 종목별 지표 상태 저장 경로 (환경변수로 변경 가능)
+DEFAULT_STATE_DIR = os.environ.get(
+    'STOCK_PORT_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'indicator_state')
+)
+
+
+def _divide(a, b):
+    """배치 계산(NumPy)과 같은 0 나눗셈 결과 (inf/NaN)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+
+class RollingMeanState:
+    """
+    이동평균 누적기 (봉마다 O(1) 갱신)
+    skipna=False: 윈도우에 NaN이 있으면 NaN (rolling(window).mean()과 동일)
+    skipna=True: 윈도우 안의 NaN을 제외한 평균 (tail(window).mean()과 동일)
+    """
+
+    def __init__(self, window, skipna=False):
+        self.window = window
+        self.skipna = skipna
+        self.values = deque()
+        self.total = 0.0
+        self.nan_count = 0
+        self._updates = 0
+
+    def update(self, value):
+        self.values.append(value)
+        if math.isnan(value):
+            self.nan_count += 1
+        else:
+            self.total += value
+        if len(self.values) > self.window:
+            removed = self.values.popleft()
+            if math.isnan(removed):
+                self.nan_count -= 1
+            else:
+                self.total -= removed
+
+        # 더하고 빼는 과정의 오차가 쌓이지 않도록 윈도우마다 합계를 다시 계산
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self.total = math.fsum(v for v in self.values if not math.isnan(v))
+        return self.value
+
+    @property
+    def value(self):
+        count = len(self.values) - self.nan_count
+        if self.skipna:
+            return self.total / count if count else math.nan
+        if len(self.values) < self.window or self.nan_count:
+            return math.nan
+        return self.total / self.window
+
+
+class RSIState:
+    """
+    Wilder RSI 누적기 (calculate_rsi와 같은 재귀)
+    첫 window개 변화량(첫 봉은 0)의 단순 평균으로 시드한 뒤 평균 이득/손실만 갱신
+    """
+
+    def __init__(self, window=14):
+        self.window = window
+        self.prev_close = None
+        self.count = 0
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.avg_gain = None
+        self.avg_loss = None
+
+    def update(self, close):
+        if self.prev_close is None:
+            gain = loss = 0.0
+        else:
+            delta = close - self.prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+        self.prev_close = close
+        self.count += 1
+
+        if self.avg_gain is None:
+            self.gain_sum += gain
+            self.loss_sum += loss
+            if self.count == self.window:
+                self.avg_gain = self.gain_sum / self.window
+                self.avg_loss = self.loss_sum / self.window
+        else:
+            self.avg_gain = (self.avg_gain * (self.window - 1) + gain) / self.window
+            self.avg_loss = (self.avg_loss * (self.window - 1) + loss) / self.window
+        return self.value
+
+    @property
+    def value(self):
+        if self.avg_gain is None:
+            return math.nan
+        rs = _divide(self.avg_gain, self.avg_loss)
+        return 100 - _divide(100, 1 + rs)
+
+
+class BollingerState:
+    """
+    볼린저 밴드 누적기 (이동 합계/제곱합으로 평균·표본 표준편차를 O(1) 갱신)
+    값의 크기에 따른 정밀도 손실을 줄이기 위해 첫 값을 기준으로 이동시킨 합계 사용
+    """
+
+    def __init__(self, window=20, num_std=2):
+        self.window = window
+        self.num_std = num_std
+        self.values = deque()
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nan_count = 0
+        self._updates = 0
+
+    def _add(self, value, sign):
+        if math.isnan(value):
+            self.nan_count += sign
+            return
+        x = value - self.shift
+        self.total += sign * x
+        self.total_sq += sign * x * x
+
+    def update(self, close):
+        if self.shift is None and not math.isnan(close):
+            self.shift = close
+        self.values.append(close)
+        if self.shift is not None:
+            self._add(close, 1)
+        elif math.isnan(close):
+            self.nan_count += 1
+        if len(self.values) > self.window:
+            self._add(self.values.popleft(), -1)
+
+        # 누적 오차 제거 (윈도우마다 다시 합산)
+        self._updates += 1
+        if self._updates % self.window == 0 and self.shift is not None:
+            shifted = [v - self.shift for v in self.values if not math.isnan(v)]
+            self.total = math.fsum(shifted)
+            self.total_sq = math.fsum(x * x for x in shifted)
+        return self.value
+
+    @property
+    def value(self):
+        """(%B, 밴드폭)"""
+        if len(self.values) < self.window or self.nan_count:
+            return math.nan, math.nan
+        mean = self.total / self.window
+        variance = max((self.total_sq - self.total * mean) / (self.window - 1), 0.0)
+        std = math.sqrt(variance)
+        middle = self.shift + mean
+        upper_band = middle + std * self.num_std
+        lower_band = middle - std * self.num_std
+        percent_b = _divide(self.values[-1] - lower_band, upper_band - lower_band)
+        band_width = _divide(upper_band - lower_band, middle)
+        return percent_b, band_width
+
+
+class ExtremumState:
+    """
+    이동 최솟값/최댓값 누적기 (단조 덱으로 봉마다 평균 O(1))
+    mode: 'min' 또는 'max', 윈도우에 NaN이 있으면 NaN
+    """
+
+    def __init__(self, window, mode='min'):
+        self.window = window
+        self.mode = mode
+        self.candidates = deque()  # (위치, 값), 값이 단조 증가(min)/감소(max)
+        self.index = -1
+        self.last_nan_index = None
+
+    def update(self, value):
+        self.index += 1
+        if math.isnan(value):
+            self.last_nan_index = self.index
+        else:
+            if self.mode == 'min':
+                while self.candidates and self.candidates[-1][1] >= value:
+                    self.candidates.pop()
+            else:
+                while self.candidates and self.candidates[-1][1] <= value:
+                    self.candidates.pop()
+            self.candidates.append((self.index, value))
+
+        # 윈도우를 벗어난 후보 제거
+        while self.candidates and self.candidates[0][0] <= self.index - self.window:
+            self.candidates.popleft()
+        return self.value
+
+    @property
+    def value(self):
+        if self.index + 1 < self.window or not self.candidates:
+            return math.nan
+        if self.last_nan_index is not None and self.last_nan_index > self.index - self.window:
+            return math.nan
+        return self.candidates[0][1]
+
+
+class StochasticState:
+    """스토캐스틱 누적기 (calculate_stochastic과 같은 %K 스무딩/%D)"""
+
+    def __init__(self, k_period, d_period, smooth_k=1):
+        self.lowest_low = ExtremumState(k_period, 'min')
+        self.highest_high = ExtremumState(k_period, 'max')
+        self.smooth = RollingMeanState(smooth_k) if smooth_k > 1 else None
+        self.d = RollingMeanState(d_period)
+        self.k_value = math.nan
+
+    def update(self, high, low, close):
+        lowest_low = self.lowest_low.update(low)
+        highest_high = self.highest_high.update(high)
+        k_percent = 100 * _divide(close - lowest_low, highest_high - lowest_low)
+        if self.smooth is not None:
+            k_percent = self.smooth.update(k_percent)
+        self.k_value = k_percent
+        self.d.update(k_percent)
+        return self.value
+
+    @property
+    def value(self):
+        """(%K, %D)"""
+        return self.k_value, self.d.value
+
+
+class IndicatorState:
+    """
+    지표 명세(compute_indicators와 같은 형식)의 종목별 누적 상태
+    means: {컬럼명: 기간} 지표 컬럼의 최근 기간 평균(NaN 제외)도 함께 추적 (컬럼명: {컬럼}_MEAN{기간})
+    마지막 봉은 장중 값일 수 있으므로 확정하지 않고 복사본에만 반영
+    """
+
+    def __init__(self, spec, means=None):
+        self.spec = spec
+        self.means = dict(means or {})
+        parsed = parse_indicator_spec(spec)
+
+        self.ma = {window: RollingMeanState(window) for window in parsed['ma']}
+        self.rsi = {window: RSIState(window) for window in parsed['rsi']}
+        self.bb = {(window, num_std): BollingerState(window, num_std) for window, num_std in parsed['bb']}
+        self.stoch = {params: StochasticState(*params) for params in parsed['stoch']}
+        self.mean_states = {column: RollingMeanState(window, skipna=True)
+                            for column, window in self.means.items()}
+
+        self.first_date = None
+        self.last_date = None
+        self.last_close = None
+        self.bars = 0
+
+    def update(self, date, bar):
+        """확정된 봉 하나 반영 (bar: Open/High/Low/Close 매핑), 지표 컬럼 값 반환"""
+        close = float(bar['Close'])
+        values = {}
+
+        for window, state in self.ma.items():
+            values[f'MA{window}'] = state.update(close)
+
+        for window, state in self.rsi.items():
+            values[f'RSI{window}'] = state.update(close)
+
+        for (window, _), state in self.bb.items():
+            percent_b, band_width = state.update(close)
+            values[f'BB{window}_PB'] = percent_b
+            values[f'BB{window}_BW'] = band_width
+
+        for (k_period, d_period, smooth_k), state in self.stoch.items():
+            k_percent, d_percent = state.update(float(bar['High']), float(bar['Low']), close)
+            name = f'Stoch_{k_period}_{d_period}_{smooth_k}'
+            values[f'{name}_K'] = k_percent
+            values[f'{name}_D'] = d_percent
+
+        for column, state in self.mean_states.items():
+            values[f'{column}_MEAN{self.means[column]}'] = state.update(values[column])
+
+        if self.first_date is None:
+            self.first_date = date
+        self.last_date = date
+        self.last_close = close
+        self.bars += 1
+        return values
+
+    def is_continuation_of(self, df):
+        """
+        df가 이 상태에 이어지는 데이터인지
+        마지막 확정 봉이 df에 있고 종가가 같아야 함 (수정주가 반영 등으로 과거 값이 바뀌면 다시 계산)
+        """
+        if self.last_date is None:
+            return True
+        if self.last_date not in df.index or df.index[-1] <= self.last_date:
+            return False
+        return df.at[self.last_date, 'Close'] == self.last_close
+
+    def advance(self, df):
+        """
+        df(공통 컬럼명 OHLCV)의 새 봉만 반영하고 마지막 봉 기준 지표 값 반환
+        마지막 봉 이전까지만 확정하고, 마지막 봉은 복사본에 반영해 값만 계산
+        """
+        confirmed = df.iloc[:-1]
+        if self.last_date is not None:
+            confirmed = confirmed[confirmed.index > self.last_date]
+        for date, bar in zip(confirmed.index, confirmed.to_dict('records')):
+            self.update(date, bar)
+
+        if df.empty:
+            return None
+        return copy.deepcopy(self).update(df.index[-1], df.iloc[-1])
+
+
+def _state_name(market, ticker):
+    safe_ticker = ticker.replace('/', '_').replace('^', '_')
+    return f"{market}_{safe_ticker}"
+
+
+def load_indicator_state(market, ticker, spec, means=None, root=DEFAULT_STATE_DIR):
+    """저장된 종목별 지표 상태 (없거나 명세가 다르면 새 상태)"""
+    entry = load_result(_state_name(market, ticker), root=root)
+    if entry is not None:
+        state = entry['value']
+        if state.spec == spec and state.means == dict(means or {}):
+            return state
+    return IndicatorState(spec, means)
+
+
+def save_indicator_state(market, ticker, state, root=DEFAULT_STATE_DIR):
+    """종목별 지표 상태 저장"""
+    save_result(_state_name(market, ticker), state, root=root)
+
+
+def advance_indicator_state(market, ticker, df, spec, means=None, root=DEFAULT_STATE_DIR):
+    """
+    저장된 상태에 새 봉만 반영하고 마지막 봉 기준 지표 값 반환
+    저장본과 이어지지 않는 데이터(수정주가 등)면 처음부터 다시 계산
+    """
+    state = load_indicator_state(market, ticker, spec, means, root=root)
+    if not state.is_continuation_of(df):
+        state = IndicatorState(spec, means)
+
+    last_date = state.last_date
+    values = state.advance(df)
+    if state.last_date != last_date:
+        save_indicator_state(market, ticker, state, root=root)
+    return values
@@ -0,0 +1,221 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+def _wilder_smooth(values, window):
+    """
+    Wilder's Smoothing (재귀 필터)
+    values: (bars, tickers) 2차원 배열
+    첫 평균은 단순 평균(rolling mean)으로 시드하고 이후는
+    avg[i] = (avg[i-1] * (window-1) + x[i]) / window 로 갱신
+    """
+    n = values.shape[0]
+    avg = np.full(values.shape, np.nan)
+    if n < window:
+        return avg
+
+    # 시드 값은 pandas rolling mean과 동일한 연산으로 계산 (비트 단위 호환)
+    avg[window - 1] = pd.DataFrame(values[:window]).rolling(window=window).mean().to_numpy()[-1]
+
+    # 행 단위 루프 (열 방향은 벡터 연산이므로 여러 종목을 한 번에 처리)
+    prev = avg[window - 1]
+    for i in range(window, n):
+        prev = (prev * (window - 1) + values[i]) / window
+        avg[i] = prev
+    return avg
+
+
+def calculate_rsi(prices, window=14):
+    """
+    RSI 계산 - Wilder's Smoothing 방식
+    prices: Series(단일 종목), DataFrame(열=종목) 또는 ndarray(1차원/2차원, 행=날짜)
+    입력과 같은 형태로 결과 반환
+    """
+    values = np.asarray(prices, dtype=np.float64)
+    is_1d = values.ndim == 1
+    if is_1d:
+        values = values[:, None]
+
+    # 첫 행의 변화량은 NaN -> gain/loss 0 처리 (기존 pandas where 동작과 동일)
+    delta = np.empty_like(values)
+    delta[0] = np.nan
+    delta[1:] = values[1:] - values[:-1]
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+
+    avg_gain = _wilder_smooth(gain, window)
+    avg_loss = _wilder_smooth(loss, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+
+    if is_1d:
+        rsi = rsi[:, 0]
+
+    if isinstance(prices, pd.Series):
+        return pd.Series(rsi, index=prices.index, name=prices.name)
+    if isinstance(prices, pd.DataFrame):
+        return pd.DataFrame(rsi, index=prices.index, columns=prices.columns)
+    return rsi
+
+
+# 한국(pykrx) OHLCV 컬럼명 -> 공통 컬럼명
+KRX_COLUMNS = {
+    '시가': 'Open',
+    '고가': 'High',
+    '저가': 'Low',
+    '종가': 'Close',
+    '거래량': 'Volume',
+}
+
+
+def normalize_ohlcv(df):
+    """pykrx/yfinance OHLCV 데이터프레임을 공통 컬럼명(Open/High/Low/Close/Volume)으로 변환"""
+    return df.rename(columns=KRX_COLUMNS)
+
+
+_SPEC_TOKEN = re.compile(r'^(RSI|BB|STOCH|MA)\s*(.*)$', re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def parse_indicator_spec(spec):
+    """
+    지표 명세 문자열 파싱
+    예: "RSI14, BB20x2, STOCH 5/3/3, MA 5/20/50/120/200"
+    반환: {'rsi': (14,), 'bb': ((20, 2.0),), 'stoch': ((5, 3, 3),), 'ma': (5, 20, 50, 120, 200)}
+    """
+    parsed = {'rsi': [], 'bb': [], 'stoch': [], 'ma': []}
+
+    for token in spec.split(','):
+        token = token.strip()
+        if not token:
+            continue
+
+        match = _SPEC_TOKEN.match(token)
+        if not match:
+            raise ValueError(f"알 수 없는 지표 명세: {token}")
+
+        kind = match.group(1).upper()
+        args = match.group(2).strip()
+
+        if kind == 'RSI':
+            parsed['rsi'].append(int(args or 14))
+        elif kind == 'BB':
+            window, _, num_std = (args or '20').partition('x')
+            parsed['bb'].append((int(window), float(num_std or 2)))
+        elif kind == 'STOCH':
+            k_period, d_period, smooth_k = (int(v) for v in args.split('/'))
+            parsed['stoch'].append((k_period, d_period, smooth_k))
+        else:
+            parsed['ma'].extend(int(v) for v in args.split('/'))
+
+    # 캐시된 결과가 호출 측에서 변경되지 않도록 튜플로 반환
+    return {kind: tuple(values) for kind, values in parsed.items()}
+
+
+def calculate_bollinger_bands(prices, window=20, num_std=2, rolling_mean=None, rolling_std=None):
+    """
+    볼린저 밴드 %B와 밴드폭 계산
+    rolling_mean/rolling_std: 이미 계산된 이동평균/표준편차가 있으면 재사용
+    """
+    if rolling_mean is None:
+        rolling_mean = prices.rolling(window).mean()
+    if rolling_std is None:
+        rolling_std = prices.rolling(window).std()
+    upper_band = rolling_mean + (rolling_std * num_std)
+    lower_band = rolling_mean - (rolling_std * num_std)
+
+    # %B 계산
+    percent_b = (prices - lower_band) / (upper_band - lower_band)
+
+    # 밴드폭 계산 (상대적)
+    band_width = (upper_band - lower_band) / rolling_mean
+
+    return percent_b, band_width
+
+
+def calculate_stochastic(high, low, close, k_period, d_period, smooth_k=1, lowest_low=None, highest_high=None):
+    """
+    스토캐스틱 오실레이터 계산
+    k_period: %K 기간
+    d_period: %D 기간 (이동평균)
+    smooth_k: %K 스무딩 기간
+    lowest_low/highest_high: 이미 계산된 기간별 최저가/최고가가 있으면 재사용
+    """
+    # 최고가와 최저가의 기간별 값 계산
+    if lowest_low is None:
+        lowest_low = low.rolling(window=k_period).min()
+    if highest_high is None:
+        highest_high = high.rolling(window=k_period).max()
+
+    # %K 계산
+    k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
+
+    # %K 스무딩 (기본값 1이면 스무딩 안함)
+    if smooth_k > 1:
+        k_percent = k_percent.rolling(window=smooth_k).mean()
+
+    # %D 계산 (%K의 이동평균)
+    d_percent = k_percent.rolling(window=d_period).mean()
+
+    return k_percent, d_percent
+
+
+def compute_indicators(df, spec):
+    """
+    명세에 따른 지표 컬럼을 한 번에 계산
+    df: 공통 컬럼명(normalize_ohlcv)으로 된 OHLCV 데이터프레임
+    같은 기간의 이동평균/표준편차/최고·최저가는 한 번만 계산하여 재사용
+    (예: MA20과 BB20의 중심선)
+    컬럼: MA{n}, RSI{n}, BB{n}_PB, BB{n}_BW, Stoch_{k}_{d}_{s}_K/D
+    """
+    if isinstance(spec, str):
+        spec = parse_indicator_spec(spec)
+
+    close = df['Close']
+    columns = {}
+
+    means = {}
+    stds = {}
+    lows = {}
+    highs = {}
+
+    def rolling_mean(window):
+        if window not in means:
+            means[window] = close.rolling(window=window).mean()
+        return means[window]
+
+    for window in spec['ma']:
+        columns[f'MA{window}'] = rolling_mean(window)
+
+    for window in spec['rsi']:
+        columns[f'RSI{window}'] = calculate_rsi(close, window)
+
+    for window, num_std in spec['bb']:
+        if window not in stds:
+            stds[window] = close.rolling(window).std()
+        percent_b, band_width = calculate_bollinger_bands(
+            close, window, num_std,
+            rolling_mean=rolling_mean(window),
+            rolling_std=stds[window]
+        )
+        columns[f'BB{window}_PB'] = percent_b
+        columns[f'BB{window}_BW'] = band_width
+
+    for k_period, d_period, smooth_k in spec['stoch']:
+        if k_period not in lows:
+            lows[k_period] = df['Low'].rolling(window=k_period).min()
+            highs[k_period] = df['High'].rolling(window=k_period).max()
+        k_percent, d_percent = calculate_stochastic(
+            df['High'], df['Low'], close, k_period, d_period, smooth_k,
+            lowest_low=lows[k_period], highest_high=highs[k_period]
+        )
+        name = f'Stoch_{k_period}_{d_period}_{smooth_k}'
+        columns[f'{name}_K'] = k_percent
+        columns[f'{name}_D'] = d_percent
+
+    return df.assign(**columns)
@@ -0,0 +1,101 @@
+import queue
+import threading
+
+from metrics import inc, span
+
+# 구독자별 대기 메시지 최대 개수 (넘치면 쌓인 메시지를 버리고 전체 스냅샷으로 대체)
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def same_row(a, b):
+    """
+    두 행이 같은지 비교 (dict/list는 항목별로 비교)
+    NaN은 자기 자신과도 같지 않으므로 NaN끼리는 같은 값으로 봄 (지표가 NaN인 행이 매번 바뀐 것으로 보이지 않도록)
+    """
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same_row(a[key], b[key]) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(same_row(x, y) for x, y in zip(a, b))
+    return bool(a == b) or (a != a and b != b)
+
+
+class LiveFeed:
+    """
+    여러 클라이언트가 공유하는 백그라운드 폴러
+    poll(): {키: 행} 반환, 직전 값과 달라진 행만 모든 구독자에게 전달
+    interval(): 다음 폴링까지 대기 시간 (초)
+    구독자 수와 관계없이 폴링 스레드는 하나이며, 첫 구독자가 생기면 시작하고 모두 떠나면 종료
+    """
+
+    def __init__(self, poll, interval, name='live-feed'):
+        self.name = name
+        self._poll = poll
+        self._interval = interval
+        self._rows = {}
+        self._subscribers = set()
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """마지막으로 폴링한 전체 행"""
+        with self._lock:
+            return dict(self._rows)
+
+    def subscribe(self):
+        """구독 시작 (변경 메시지를 받을 큐 반환, 폴링 스레드가 없으면 시작)"""
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._wake.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """구독 해제 (마지막 구독자면 폴링 스레드를 깨워 종료)"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self._wake.set()
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _publish(self, changed):
+        """달라진 행을 구독자 큐에 전달 (큐가 넘친 구독자에게는 전체 스냅샷 전달)"""
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(changed)
+            except queue.Full:
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(dict(self._rows))
+                inc('live.resyncs')
+
+    def poll_once(self):
+        """한 번 폴링하고 달라진 행 반환"""
+        with span('live.poll'):
+            rows = self._poll()
+        with self._lock:
+            changed = {key: row for key, row in rows.items() if not same_row(self._rows.get(key), row)}
+            self._rows.update(rows)
+            if changed:
+                self._publish(changed)
+        inc('live.changed_rows', len(changed))
+        return changed
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"실시간 갱신 실패 ({self.name}): {e}")
+            self._wake.wait(self._interval())
+            self._wake.clear()
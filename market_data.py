@@ -0,0 +1,395 @@
+import os
+import pickle
+import hashlib
+from datetime import datetime, timedelta
+
+import pandas as pd
+import yfinance as yf
+
+from indicators import normalize_ohlcv
+from price_store import get_price_store
+import http_client
+from fetch_scheduler import TokenBucket, run_concurrent
+from metrics import span
+from panel import CHANGE_FIELD, PANEL_FIELDS, Panel, adjust_for_base_price_changes
+from symbol_directory import get_symbol_directory, lookup_symbol, refresh_market_caps_in_background
+from trading_calendar import get_trading_calendar
+
+# 한 번의 일괄 다운로드에 포함할 최대 티커 수
+BATCH_CHUNK_SIZE = 50
+
+# KRX 호출 속도 제한 (초당 평균 10회, 순간 최대 5회)
+KRX_RATE_LIMITER = TokenBucket(rate=10, capacity=5)
+
+# KRX 정보데이터시스템 API
+KRX_DATA_URL = "http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd"
+
+# 전 종목 일별 시세 저장 구분 (가격 저장소의 시장 폴더, 파일명은 YYYYMMDD)
+KRX_DAILY_MARKET = 'krx_daily'
+
+# 전 종목 일별 시세 동시 조회 워커 수
+KRX_DAILY_MAX_WORKERS = 8
+
+# 시가총액 조회 결과가 비어 있을 때 거슬러 올라가 볼 최대 거래일 수 (기본 목록에 없는 휴장일 대비)
+KRX_SESSION_LOOKBACK = 3
+
+
+def get_latest_business_day():
+    """최근 영업일 찾기 (YYYYMMDD, KRX 휴장일 달력 기준, 장 시작 전이면 직전 거래일)"""
+    return get_trading_calendar('krx').latest_session().strftime("%Y%m%d")
+
+
+def get_krx_market_caps(date=None):
+    """
+    KRX API 직접 호출로 코스피+코스닥 전 종목 시가총액 조회
+    date를 지정하지 않으면 최근 거래일을 조회하고, 결과가 비어 있으면(달력에 없던 휴장일)
+    휴장일로 기록한 뒤 직전 거래일로 다시 조회
+    반환: DataFrame(ticker, name, market_cap, market) (휴장일이 이어지면 빈 데이터프레임)
+    오류/제한 응답이면 ValueError (달력은 바꾸지 않음)
+    """
+    calendar = get_trading_calendar('krx')
+    if date is not None:
+        return _fetch_krx_market_caps(date, calendar)
+
+    date = get_latest_business_day()
+    for _ in range(KRX_SESSION_LOOKBACK):
+        df = _fetch_krx_market_caps(date, calendar)
+        if not df.empty:
+            return df
+        date = calendar.previous_session(date, inclusive=False).strftime("%Y%m%d")
+    return df
+
+
+def _fetch_krx_market_caps(date, calendar):
+    """
+    특정일 코스피+코스닥 전 종목 시가총액 (응답으로 거래일/휴장일 기록)
+    두 시장 모두 OutBlock_1이 빈 목록일 때만 휴장일로 기록하고,
+    OutBlock_1이 없는 응답(오류/요청 제한)이나 행을 하나도 해석하지 못한 응답은 ValueError
+    """
+    results = []
+    rows = 0
+    for market, market_name in [("STK", "KOSPI"), ("KSQ", "KOSDAQ")]:
+        payload = {
+            "bld": "dbms/MDC/STAT/standard/MDCSTAT01501",
+            "mktId": market,
+            "trdDd": date,
+            "share": "1",
+            "money": "1",
+            "csvxls_isNo": "false",
+        }
+        headers = {
+            "Referer": "http://data.krx.co.kr/",
+            "User-Agent": "Mozilla/5.0"
+        }
+
+        with span('fetch.krx_market_caps', market=market_name):
+            resp = http_client.post(KRX_DATA_URL, data=payload, headers=headers, timeout=10)
+            data = resp.json()
+
+        if not isinstance(data, dict) or not isinstance(data.get("OutBlock_1"), list):
+            raise ValueError(f"KRX 시가총액 응답 오류 ({market_name}, {date}): OutBlock_1 없음")
+
+        rows += len(data["OutBlock_1"])
+        for item in data["OutBlock_1"]:
+            try:
+                results.append({
+                    "ticker": item.get("ISU_SRT_CD", ""),
+                    "name": item.get("ISU_ABBRV", ""),
+                    "market_cap": int(item.get("MKTCAP", "0").replace(",", "")),
+                    "market": market_name,
+                })
+            except (ValueError, AttributeError):
+                continue
+
+    if rows and not results:
+        raise ValueError(f"KRX 시가총액 응답을 해석할 수 없습니다 ({date}, {rows}행)")
+
+    df = pd.DataFrame(results, columns=["ticker", "name", "market_cap", "market"])
+    df = df[df["market_cap"] > 0].reset_index(drop=True)
+
+    # 두 시장 모두 빈 목록이면 휴장일 (당일은 아직 집계 전일 수 있으므로 mark_holiday가 기록하지 않음)
+    if not rows:
+        calendar.mark_holiday(date)
+    elif not df.empty:
+        calendar.mark_session(date)
+    return df
+
+
+def get_krx_top_by_market_cap(n=100, date=None):
+    """시가총액 상위 n개 종목 (인덱스: 종목코드, 컬럼: 종목명, 시가총액)"""
+    df = get_krx_market_caps(date)
+    if df.empty:
+        return pd.DataFrame()
+
+    df = df.nlargest(n, "market_cap").reset_index(drop=True)
+    df = df.set_index("ticker")
+    df = df.rename(columns={"market_cap": "시가총액", "name": "종목명"})
+    return df
+
+
+def get_us_company_info(tickers, on_progress=None, on_error=None, directory=None):
+    """
+    미국 주식 회사명/시가총액 조회
+    회사명은 로컬 종목 목록에서 찾고 (없는 종목만 .info 조회), 시가총액은 목록에 저장된 값 사용
+    (오늘 갱신한 시가총액이 없으면 백그라운드에서 하루 한 번 일괄 갱신, 기다리지 않음)
+    on_progress(i, total): 티커마다 호출
+    on_error(ticker, error): 조회 실패 시 호출
+    반환: DataFrame(ticker, name, market_cap) (시가총액 내림차순)
+    """
+    if directory is None:
+        directory = get_symbol_directory()
+    refresh_market_caps_in_background(directory)
+
+    results = []
+    for i, ticker in enumerate(tickers):
+        if on_progress:
+            on_progress(i, len(tickers))
+
+        try:
+            record = lookup_symbol(ticker, directory)
+            if record is None:
+                raise ValueError("종목 목록과 Yahoo Finance에서 찾을 수 없는 티커")
+
+            results.append({
+                'ticker': ticker,
+                'name': record['name'],
+                'market_cap': directory.market_cap(ticker)
+            })
+
+        except Exception as e:
+            if on_error:
+                on_error(ticker, e)
+            continue
+
+    # .info로 새로 확인한 종목 저장 (다음 조회 시 재사용)
+    directory.save()
+
+    # DataFrame 생성하고 시가총액 기준 정렬
+    df = pd.DataFrame(results)
+    if not df.empty:
+        df = df.sort_values('market_cap', ascending=False).reset_index(drop=True)
+    return df
+
+
+def split_batch_frame(raw, tickers):
+    """
+    yf.download(group_by='ticker') 결과를 티커별 데이터프레임으로 분리
+    데이터가 없는 티커는 결과에서 제외
+    """
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+
+    # 단일 티커이면서 컬럼이 1단계인 경우
+    if not isinstance(raw.columns, pd.MultiIndex):
+        df = raw.dropna(how='all')
+        if not df.empty:
+            frames[tickers[0]] = df
+        return frames
+
+    available = set(raw.columns.get_level_values(0))
+    for ticker in tickers:
+        if ticker not in available:
+            continue
+        # 다른 티커의 거래일(휴장일 차이)로 생긴 빈 행 제거
+        df = raw[ticker].dropna(how='all')
+        if not df.empty:
+            frames[ticker] = df
+    return frames
+
+
+def download_ohlcv_batch(tickers, period="2y", start=None, end=None,
+                         chunk_size=BATCH_CHUNK_SIZE, downloader=None):
+    """
+    여러 티커의 OHLCV를 일괄 다운로드하여 {티커: 데이터프레임}으로 반환
+    downloader: yf.download와 같은 시그니처의 함수 (오프라인 재생용 RecordedDownloader 등)
+    """
+    downloader = downloader or yf.download
+    tickers = list(dict.fromkeys(tickers))
+    frames = {}
+
+    for i in range(0, len(tickers), chunk_size):
+        chunk = tickers[i:i + chunk_size]
+        if start is not None:
+            kwargs = {'start': start, 'end': end}
+        else:
+            kwargs = {'period': period}
+
+        with span('fetch.yahoo_download'):
+            raw = downloader(
+                chunk,
+                group_by='ticker',
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                **kwargs
+            )
+        frames.update(split_batch_frame(raw, chunk))
+
+    return frames
+
+
+def get_market_snapshot(symbols, period="5d", downloader=None):
+    """
+    여러 지수/환율/코인 심볼의 최근 종가와 직전 종가를 한 번의 일괄 요청으로 조회
+    반환: {심볼: (현재값, 직전값)} (2개 봉 미만인 심볼은 제외)
+    주말에도 거래되는 코인과 섞여 있으므로 심볼별로 빈 행을 제거한 뒤 마지막 2개 봉 사용
+    """
+    frames = download_ohlcv_batch(symbols, period=period, downloader=downloader)
+    snapshot = {}
+    for symbol, df in frames.items():
+        closes = df['Close'].dropna()
+        if len(closes) >= 2:
+            snapshot[symbol] = (closes.iloc[-1], closes.iloc[-2])
+    return snapshot
+
+
+def get_us_ohlcv(tickers, start, end=None, store=None, downloader=None):
+    """
+    미국 주식 OHLCV 조회 {티커: 데이터프레임}
+    로컬 가격 저장소를 먼저 보고, 마지막 저장일 이후 구간만 일괄 다운로드
+    """
+    store = store or get_price_store()
+
+    def fetch_many(group, delta_start, delta_end):
+        # yf.download의 end는 해당일을 포함하지 않으므로 하루 추가
+        return download_ohlcv_batch(
+            group, start=delta_start, end=delta_end + timedelta(days=1), downloader=downloader
+        )
+
+    return store.get_many('us', list(dict.fromkeys(tickers)), start, fetch_many, end=end)
+
+
+def get_kr_ohlcv(ticker, start, end=None, store=None):
+    """
+    한국 주식 OHLCV 조회 (공통 컬럼명)
+    로컬 가격 저장소를 먼저 보고, 마지막 저장일 이후 구간만 KRX에서 조회
+    """
+    import pkg_resources_shim  # pykrx 임포트 전에 pkg_resources 보정
+    from pykrx import stock
+
+    store = store or get_price_store()
+
+    def fetch(delta_start, delta_end):
+        KRX_RATE_LIMITER.acquire()
+        with span('fetch.krx_ohlcv'):
+            df = stock.get_market_ohlcv_by_date(
+                delta_start.strftime("%Y%m%d"), delta_end.strftime("%Y%m%d"), ticker
+            )
+        return normalize_ohlcv(df)
+
+    return store.get('krx', ticker, start, fetch, end=end)
+
+
+def get_krx_daily_ohlcv(date, store=None):
+    """
+    특정일 코스피+코스닥 전 종목 OHLCV (인덱스: 종목코드, 공통 컬럼명)
+    지난 날짜는 로컬 저장소에 보관하고, 당일은 장중 값일 수 있으므로 매번 조회
+    휴장일이면 빈 데이터프레임
+    """
+    import pkg_resources_shim  # pykrx 임포트 전에 pkg_resources 보정
+    from pykrx import stock
+
+    store = store or get_price_store()
+    date = pd.Timestamp(date).strftime("%Y%m%d")
+
+    # 등락률이 없는 예전 저장본은 수정주가 계산에 쓸 수 없으므로 다시 조회
+    stored = store.load(KRX_DAILY_MARKET, date)
+    if stored is not None and CHANGE_FIELD in stored.columns:
+        return stored
+
+    KRX_RATE_LIMITER.acquire()
+    with span('fetch.krx_daily_ohlcv'):
+        df = normalize_ohlcv(stock.get_market_ohlcv(date, market="ALL"))
+    # 등락률은 권리락/분할 등으로 조정된 기준가 대비이므로 수정주가 계산에 사용
+    df = df.rename(columns={'등락률': CHANGE_FIELD})
+    df = df.reindex(columns=['Open', 'High', 'Low', 'Close', 'Volume', CHANGE_FIELD])
+
+    # 휴장일은 모든 가격이 0으로 조회됨
+    calendar = get_trading_calendar('krx')
+    if df.empty or (df[['Open', 'High', 'Low', 'Close']] == 0).all(axis=None):
+        df = df.iloc[0:0]
+        calendar.mark_holiday(date)
+    else:
+        calendar.mark_session(date)
+
+    if date < datetime.now().strftime("%Y%m%d"):
+        store.save(KRX_DAILY_MARKET, date, df)
+    return df
+
+
+def get_krx_market_ohlcv(start, end=None, store=None, on_progress=None):
+    """
+    start~end 구간 코스피+코스닥 전 종목 OHLCV를 날짜별 일괄 조회로 구성
+    종목 수(N)만큼이 아니라 거래일 수(D)만큼만 KRX를 호출
+    on_progress(done, total, date): 날짜별 조회 완료 시 호출
+    반환: Panel (행=거래일, 열=종목코드, 분할/병합/권리락을 반영한 수정주가)
+    """
+    end = end or datetime.now()
+    # KRX 거래일만 조회 (달력에 없던 휴장일은 빈 결과로 저장되고 달력에도 기록되어 다음부터 건너뜀)
+    dates = [pd.Timestamp(d) for d in get_trading_calendar('krx').sessions(start, end)]
+
+    daily = {}
+    completed = run_concurrent(
+        lambda date: get_krx_daily_ohlcv(date, store=store),
+        dates,
+        max_workers=KRX_DAILY_MAX_WORKERS
+    )
+    for i, (date, df) in enumerate(completed):
+        if on_progress:
+            on_progress(i + 1, len(dates), date)
+        if isinstance(df, Exception):
+            print(f"{date:%Y-%m-%d} 전 종목 시세 조회 실패: {df}")
+            continue
+        daily[date] = df
+
+    # 날짜별 단면을 날짜×종목 패널로 변환 (휴장일 제외)
+    # 일별 시세는 수정되지 않은 가격이므로 등락률로 분할/병합/권리락을 찾아 이전 가격을 수정주가로 변환
+    panel = Panel.from_cross_sections(daily, fields=PANEL_FIELDS + (CHANGE_FIELD,))
+    return adjust_for_base_price_changes(panel)
+
+
+class RecordedDownloader:
+    """
+    yf.download 응답을 파일로 기록/재생하는 대체 다운로더
+    mode='replay': 기록된 응답만 사용 (네트워크 호출 없음, 기록이 없으면 FileNotFoundError)
+    mode='record': 실제 yf.download(또는 downloader)를 호출하고 응답을 기록 (티커 목록별로 가장 긴 응답 유지)
+    """
+
+    def __init__(self, directory, mode='replay', downloader=None):
+        self.directory = directory
+        self.mode = mode
+        self.downloader = downloader or yf.download
+        self.calls = 0
+
+    def _path(self, tickers):
+        # 조회 기간(start/end)은 실행 시각마다 달라지므로 티커 목록만 키로 사용
+        key = ','.join(sorted(tickers))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.pkl")
+
+    def __call__(self, tickers, **kwargs):
+        self.calls += 1
+        if isinstance(tickers, str):
+            tickers = [tickers]
+        path = self._path(tickers)
+
+        if self.mode == 'record':
+            raw = self.downloader(tickers, **kwargs)
+            # 같은 티커 목록의 짧은 응답(저장본 이후 구간 조회 등)이 긴 기록을 덮어쓰지 않도록 더 긴 쪽만 유지
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    if len(pickle.load(f)) > len(raw):
+                        return raw
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(raw, f)
+            os.replace(tmp_path, path)
+            return raw
+
+        # 빈 응답으로 대신하면 조회 실패 경로를 측정하게 되므로 바로 중단
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"기록된 응답이 없습니다 ({', '.join(tickers)}): {path}")
+        with open(path, 'rb') as f:
+            return pickle.load(f)
@@ -0,0 +1,165 @@
+import time
+import math
+import bisect
+import threading
+import functools
+from contextlib import contextmanager
+
+# 소요 시간 히스토그램 구간 상한 (초)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """고정 구간 히스토그램 (건수, 합계, 최소/최대, 구간별 건수)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # 마지막은 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """구간 상한으로 추정한 분위수 (마지막 구간은 최댓값)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    프로세스 내 계측 저장소
+    - span(name, **labels): 블록 소요 시간을 히스토그램에 기록 (예외 시 {name}.errors 카운터 증가)
+    - inc(name, value, **labels): 카운터 증가
+    - observe(name, seconds, **labels): 히스토그램에 직접 기록
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(f"{name}.errors", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name=None, **labels):
+        """함수 전체를 span으로 감싸는 데코레이터 (기본 이름: 함수 이름)"""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """현재 값 (JSON 직렬화 가능한 형태)"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {'name': name, 'labels': dict(labels), **histogram.summary()}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def render_prometheus(self, prefix='stock_port'):
+        """Prometheus 텍스트 형식 출력"""
+        def metric_name(name):
+            return f"{prefix}_{name}".replace('.', '_').replace('-', '_')
+
+        def label_text(labels, extra=()):
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+        lines = []
+        with self._lock:
+            previous = None
+            for (name, labels), value in sorted(self._counters.items()):
+                if name != previous:
+                    lines.append(f"# TYPE {metric_name(name)}_total counter")
+                    previous = name
+                lines.append(f"{metric_name(name)}_total{label_text(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                base = metric_name(name) + '_seconds'
+                if name != previous:
+                    lines.append(f"# TYPE {base} histogram")
+                    previous = name
+                cumulative = 0
+                for bound, bucket_count in zip(list(histogram.buckets) + ['+Inf'], histogram.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{base}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{base}_sum{label_text(labels)} {histogram.total}")
+                lines.append(f"{base}_count{label_text(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+# 프로세스 공용 계측 저장소
+REGISTRY = MetricsRegistry()
+
+span = REGISTRY.span
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timed = REGISTRY.timed
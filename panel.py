@@ -0,0 +1,231 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import calculate_bollinger_bands, calculate_rsi
+
+# 패널에 보관하는 OHLCV 필드
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# 거래소 등락률 필드 (전일 기준가 대비 %, 권리락/분할 등으로 조정된 기준가 기준)
+CHANGE_FIELD = 'Change'
+
+# 가격 비율과 등락률이 이 이상 다르면 기준가가 조정된 날(분할/병합/권리락)로 판단
+ADJUSTMENT_TOLERANCE = 0.005
+
+# 슬라이딩 윈도우 계산 시 한 번에 처리할 종목 수 (임시 배열 메모리 제한)
+SLIDING_BLOCK_SIZE = 256
+
+
+class Panel:
+    """
+    날짜×종목 OHLCV 패널
+    dates: 공통 거래일 인덱스, tickers: 종목 인덱스
+    values: {필드: (날짜 수, 종목 수) float64 배열} (거래가 없는 칸은 NaN)
+    """
+
+    def __init__(self, dates, tickers, values):
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = pd.Index(tickers)
+        self.values = values
+
+    @classmethod
+    def from_frames(cls, frames):
+        """종목별 OHLCV 데이터프레임 {티커: 데이터프레임}을 날짜 합집합 기준으로 정렬"""
+        frames = {ticker: df for ticker, df in frames.items() if not df.empty}
+        if not frames:
+            return cls.empty()
+
+        dates = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values()))))
+        values = {}
+        for field in PANEL_FIELDS:
+            matrix = np.full((len(dates), len(frames)), np.nan)
+            for i, df in enumerate(frames.values()):
+                if field in df:
+                    matrix[dates.get_indexer(df.index), i] = df[field].to_numpy(dtype=np.float64)
+            values[field] = matrix
+        return cls(dates, list(frames), values)
+
+    @classmethod
+    def from_cross_sections(cls, daily, fields=PANEL_FIELDS):
+        """
+        날짜별 전 종목 단면 {날짜: 데이터프레임(인덱스: 종목코드)}을 패널로 변환
+        fields: 패널에 담을 필드 (PANEL_FIELDS 외 필드는 단면에 있을 때만)
+        """
+        daily = {date: df for date, df in daily.items() if not df.empty}
+        if not daily:
+            return cls.empty()
+
+        stacked = pd.concat(daily, names=['Date', 'Ticker']).sort_index()
+        fields = [field for field in fields if field in PANEL_FIELDS or field in stacked.columns]
+        frames = {field: stacked[field].unstack('Ticker') for field in fields}
+        close = frames['Close']
+        values = {field: frame.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+                  for field, frame in frames.items()}
+        return cls(close.index, close.columns, values)
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], {field: np.empty((0, 0)) for field in PANEL_FIELDS})
+
+    def __getitem__(self, field):
+        return self.values[field]
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.tickers)
+
+    def select(self, columns):
+        """종목 선택 (불리언 마스크 또는 위치 배열)"""
+        return Panel(self.dates, self.tickers[columns],
+                     {field: matrix[:, columns] for field, matrix in self.values.items()})
+
+    def first_valid_rows(self, field='Close'):
+        """종목별 첫 유효 행 위치 (상장일)"""
+        return np.isfinite(self.values[field]).argmax(axis=0)
+
+    def last_valid_rows(self, field='Close'):
+        """종목별 마지막 유효 행 위치 (최근 거래일)"""
+        valid = np.isfinite(self.values[field])
+        return len(self.dates) - 1 - valid[::-1].argmax(axis=0)
+
+    def packed(self, field='Close'):
+        """
+        종목별 거래일(field가 유효한 행)만 모아 마지막 행에 맞춰 붙인 패널
+        거래 달력이 다른 종목(매일 거래되는 코인과 주식 등)이 섞이면 날짜 합집합에 종목별 빈 행이 생기므로,
+        윈도우 지표를 종목 자신의 연속된 거래일로 계산할 때 사용
+        행 위치만 의미가 있음 (마지막 행 = 종목별 마지막 거래일, dates는 원래 패널 그대로)
+        """
+        valid = np.isfinite(self.values[field])
+        counts = valid.sum(axis=0)
+        # 모든 종목의 거래일이 이미 마지막 행까지 이어져 있으면 그대로 사용
+        if np.array_equal(counts, len(self.dates) - valid.argmax(axis=0)):
+            return self
+        rows, columns = np.nonzero(valid)
+        # 종목별 거래일 순번을 (전체 행 수 - 거래일 수)만큼 내려 마지막 행에 맞춤
+        ranks = np.cumsum(valid, axis=0)[rows, columns] - 1
+        targets = len(self.dates) - counts[columns] + ranks
+        values = {}
+        for name, matrix in self.values.items():
+            packed = np.full(matrix.shape, np.nan)
+            packed[targets, columns] = matrix[rows, columns]
+            values[name] = packed
+        return Panel(self.dates, self.tickers, values)
+
+    def to_frame(self, field):
+        """필드 행렬을 DataFrame(행=날짜, 열=종목)으로 변환"""
+        return pd.DataFrame(self.values[field], index=self.dates, columns=self.tickers)
+
+
+def _sliding(values, window, reduce):
+    """
+    행 방향 슬라이딩 윈도우 집계 (윈도우에 NaN이 있으면 NaN, 앞쪽 window-1행은 NaN)
+    종목을 블록 단위로 나눠 임시 배열 크기를 제한
+    """
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] < window:
+        return out
+    for start in range(0, values.shape[1], SLIDING_BLOCK_SIZE):
+        block = slice(start, start + SLIDING_BLOCK_SIZE)
+        view = sliding_window_view(values[:, block], window, axis=0)
+        out[window - 1:, block] = reduce(view)
+    return out
+
+
+def sliding_mean(values, window):
+    """이동평균 (rolling(window).mean()과 같은 구간)"""
+    return _sliding(values, window, lambda view: view.mean(axis=-1))
+
+
+def sliding_std(values, window, ddof=1):
+    """이동 표준편차 (rolling(window).std()와 같은 표본 표준편차)"""
+    return _sliding(values, window, lambda view: view.std(axis=-1, ddof=ddof))
+
+
+def panel_rsi(panel, window=14):
+    """
+    패널 전체 RSI (Wilder's Smoothing)
+    재귀는 각 종목의 첫 거래일부터 마지막 거래일까지만 진행해야 하므로
+    거래 구간(첫 거래일, 마지막 거래일)이 같은 종목끼리 묶어서 계산
+    """
+    close = panel['Close']
+    rsi = np.full(close.shape, np.nan)
+    spans = np.stack([panel.first_valid_rows(), panel.last_valid_rows()], axis=1)
+    for first_row, last_row in np.unique(spans, axis=0):
+        columns = (spans[:, 0] == first_row) & (spans[:, 1] == last_row)
+        rows = slice(first_row, last_row + 1)
+        rsi[rows, columns] = calculate_rsi(close[rows, columns], window)
+    return rsi
+
+
+def panel_bollinger_bands(panel, window=20, num_std=2):
+    """패널 전체 볼린저 밴드 %B와 밴드폭"""
+    close = panel['Close']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return calculate_bollinger_bands(
+            close, window, num_std,
+            rolling_mean=sliding_mean(close, window),
+            rolling_std=sliding_std(close, window)
+        )
+
+
+def adjust_for_base_price_changes(panel, tolerance=ADJUSTMENT_TOLERANCE):
+    """
+    수정주가 패널로 변환
+    거래소 일별 시세는 수정되지 않은 가격이므로 분할/병합/권리락이 있으면 가격이 끊어짐
+    그날 등락률(조정된 기준가 대비)과 실제 전일 종가 대비 비율이 다르면 그 이전 가격을 기준가에 맞춰 다시 계산
+    (등락률 필드가 없거나 값이 없는 날은 그대로)
+    """
+    change = panel.values.get(CHANGE_FIELD)
+    if change is None or not len(panel):
+        return panel
+
+    close = panel['Close']
+    valid = np.isfinite(close) & (close > 0)
+    # 종목별 직전 거래일 종가 (거래가 없던 날은 건너뜀)
+    last_close = pd.DataFrame(np.where(valid, close, np.nan)).ffill().to_numpy()
+    prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), last_close[:-1]])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        base_price = close / (1 + change / 100)
+        factor = base_price / prev_close
+    event = valid & np.isfinite(factor) & (factor > 0) & (np.abs(factor - 1) > tolerance)
+    if not event.any():
+        return panel
+
+    # 행 s의 조정 비율 = s 이후 조정일 비율의 곱
+    factor = np.where(event, factor, 1.0)
+    later = np.cumprod(factor[::-1], axis=0)[::-1]
+    multiplier = np.vstack([later[1:], np.ones((1, close.shape[1]))])
+
+    values = dict(panel.values)
+    for field in ('Open', 'High', 'Low', 'Close'):
+        values[field] = panel[field] * multiplier
+    values['Volume'] = panel['Volume'] / multiplier
+    return Panel(panel.dates, panel.tickers, values)
+
+
+def take_rows(values, rows):
+    """종목별로 지정한 행의 값 (예: 마지막 거래일 값)"""
+    return np.take_along_axis(values, np.asarray(rows)[None, :], axis=0)[0]
+
+
+def tail_nanmean(values, n, last_rows=None):
+    """
+    종목별 최근 n행 평균 (NaN 제외, 값이 없으면 NaN)
+    last_rows: 종목별 마지막 행 위치 (없으면 패널 마지막 행 기준)
+    """
+    if last_rows is None:
+        window = values[-n:]
+    else:
+        rows = np.arange(values.shape[0])[:, None]
+        in_window = (rows <= last_rows) & (rows > last_rows - n)
+        window = np.where(in_window, values, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return np.nanmean(window, axis=0)
@@ -0,0 +1,258 @@
+"""
+스캔 결과 사전 계산 스케줄러
+
+장 시작 전/장중/장 마감 후 일정에 맞춰 한국 시총 상위 100개, 한국 전 종목, 미국 관심 종목,
+Flask 분석 결과를 미리 계산해 결과 저장소(result_store)에 기록한다.
+Streamlit/Flask는 사용자가 접속했을 때 저장된 최신 결과를 바로 보여준다.
+
+별도 워커 프로세스로 실행:
+    python precompute.py            # 일정에 따라 계속 실행
+    python precompute.py --once     # 모든 작업을 한 번만 실행
+"""
+import argparse
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+
+from market_data import get_krx_market_caps, get_krx_top_by_market_cap, get_us_company_info
+from symbol_directory import get_symbol_directory, refresh_market_caps
+from result_store import load_result, save_result
+from watchlist_store import get_watchlist_store
+from trading_calendar import get_trading_calendar
+from scans import (
+    DEFAULT_US_TICKERS,
+    RESULT_TABLE_VERSION,
+    US_WATCHLIST,
+    get_us_indicators,
+    scan_korean_stocks,
+    scan_krx_full_market,
+    scan_us_stocks,
+)
+
+# 결과 저장소 키
+KRX_SCAN_RESULT = 'krx_top100'
+KRX_FULL_SCAN_RESULT = 'krx_full'
+US_SCAN_RESULT = 'us_watchlist'
+FLASK_ANALYSIS_RESULT = 'flask_analysis'
+
+# 시장별 갱신 일정: 장 시작 lead_minutes 전, 장중 interval_minutes 간격, 장 마감 lag_minutes 후
+# market: 거래일 달력 구분 (휴장일에는 갱신하지 않음)
+MarketSchedule = namedtuple(
+    'MarketSchedule',
+    ['tz', 'open', 'close', 'interval_minutes', 'lead_minutes', 'lag_minutes', 'market']
+)
+
+KRX_SCHEDULE = MarketSchedule('Asia/Seoul', dtime(9, 0), dtime(15, 30), 30, 10, 10, 'krx')
+US_SCHEDULE = MarketSchedule('America/New_York', dtime(9, 30), dtime(16, 0), 30, 10, 10, 'nyse')
+
+# 다음/이전 갱신 시각을 찾을 최대 일수 (설/추석 연휴 + 주말 대비)
+SCHEDULE_LOOKAHEAD_DAYS = 15
+
+# 갱신 직후 결과가 기록되기까지의 여유 시간
+SNAPSHOT_GRACE = timedelta(minutes=15)
+
+
+def _run_times(schedule, day):
+    """해당 날짜의 갱신 시각 목록 (주말/휴장일은 없음)"""
+    if not get_trading_calendar(schedule.market).is_session(day):
+        return []
+
+    tz = ZoneInfo(schedule.tz)
+    open_at = datetime.combine(day, schedule.open, tzinfo=tz)
+    close_at = datetime.combine(day, schedule.close, tzinfo=tz)
+
+    times = [open_at - timedelta(minutes=schedule.lead_minutes)]
+    t = open_at + timedelta(minutes=schedule.interval_minutes)
+    while t < close_at:
+        times.append(t)
+        t += timedelta(minutes=schedule.interval_minutes)
+    times.append(close_at + timedelta(minutes=schedule.lag_minutes))
+    return times
+
+
+def next_run_time(schedule, now=None):
+    """now 이후 첫 갱신 시각"""
+    now = now or datetime.now(ZoneInfo(schedule.tz))
+    today = now.astimezone(ZoneInfo(schedule.tz)).date()
+    for offset in range(SCHEDULE_LOOKAHEAD_DAYS):
+        for t in _run_times(schedule, today + timedelta(days=offset)):
+            if t > now:
+                return t
+    return now + timedelta(days=1)
+
+
+def previous_run_time(schedule, now=None):
+    """now 이전 마지막 갱신 시각"""
+    now = now or datetime.now(ZoneInfo(schedule.tz))
+    today = now.astimezone(ZoneInfo(schedule.tz)).date()
+    for offset in range(SCHEDULE_LOOKAHEAD_DAYS):
+        for t in reversed(_run_times(schedule, today - timedelta(days=offset))):
+            if t <= now:
+                return t
+    return now - timedelta(days=1)
+
+
+def load_current_result(name, schedule):
+    """
+    마지막 갱신 시각 이후에 계산된 결과만 반환 (워커가 멈춰 오래된 결과면 None)
+    반환: {'value', 'computed_at', 'meta'}
+    """
+    entry = load_result(name)
+    if entry is None:
+        return None
+
+    # 이전 형식으로 저장된 결과는 사용하지 않음
+    if entry['meta'].get('version') != RESULT_TABLE_VERSION:
+        return None
+
+    tz = ZoneInfo(schedule.tz)
+    computed_at = entry['computed_at'].astimezone(tz)
+    if computed_at < previous_run_time(schedule) - SNAPSHOT_GRACE:
+        return None
+    return entry
+
+
+def refresh_krx_scan():
+    """한국 시총 상위 100개 스캔 결과 갱신"""
+    top_data = get_krx_top_by_market_cap(100)
+    if top_data.empty:
+        print("KRX 데이터를 가져올 수 없습니다.")
+        return None
+    results = scan_korean_stocks(
+        top_data,
+        on_error=lambda ticker, e: print(f"종목 {ticker} 데이터 처리 오류: {e}")
+    )
+    return save_result(KRX_SCAN_RESULT, results, meta={'version': RESULT_TABLE_VERSION})
+
+
+def refresh_krx_full_scan():
+    """한국 전 종목(코스피+코스닥) 스캔 결과 갱신"""
+    market_caps = get_krx_market_caps()
+    if market_caps.empty:
+        print("KRX 데이터를 가져올 수 없습니다.")
+        return None
+    results = scan_krx_full_market(market_caps)
+    return save_result(KRX_FULL_SCAN_RESULT, results, meta={'version': RESULT_TABLE_VERSION})
+
+
+def refresh_us_scan(tickers=None):
+    """미국 관심 종목 스캔 결과 갱신 (기본: 저장소의 미국 관심 종목 목록)"""
+    if tickers is None:
+        tickers = get_watchlist_store().ensure(US_WATCHLIST, DEFAULT_US_TICKERS)
+
+    # 워커에서는 시가총액을 먼저 일괄 갱신 (화면 경로는 백그라운드 갱신만 시작하고 기다리지 않음)
+    if not get_symbol_directory().market_caps_are_fresh():
+        try:
+            refresh_market_caps()
+        except Exception as e:
+            print(f"미국 시가총액 일괄 갱신 실패 (저장된 값 사용): {e}")
+
+    us_stocks = get_us_company_info(
+        tickers,
+        on_error=lambda ticker, e: print(f"종목 {ticker} 정보 조회 실패: {e}")
+    )
+    if us_stocks.empty:
+        print("미국 주식 데이터를 가져올 수 없습니다.")
+        return None
+    indicators = get_us_indicators(tuple(us_stocks['ticker']))
+    results = scan_us_stocks(us_stocks, indicators)
+    return save_result(
+        US_SCAN_RESULT, results,
+        meta={'version': RESULT_TABLE_VERSION, 'tickers': list(tickers)}
+    )
+
+
+def refresh_flask_analysis():
+    """Flask 분석 페이지 결과 갱신"""
+    # flask_app이 이 모듈을 사용하므로 순환 임포트를 피해 지연 임포트
+    from flask_app import get_multi_ticker_analysis, watchlist_tickers
+
+    # 백그라운드 계산은 응답 기한 없이 모든 티커가 끝날 때까지 대기
+    tickers = watchlist_tickers()
+    result = get_multi_ticker_analysis.uncached(tuple(tickers), deadline=None)
+    return save_result(
+        FLASK_ANALYSIS_RESULT, result,
+        meta={'version': RESULT_TABLE_VERSION, 'tickers': list(tickers)}
+    )
+
+
+# 사전 계산 작업
+PrecomputeJob = namedtuple('PrecomputeJob', ['name', 'func', 'schedule', 'result_name'])
+
+DEFAULT_JOBS = [
+    PrecomputeJob('krx', refresh_krx_scan, KRX_SCHEDULE, KRX_SCAN_RESULT),
+    PrecomputeJob('krx_full', refresh_krx_full_scan, KRX_SCHEDULE, KRX_FULL_SCAN_RESULT),
+    PrecomputeJob('us', refresh_us_scan, US_SCHEDULE, US_SCAN_RESULT),
+    PrecomputeJob('flask', refresh_flask_analysis, US_SCHEDULE, FLASK_ANALYSIS_RESULT),
+]
+
+
+class PrecomputeScheduler(threading.Thread):
+    """
+    일정에 맞춰 작업을 실행하는 백그라운드 스레드
+    시작 시 최신 결과가 없는 작업은 즉시 한 번 실행
+    """
+
+    def __init__(self, jobs=DEFAULT_JOBS):
+        super().__init__(name='precompute-scheduler', daemon=True)
+        self.jobs = jobs
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run_job(self, job):
+        print(f"[precompute] {job.name} 갱신 시작")
+        try:
+            job.func()
+            print(f"[precompute] {job.name} 갱신 완료")
+        except Exception as e:
+            print(f"[precompute] {job.name} 갱신 실패: {e}")
+
+    def run(self):
+        next_runs = {}
+        for job in self.jobs:
+            if load_current_result(job.result_name, job.schedule) is None:
+                self.run_job(job)
+            next_runs[job.name] = next_run_time(job.schedule)
+
+        jobs_by_name = {job.name: job for job in self.jobs}
+        while not self._stop_event.is_set():
+            name = min(next_runs, key=lambda n: next_runs[n])
+            wait = (next_runs[name] - datetime.now(next_runs[name].tzinfo)).total_seconds()
+            if wait > 0 and self._stop_event.wait(wait):
+                break
+
+            job = jobs_by_name[name]
+            self.run_job(job)
+            next_runs[name] = next_run_time(job.schedule)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스캔 결과 사전 계산 워커")
+    parser.add_argument('--once', action='store_true', help="모든 작업을 한 번만 실행")
+    parser.add_argument(
+        '--jobs', default=','.join(job.name for job in DEFAULT_JOBS),
+        help="실행할 작업 (쉼표 구분)"
+    )
+    args = parser.parse_args()
+
+    selected = set(args.jobs.split(','))
+    jobs = [job for job in DEFAULT_JOBS if job.name in selected]
+    scheduler = PrecomputeScheduler(jobs)
+
+    if args.once:
+        for job in jobs:
+            scheduler.run_job(job)
+        return
+
+    scheduler.start()
+    try:
+        scheduler.join()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == '__main__':
+    main()
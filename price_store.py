@@ -0,0 +1,268 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from trading_calendar import get_trading_calendar
+
+# 가격 데이터 저장 경로 (환경변수로 변경 가능)
+DEFAULT_STORE_DIR = os.environ.get(
+    'STOCK_PORT_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'ohlcv')
+)
+
+# 거래소 달력을 따르지 않는 심볼 접미사 (코인, 환율, 선물은 주말/휴장일에도 거래)
+ROUND_THE_CLOCK_SUFFIXES = ('-USD', '=X', '=F')
+
+# 조정 기준 변경 판단 허용 오차 (확정된 봉의 재조회 종가와 저장된 종가의 상대 차이)
+# 수정주가 피드는 분할/배당이 생기면 과거 가격 전체가 다시 계산되므로, 이 이상 다르면 전체 재조회
+ADJUSTMENT_TOLERANCE = 5e-4
+
+# 요청 시작일이 휴장일일 수 있으므로 저장본 시작일 비교에 두는 여유
+COVERAGE_SLACK = timedelta(days=7)
+
+# 저장소 시장과 다른 거래소에 상장된 심볼 접미사 -> 달력 (미국 관심 종목에 추가한 한국 종목 등)
+SUFFIX_CALENDARS = {
+    '.KS': 'krx',
+    '.KQ': 'krx',
+}
+
+
+def ticker_calendar(market, ticker):
+    """
+    티커에 맞는 거래일 달력
+    접미사로 상장 거래소를 판단하고, 24시간 거래 심볼이나 달력이 없는 시장이면 None
+    """
+    ticker = ticker.upper()
+    if ticker.endswith(ROUND_THE_CLOCK_SUFFIXES):
+        return None
+    for suffix, name in SUFFIX_CALENDARS.items():
+        if ticker.endswith(suffix):
+            return get_trading_calendar(name)
+    return get_trading_calendar(market)
+
+
+def _normalize_index(df):
+    """날짜 인덱스를 시간대 없는 날짜 단위로 통일하고 정렬"""
+    df = df.copy()
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = 'Date'
+    df = df[~df.index.duplicated(keep='last')]
+    return df.sort_index()
+
+
+class PriceStore:
+    """
+    시장+티커별 OHLCV를 Parquet 파일로 보관하는 로컬 가격 저장소
+    마지막 저장일 이후 구간(델타)만 새로 받아 이어 붙임
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def path(self, market, ticker):
+        safe_ticker = ticker.replace('/', '_').replace('^', '_')
+        return os.path.join(self.root, market, f"{safe_ticker}.parquet")
+
+    def load(self, market, ticker):
+        """저장된 데이터 조회 (없으면 None)"""
+        path = self.path(market, ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"가격 저장소 읽기 실패 ({market}/{ticker}): {e}")
+            return None
+
+    def last_date(self, market, ticker):
+        """마지막 저장일 (없으면 None)"""
+        df = self.load(market, ticker)
+        if df is None or df.empty:
+            return None
+        return df.index[-1]
+
+    def saved_at(self, market, ticker):
+        """마지막 저장 시각 (UTC, 없으면 None)"""
+        path = self.path(market, ticker)
+        if not os.path.exists(path):
+            return None
+        return datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+
+    def is_final(self, market, ticker, stored):
+        """
+        저장본이 최신인지 (상장 거래소 달력 기준 마지막 봉이 장 마감 후 저장됐고 그 뒤로 새 거래일이 없음)
+        달력이 없는 시장이나 24시간 거래 심볼이면 항상 False
+        """
+        calendar = ticker_calendar(market, ticker)
+        if calendar is None or stored is None or stored.empty:
+            return False
+        saved_at = self.saved_at(market, ticker)
+        return saved_at is not None and calendar.is_final(stored.index[-1], saved_at)
+
+    def covered_from(self, stored):
+        """
+        저장본이 덮는 시작일
+        상장일 이후만 데이터가 있는 종목은 요청했던 시작일 (그보다 앞선 데이터가 없음을 확인한 날)
+        """
+        return pd.Timestamp(stored.attrs.get('covered_from', stored.index[0]))
+
+    def anchor_date(self, market, ticker, stored):
+        """
+        조정 기준 비교용 봉: 저장 당시 이미 확정된 마지막 봉
+        (마지막 봉이 장중 값이었거나 달력이 없는 심볼이면 그 직전 봉, 비교할 봉이 없으면 None)
+        """
+        calendar = ticker_calendar(market, ticker)
+        saved_at = self.saved_at(market, ticker)
+        if calendar is not None and saved_at is not None and calendar.is_settled(stored.index[-1], saved_at):
+            return stored.index[-1]
+        return stored.index[-2] if len(stored) >= 2 else None
+
+    def adjustment_changed(self, stored, delta, anchor):
+        """확정된 봉(anchor)의 재조회 종가가 저장된 종가와 다른지 (분할/배당으로 조정 기준이 바뀜)"""
+        if anchor is None or delta is None or delta.empty:
+            return False
+        delta = _normalize_index(delta)
+        if anchor not in delta.index:
+            return False
+        old, new = stored.at[anchor, 'Close'], delta.at[anchor, 'Close']
+        if pd.isna(old) or pd.isna(new) or old == 0:
+            return False
+        return abs(new / old - 1) > ADJUSTMENT_TOLERANCE
+
+    def save(self, market, ticker, df):
+        """데이터 전체 저장 (임시 파일에 쓴 뒤 교체)"""
+        path = self.path(market, ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def append(self, market, ticker, new_df):
+        """
+        새 봉 추가 저장
+        겹치는 날짜는 새 데이터로 덮어씀 (장중에 저장된 마지막 봉 갱신)
+        """
+        with self._lock:
+            stored = self.load(market, ticker)
+            if new_df is None or new_df.empty:
+                return stored
+
+            new_df = _normalize_index(new_df)
+            if stored is not None and not stored.empty:
+                attrs = dict(stored.attrs)
+                stored = stored[stored.index < new_df.index[0]]
+                merged = pd.concat([stored, new_df])
+                merged.attrs = attrs
+            else:
+                merged = new_df
+
+            self.save(market, ticker, merged)
+            return merged
+
+    def _delta_start(self, market, ticker, stored, start):
+        """
+        새로 받아야 할 구간의 (시작일, 전체 교체 여부)
+        저장본이 요청 구간을 덮지 못하면 처음부터 다시 받음 (상장일 이후만 있는 종목은 확인한 시작일 기준)
+        (None, False)면 새로 받을 구간 없음
+        """
+        if stored is None or stored.empty or self.covered_from(stored) > start + COVERAGE_SLACK:
+            return start, True
+        # 마지막 봉 이후 거래일이 없고 확정된 값이면 조회하지 않음 (휴장일/주말 구간 요청 방지)
+        if self.is_final(market, ticker, stored):
+            return None, False
+        # 마지막 봉은 장중 값일 수 있으므로 다시 받고, 조정 기준 비교용 확정 봉부터 받음
+        anchor = self.anchor_date(market, ticker, stored)
+        return (anchor if anchor is not None else stored.index[-1]), False
+
+    def _merge(self, market, ticker, stored, delta, replace, covered_from=None):
+        """
+        받아온 델타 반영 (replace=True면 저장본 전체 교체)
+        covered_from: 전체 교체 시 요청했던 시작일 (데이터가 그보다 늦게 시작하면 상장일 이후만 있는 종목)
+        """
+        if delta is None or delta.empty:
+            return stored
+        if not replace:
+            return self.append(market, ticker, delta)
+        with self._lock:
+            merged = _normalize_index(delta)
+            if covered_from is not None:
+                merged.attrs['covered_from'] = min(pd.Timestamp(covered_from), merged.index[0]).strftime('%Y-%m-%d')
+            self.save(market, ticker, merged)
+            return merged
+
+    def get(self, market, ticker, start, fetch, end=None):
+        """
+        start~end 구간 OHLCV 조회
+        fetch(start, end): 구간 데이터를 반환하는 함수 (저장본 이후 델타만 요청)
+        """
+        frames = self.get_many(
+            market, [ticker], start,
+            lambda tickers, delta_start, delta_end: {ticker: fetch(delta_start, delta_end)},
+            end=end
+        )
+        return frames.get(ticker, pd.DataFrame())
+
+    def get_many(self, market, tickers, start, fetch_many, end=None):
+        """
+        여러 티커 OHLCV 조회
+        fetch_many(tickers, start, end): {티커: 데이터프레임} 반환 (일괄 다운로드)
+        같은 델타 시작일을 가진 티커끼리 묶어 한 번에 요청 (저장본이 최신인 티커는 요청하지 않음)
+        """
+        start = pd.Timestamp(start).normalize()
+        end = end or datetime.now()
+
+        stored_frames = {}
+        groups = {}
+        for ticker in tickers:
+            stored = self.load(market, ticker)
+            stored_frames[ticker] = stored
+            groups.setdefault(self._delta_start(market, ticker, stored, start), []).append(ticker)
+
+        results = {}
+        for (delta_start, replace), group in groups.items():
+            deltas = fetch_many(group, delta_start, end) if delta_start is not None else {}
+            replaced = {ticker: delta_start for ticker in group} if replace else {}
+
+            # 확정된 봉의 값이 바뀐 종목은 수정주가 기준이 바뀐 것이므로 델타를 붙이지 않고 전체 재조회
+            if delta_start is not None and not replace:
+                rebased = [
+                    ticker for ticker in group
+                    if self.adjustment_changed(
+                        stored_frames[ticker], deltas.get(ticker),
+                        self.anchor_date(market, ticker, stored_frames[ticker])
+                    )
+                ]
+                if rebased:
+                    print(f"가격 조정 기준 변경, 전체 재조회 ({market}): {', '.join(rebased)}")
+                    full_start = min([start] + [self.covered_from(stored_frames[t]) for t in rebased])
+                    full = fetch_many(rebased, full_start, end)
+                    for ticker in rebased:
+                        deltas[ticker] = full.get(ticker)
+                        replaced[ticker] = full_start
+
+            for ticker in group:
+                stored = self._merge(
+                    market, ticker, stored_frames[ticker], deltas.get(ticker),
+                    replace=ticker in replaced, covered_from=replaced.get(ticker)
+                )
+                if stored is not None and not stored.empty:
+                    results[ticker] = stored[stored.index >= start]
+
+        return results
+
+
+_default_store = None
+
+
+def get_price_store():
+    """프로세스 공용 가격 저장소"""
+    global _default_store
+    if _default_store is None:
+        _default_store = PriceStore()
+    return _default_store
@@ -0,0 +1,147 @@
+"""
+Flask 응답 직렬화/압축
+
+- JSON: orjson이 설치되어 있으면 사용 (numpy 배열/스칼라 직접 직렬화, NaN/무한대는 null)
+  없으면 표준 json으로 같은 출력 (NaN 토큰은 브라우저 JSON.parse가 거부하므로 null로 변환)
+- Arrow IPC 스트림 (Accept: application/vnd.apache.arrow.stream): 열 단위, 결측치는 null
+- float32 묶음 형식 (Accept: application/x-float32-columns): 차트처럼 실수 열만 있는 응답용
+- 압축: 클라이언트가 허용하면 brotli(설치된 경우) 또는 gzip
+"""
+import io
+import gzip
+import json
+import math
+import struct
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
+
+JSON_MIME = 'application/json'
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+PACKED_MIME = 'application/x-float32-columns'
+
+# 이 크기 미만 응답은 압축하지 않음 (바이트)
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# 날짜 열 기준일 (float32 묶음 형식에서 날짜는 기준일부터의 일수)
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _default(obj):
+    """표준 json/orjson이 처리하지 못하는 값 변환 (numpy bool_/정수/실수/배열, 날짜)"""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'f':
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        return None if isinstance(value, float) and not math.isfinite(value) else value
+    if isinstance(obj, (datetime, date, pd.Timestamp)):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__}는 JSON으로 변환할 수 없습니다.")
+
+
+def _finite_or_none(obj):
+    """표준 json용: dict/list 안의 NaN/무한대 실수를 None으로 (orjson과 같은 출력)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite_or_none(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite_or_none(value) for value in obj]
+    return obj
+
+
+def dumps_json(obj):
+    """JSON 바이트 직렬화 (orjson 우선, 없으면 표준 json, 어느 쪽이든 NaN/무한대는 null)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        _finite_or_none(obj), default=_default, ensure_ascii=False, separators=(',', ':'), allow_nan=False
+    ).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify가 dumps_json을 쓰도록 하는 Flask JSON 제공자"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_json(obj).decode('utf-8')
+
+
+def _arrow_array(values):
+    """열 값 -> Arrow 배열 (실수는 float32, NaN/None은 null)"""
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+        return pa.array(values.astype(np.float32), from_pandas=True)
+    array = pa.array(values, from_pandas=True)
+    if pa.types.is_floating(array.type):
+        array = array.cast(pa.float32())
+    return array
+
+
+def encode_arrow(columns, metadata=None):
+    """
+    {열 이름: 값 목록/배열} -> Arrow IPC 스트림 바이트
+    metadata: 스키마 메타데이터 'meta' 키에 JSON으로 저장 (오류 목록, 갱신 시각 등)
+    """
+    table = pa.table({name: _arrow_array(values) for name, values in columns.items()})
+    if metadata:
+        table = table.replace_schema_metadata({'meta': dumps_json(metadata)})
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def encode_packed(dates, columns, metadata=None):
+    """
+    날짜 + 실수 열 -> float32 묶음 바이트 (Float32Array로 바로 읽을 수 있는 형식)
+    [헤더 길이 uint32 LE][헤더 JSON (4바이트 단위로 공백 채움)][날짜 int32 LE x rows][열별 float32 LE x rows]
+    헤더: {"rows", "columns": [열 이름 순서], "date_unit": "days_since_1970-01-01", ...metadata}
+    결측치는 NaN
+    """
+    rows = len(dates)
+    header = dict(metadata or {})
+    header.update({'rows': rows, 'columns': list(columns), 'date_unit': 'days_since_1970-01-01'})
+    header_bytes = dumps_json(header)
+    header_bytes += b' ' * (-len(header_bytes) % 4)
+
+    days = (np.asarray(dates, dtype='datetime64[D]') - _EPOCH).astype('<i4')
+    buffers = [struct.pack('<I', len(header_bytes)), header_bytes, days.tobytes()]
+    for values in columns.values():
+        buffers.append(np.asarray(values, dtype='<f4').tobytes())
+    return b''.join(buffers)
+
+
+def negotiate(accept_mimetypes, offers):
+    """Accept 헤더로 응답 형식 선택 (offers 첫 항목이 기본값)"""
+    return accept_mimetypes.best_match(offers, default=offers[0]) or offers[0]
+
+
+def compress(body, accept_encodings):
+    """
+    클라이언트가 허용하는 방식으로 압축
+    반환: (본문, Content-Encoding 값 또는 None)
+    """
+    if len(body) < COMPRESS_MIN_SIZE:
+        return body, None
+    if brotli is not None and accept_encodings['br']:
+        return brotli.compress(body, quality=BROTLI_QUALITY), 'br'
+    if accept_encodings['gzip']:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), 'gzip'
+    return body, None
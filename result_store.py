@@ -0,0 +1,46 @@
+import os
+import pickle
+import threading
+from datetime import datetime
+
+# 사전 계산 결과 저장 경로 (환경변수로 변경 가능)
+DEFAULT_RESULT_DIR = os.environ.get(
+    'STOCK_PORT_RESULT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'results')
+)
+
+
+def _path(name, root):
+    return os.path.join(root, f"{name}.pkl")
+
+
+def save_result(name, value, meta=None, root=DEFAULT_RESULT_DIR):
+    """
+    계산 결과 저장 (Streamlit/Flask 프로세스가 공유)
+    임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 항상 완전한 결과만 봄
+    """
+    entry = {
+        'value': value,
+        'computed_at': datetime.now(),
+        'meta': meta or {},
+    }
+    path = _path(name, root)
+    os.makedirs(root, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(entry, f)
+    os.replace(tmp_path, path)
+    return entry
+
+
+def load_result(name, root=DEFAULT_RESULT_DIR):
+    """저장된 결과 조회 {'value', 'computed_at', 'meta'} (없으면 None)"""
+    path = _path(name, root)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"결과 저장소 읽기 실패 ({name}): {e}")
+        return None
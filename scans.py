@@ -0,0 +1,278 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from indicators import compute_indicators
+from indicator_state import advance_indicator_state
+from market_data import get_kr_ohlcv, get_krx_market_ohlcv, get_us_ohlcv
+from panel import Panel, panel_bollinger_bands, panel_rsi, tail_nanmean, take_rows
+from fetch_scheduler import run_concurrent
+from metrics import span, timed
+from watchlist_store import get_watchlist_store
+
+# 기본 미국 주식 시총 상위 50개 티커 (기본값)
+DEFAULT_US_TICKERS = ["MSFT", "GOOG", "META", "AMZN", "AAPL", "TSLA", "NVDA", "AVGO"]
+
+# 미국 관심 종목 목록 이름 (관심 종목 저장소, 없으면 DEFAULT_US_TICKERS로 생성)
+US_WATCHLIST = 'us'
+
+# 미국 종목별 지표 결과 저장소 구분과 유효 기간 (초)
+US_INDICATOR_NAMESPACE = 'us_indicators'
+US_INDICATOR_TTL = 1800
+
+# 스캔용 기술적 지표 명세 (RSI 14일, 볼린저 밴드 20일 2σ)
+SCAN_INDICATOR_SPEC = "RSI14, BB20x2"
+
+# 스캔용 누적 상태에서 함께 추적하는 평균 (52주 볼린저 밴드폭 평균)
+SCAN_STATE_MEANS = {'BB20_BW': 252}
+
+# 한국 주식 스캔 동시 처리 워커 수 (동시에 진행 중인 최대 KRX 조회 수)
+KRX_MAX_WORKERS = 8
+
+# 스캔 결과 테이블 컬럼 타입 (표시 형식은 화면 출력 시 적용)
+RESULT_COLUMNS = {
+    '종목코드': 'object',
+    '종목명': 'category',
+    '현재가': 'float32',
+    'RSI': 'float32',
+    '볼린저밴드%B': 'float32',
+    '볼린저밴드폭': 'float32',
+    '52주볼린저밴드폭평균': 'float32',
+    '시가총액': 'int64',
+}
+
+# 스캔 결과 테이블 형식 버전 (저장된 사전 계산 결과 호환성 확인용)
+RESULT_TABLE_VERSION = 2
+
+
+def summarize_technical_indicators(df):
+    """
+    OHLCV 데이터(공통 컬럼명)로 스캔용 기술적 지표 요약 계산
+    RSI(14일, Wilder's Smoothing)와 볼린저 밴드(20일, 2σ)를 한 번에 계산
+    """
+    df = compute_indicators(df, SCAN_INDICATOR_SPEC)
+
+    # 현재가 (최신 종가)
+    current_price = df['Close'].iloc[-1]
+
+    rsi = df['RSI14'].iloc[-1]
+    percent_b = df['BB20_PB']
+    band_width = df['BB20_BW']
+
+    # 최신 볼린저 밴드 %B값
+    current_percent_b = percent_b.iloc[-1] if not pd.isna(percent_b.iloc[-1]) else 0
+
+    # 최신 볼린저 밴드폭
+    current_band_width = band_width.iloc[-1] if not pd.isna(band_width.iloc[-1]) else 0
+
+    # 52주(약 252일) 볼린저 밴드폭 평균
+    if len(band_width) >= 252:
+        avg_52w_band_width = band_width.tail(252).mean()
+    else:
+        avg_52w_band_width = band_width.mean()
+
+    return {
+        'current_price': current_price,
+        'rsi': rsi if not pd.isna(rsi) else 0,
+        'percent_b': current_percent_b,
+        'band_width': current_band_width,
+        'avg_52w_band_width': avg_52w_band_width if not pd.isna(avg_52w_band_width) else 0
+    }
+
+
+def summarize_indicator_state(market, ticker, df):
+    """
+    종목별 누적 지표 상태로 스캔용 지표 요약 계산
+    저장된 상태에 새 봉만 반영하므로 조회 기간과 무관하게 봉 수만큼만 계산
+    """
+    with span('compute.indicator_state', market=market):
+        values = advance_indicator_state(market, ticker, df, SCAN_INDICATOR_SPEC, means=SCAN_STATE_MEANS)
+
+    def value_or_zero(column):
+        value = values[column]
+        return 0 if pd.isna(value) else value
+
+    return {
+        'current_price': df['Close'].iloc[-1],
+        'rsi': value_or_zero('RSI14'),
+        'percent_b': value_or_zero('BB20_PB'),
+        'band_width': value_or_zero('BB20_BW'),
+        'avg_52w_band_width': value_or_zero('BB20_BW_MEAN252')
+    }
+
+
+def compute_kr_indicators(ticker, period_days=252):
+    """한국 주식 기술적 지표 계산 (데이터 부족 시 None, 종목별 누적 상태를 새 봉만큼 갱신)"""
+    # 데이터 조회 기간 설정 (1년 + 여유분)
+    start_date = datetime.now() - timedelta(days=period_days + 100)
+
+    # 주가 데이터 조회 (로컬 저장소 + 마지막 저장일 이후 구간만 KRX 조회)
+    df = get_kr_ohlcv(ticker, start_date)
+
+    if df.empty or len(df) < 20:
+        return None
+
+    return summarize_indicator_state('krx', ticker, df)
+
+
+@timed('compute.panel_indicators')
+def compute_panel_indicators(panel):
+    """
+    날짜×종목 패널로 스캔 지표를 한 번에 계산 (종목별 summarize_technical_indicators와 같은 지표)
+    상장일이 다른 종목은 각자의 첫 거래일부터 계산
+    반환: DataFrame(인덱스: 종목코드, 컬럼: current_price, rsi, percent_b, band_width, avg_52w_band_width)
+    계산할 수 없는 지표(예: 가격 변동이 없는 종목의 RSI)는 NaN
+    """
+    # 20거래일 이상인 종목만 사용
+    panel = panel.select(np.isfinite(panel['Close']).sum(axis=0) >= 20)
+
+    # 거래 달력이 다른 종목(주말에도 거래되는 코인 등)이 섞여도 종목마다 자기 거래일로만 윈도우 계산
+    panel = panel.packed()
+
+    rsi = panel_rsi(panel, 14)
+    percent_b, band_width = panel_bollinger_bands(panel, 20, 2)
+
+    # 종목별 마지막 거래일 기준 값
+    last_rows = panel.last_valid_rows()
+    indicators = pd.DataFrame({
+        'current_price': take_rows(panel['Close'], last_rows),
+        'rsi': take_rows(rsi, last_rows),
+        'percent_b': take_rows(percent_b, last_rows),
+        'band_width': take_rows(band_width, last_rows),
+        'avg_52w_band_width': tail_nanmean(band_width, 252, last_rows),
+    }, index=panel.tickers)
+    return indicators
+
+
+def compute_us_indicators(tickers, on_error=None):
+    """
+    미국 주식 기술적 지표 일괄 계산 (티커 목록 전체를 한 번에 다운로드, 날짜×종목 패널로 한 번에 계산)
+    on_error(ticker, error): 계산 실패 시 해당 종목마다 호출
+    반환: {티커: 지표}
+    """
+    # 2년 데이터로 충분한 여유 확보 (로컬 저장소 + 마지막 저장일 이후 구간만 일괄 다운로드)
+    start_date = datetime.now() - timedelta(days=730)
+    price_frames = get_us_ohlcv(tickers, start_date)
+
+    try:
+        indicators = compute_panel_indicators(Panel.from_frames(price_frames))
+    except Exception as e:
+        if on_error:
+            for ticker in price_frames:
+                on_error(ticker, e)
+        return {}
+
+    return indicators.to_dict(orient='index')
+
+
+def get_us_indicators(tickers, on_error=None):
+    """
+    미국 주식 기술적 지표 (종목별 결과를 관심 종목 저장소에 캐시)
+    저장된 결과가 없거나 오래된 종목만 한 번에 계산하므로, 겹치는 종목이 있는 다른 관심 종목 목록의 계산을 재사용
+    반환: {티커: 지표}
+    """
+    return get_watchlist_store().get_or_compute_results(
+        US_INDICATOR_NAMESPACE, tickers,
+        lambda missing: compute_us_indicators(missing, on_error=on_error),
+        max_age=US_INDICATOR_TTL
+    )
+
+
+def build_result_row(ticker, name, market_cap, indicators):
+    """스캔 결과 한 행 생성 (원본 값)"""
+    return {
+        '종목코드': ticker,
+        '종목명': name,
+        '현재가': indicators['current_price'],
+        'RSI': indicators['rsi'],
+        '볼린저밴드%B': indicators['percent_b'],
+        '볼린저밴드폭': indicators['band_width'],
+        '52주볼린저밴드폭평균': indicators['avg_52w_band_width'],
+        '시가총액': int(market_cap or 0),
+    }
+
+
+def build_result_table(rows):
+    """스캔 결과 행 목록을 타입이 지정된 컬럼형 테이블로 변환"""
+    return pd.DataFrame(rows, columns=list(RESULT_COLUMNS)).astype(RESULT_COLUMNS)
+
+
+def scan_korean_stocks(top_data, compute=compute_kr_indicators, max_workers=KRX_MAX_WORKERS,
+                       initializer=None, on_progress=None, on_error=None):
+    """
+    한국 주식 스캔
+    top_data: get_krx_top_by_market_cap 결과 (인덱스: 종목코드, 컬럼: 종목명, 시가총액)
+    compute(ticker): 종목별 지표 계산 함수 (캐시 래퍼 등으로 교체 가능)
+    on_progress(done, total, ticker): 종목 완료 시 호출 (호출한 스레드에서 실행)
+    on_error(ticker, error): 종목별 계산 실패 시 호출
+    """
+    # 각 종목별 기술적 지표 동시 계산 (KRX 호출 속도는 market_data의 토큰 버킷이 제한)
+    indicators_by_ticker = {}
+    completed = run_concurrent(
+        compute,
+        list(top_data.index),
+        max_workers=max_workers,
+        initializer=initializer
+    )
+    for i, (ticker, indicators) in enumerate(completed):
+        if on_progress:
+            on_progress(i + 1, len(top_data), ticker)
+
+        if isinstance(indicators, Exception):
+            if on_error:
+                on_error(ticker, indicators)
+            continue
+        indicators_by_ticker[ticker] = indicators
+
+    # 결과 저장할 리스트 (시가총액 순서 유지)
+    results = []
+    for ticker, row in top_data.iterrows():
+        indicators = indicators_by_ticker.get(ticker)
+        if indicators:
+            results.append(build_result_row(ticker, row['종목명'], row['시가총액'], indicators))
+
+    return build_result_table(results)
+
+
+def scan_us_stocks(us_stocks, indicators_by_ticker):
+    """
+    미국 주식 스캔 결과 생성
+    us_stocks: get_us_company_info 결과 (ticker, name, market_cap)
+    indicators_by_ticker: compute_us_indicators 결과
+    """
+    results = []
+    for _, row in us_stocks.iterrows():
+        indicators = indicators_by_ticker.get(row['ticker'])
+        if indicators:
+            results.append(build_result_row(row['ticker'], row['name'], row['market_cap'], indicators))
+
+    return build_result_table(results)
+
+
+def scan_krx_full_market(market_caps, period_days=252, on_progress=None):
+    """
+    코스피+코스닥 전 종목 스캔 (날짜별 전 종목 시세 일괄 조회)
+    market_caps: get_krx_market_caps 결과 (ticker, name, market_cap)
+    on_progress(done, total, date): 날짜별 시세 조회 완료 시 호출
+    """
+    start_date = datetime.now() - timedelta(days=period_days + 100)
+    panel = get_krx_market_ohlcv(start_date, on_progress=on_progress)
+    indicators = compute_panel_indicators(panel)
+
+    # 시가총액 순서 유지
+    listing = market_caps.sort_values('market_cap', ascending=False)
+    listing = listing[listing['ticker'].isin(indicators.index)]
+    indicators = indicators.loc[listing['ticker']]
+
+    table = pd.DataFrame({
+        '종목코드': listing['ticker'].to_numpy(),
+        '종목명': listing['name'].to_numpy(),
+        '현재가': indicators['current_price'].to_numpy(),
+        'RSI': indicators['rsi'].to_numpy(),
+        '볼린저밴드%B': indicators['percent_b'].to_numpy(),
+        '볼린저밴드폭': indicators['band_width'].to_numpy(),
+        '52주볼린저밴드폭평균': indicators['avg_52w_band_width'].to_numpy(),
+        '시가총액': listing['market_cap'].to_numpy(),
+    })
+    return table.astype(RESULT_COLUMNS)
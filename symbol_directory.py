@@ -0,0 +1,307 @@
+import os
+import io
+import threading
+from bisect import bisect_left
+from datetime import date
+
+import pandas as pd
+import yfinance as yf
+
+import http_client
+
+# 저장소에 포함된 기본 미국 종목 목록
+BUNDLED_SYMBOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'us_symbols.csv')
+
+# 갱신된 종목 목록 저장 경로 (환경변수로 변경 가능, 없으면 기본 목록 사용)
+DEFAULT_SYMBOLS_PATH = os.environ.get(
+    'STOCK_PORT_SYMBOLS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'symbols', 'us_symbols.csv')
+)
+
+# 나스닥 트레이더 전 종목 목록 (NASDAQ/NYSE/NYSE Arca 등 미국 상장 전체)
+NASDAQ_TRADED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqtraded.txt"
+
+# 나스닥 종목 스크리너 (미국 상장 주식 전체 시가총액을 한 번의 요청으로 조회)
+NASDAQ_SCREENER_URL = "https://api.nasdaq.com/api/screener/stocks"
+
+# nasdaqtraded.txt 상장 거래소 코드
+LISTING_EXCHANGES = {
+    'Q': 'NASDAQ',
+    'N': 'NYSE',
+    'A': 'NYSE American',
+    'P': 'NYSE Arca',
+    'Z': 'Cboe BZX',
+    'V': 'IEX',
+}
+
+SYMBOL_COLUMNS = ['symbol', 'name', 'exchange', 'market_cap', 'market_cap_date']
+
+
+class SymbolDirectory:
+    """
+    미국 종목 목록 (티커, 회사명, 거래소, 시가총액)
+    티커 조회는 딕셔너리로 O(1), 접두어 검색은 정렬된 티커 배열에서 이진 탐색
+    시가총액은 종목별로 조회하지 않고 스크리너 응답으로 하루 한 번 일괄 갱신 (refresh_market_caps)
+    """
+
+    def __init__(self, records, path=DEFAULT_SYMBOLS_PATH):
+        self.path = path
+        self._records = {record['symbol']: record for record in records}
+        self._symbols = sorted(self._records)
+        self._lock = threading.Lock()
+        self._dirty = False
+        # 마지막으로 시가총액을 갱신한 날짜 / 백그라운드 갱신을 시도한 날짜
+        self.market_caps_date = max(
+            (record['market_cap_date'] for record in self._records.values() if record['market_cap_date']),
+            default=None
+        )
+        self._market_caps_attempted = None
+
+    @classmethod
+    def load(cls, path=DEFAULT_SYMBOLS_PATH):
+        """갱신된 목록이 있으면 사용하고, 없으면 저장소에 포함된 기본 목록 사용"""
+        source = path if os.path.exists(path) else BUNDLED_SYMBOLS_PATH
+        df = pd.read_csv(source, dtype={'symbol': str, 'name': str, 'exchange': str, 'market_cap_date': str},
+                         keep_default_na=False, na_values={'market_cap': ['']})
+        records = []
+        for record in df.to_dict('records'):
+            record['market_cap'] = None if pd.isna(record['market_cap']) else int(record['market_cap'])
+            record['market_cap_date'] = record['market_cap_date'] or None
+            records.append(record)
+        return cls(records, path=path)
+
+    def __contains__(self, symbol):
+        return symbol in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, symbol):
+        """종목 정보 (없으면 None)"""
+        return self._records.get(symbol)
+
+    def symbols(self):
+        """정렬된 티커 목록"""
+        return list(self._symbols)
+
+    def prefix_search(self, prefix, limit=10):
+        """티커 접두어 검색 (정렬 순서)"""
+        prefix = prefix.upper()
+        start = bisect_left(self._symbols, prefix)
+        results = []
+        for symbol in self._symbols[start:]:
+            if not symbol.startswith(prefix) or len(results) >= limit:
+                break
+            results.append(self._records[symbol])
+        return results
+
+    def add(self, symbol, name, exchange='', market_cap=None):
+        """종목 추가/갱신 (목록에 없던 종목을 .info로 확인한 경우 등)"""
+        with self._lock:
+            if symbol not in self._records:
+                self._symbols.insert(bisect_left(self._symbols, symbol), symbol)
+            self._records[symbol] = {
+                'symbol': symbol,
+                'name': name,
+                'exchange': exchange,
+                'market_cap': market_cap,
+                'market_cap_date': date.today().isoformat() if market_cap else None,
+            }
+            self._dirty = True
+
+    def update_market_caps(self, market_caps):
+        """
+        일괄 조회한 시가총액 반영 {티커: 시가총액} (목록에 있는 종목만)
+        반환: 갱신한 종목 수
+        """
+        today = date.today().isoformat()
+        updated = 0
+        with self._lock:
+            for symbol, market_cap in market_caps.items():
+                record = self._records.get(symbol)
+                if record is not None:
+                    record['market_cap'] = market_cap
+                    record['market_cap_date'] = today
+                    updated += 1
+            self.market_caps_date = today
+            self._dirty = True
+        return updated
+
+    def market_caps_are_fresh(self):
+        """오늘 일괄 갱신한 시가총액인지"""
+        return self.market_caps_date == date.today().isoformat()
+
+    def market_cap(self, symbol):
+        """저장된 시가총액 (없으면 0, 네트워크 조회 없음)"""
+        record = self._records.get(symbol)
+        return (record and record['market_cap']) or 0
+
+    def save(self, path=None):
+        """목록 저장 (변경된 경우만, 임시 파일에 쓴 뒤 교체)"""
+        path = path or self.path
+        with self._lock:
+            if not self._dirty and os.path.exists(path):
+                return
+            df = pd.DataFrame([self._records[symbol] for symbol in self._symbols], columns=SYMBOL_COLUMNS)
+            df['market_cap'] = df['market_cap'].astype('Int64')
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+
+def parse_nasdaq_traded(text):
+    """nasdaqtraded.txt(파이프 구분) 파싱 -> 종목 레코드 목록 (테스트 종목 제외)"""
+    df = pd.read_csv(io.StringIO(text), sep='|', dtype=str, keep_default_na=False)
+    # 마지막 줄은 파일 생성 시각
+    df = df[(df['Test Issue'] == 'N') & (df['Symbol'] != '')]
+
+    # yfinance 표기로 변환 (BRK.B -> BRK-B)
+    return pd.DataFrame({
+        'symbol': df['Symbol'].str.replace('.', '-', regex=False),
+        'name': df['Security Name'],
+        'exchange': df['Listing Exchange'].map(lambda code: LISTING_EXCHANGES.get(code, code)),
+        'market_cap': None,
+        'market_cap_date': None,
+    }).to_dict('records')
+
+
+def parse_screener_market_caps(rows):
+    """
+    나스닥 스크리너 응답 행 -> {티커: 시가총액}
+    티커는 yfinance 표기로 변환 (BRK/B -> BRK-B), 시가총액이 없거나 0인 종목은 제외
+    """
+    market_caps = {}
+    for row in rows:
+        symbol = str(row.get('symbol') or '').strip().upper().replace('/', '-').replace('.', '-')
+        value = str(row.get('marketCap') or '').replace(',', '').replace('$', '').strip()
+        try:
+            market_cap = int(float(value))
+        except ValueError:
+            continue
+        if symbol and market_cap > 0:
+            market_caps[symbol] = market_cap
+    return market_caps
+
+
+def fetch_market_caps():
+    """나스닥 스크리너로 미국 상장 주식 전체 시가총액 일괄 조회 {티커: 시가총액}"""
+    resp = http_client.get(
+        NASDAQ_SCREENER_URL,
+        params={'tableonly': 'true', 'download': 'true'},
+        headers={'User-Agent': 'Mozilla/5.0', 'Accept': 'application/json'},
+        timeout=30
+    )
+    resp.raise_for_status()
+    rows = (resp.json().get('data') or {}).get('rows') or []
+    return parse_screener_market_caps(rows)
+
+
+def refresh_market_caps(directory=None):
+    """
+    종목 목록의 시가총액 일괄 갱신 (한 번의 요청)
+    반환: 갱신한 종목 수
+    """
+    if directory is None:
+        directory = get_symbol_directory()
+    updated = directory.update_market_caps(fetch_market_caps())
+    directory.save()
+    return updated
+
+
+_refresh_thread = None
+_refresh_lock = threading.Lock()
+
+
+def refresh_market_caps_in_background(directory=None):
+    """
+    오늘 갱신한 시가총액이 없으면 백그라운드 스레드로 하루 한 번 갱신 시작
+    화면/검증 경로에서는 기다리지 않고 저장된 값을 바로 사용
+    """
+    global _refresh_thread
+    if directory is None:
+        directory = get_symbol_directory()
+    today = date.today().isoformat()
+    with _refresh_lock:
+        if directory.market_caps_are_fresh() or directory._market_caps_attempted == today:
+            return
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return
+        directory._market_caps_attempted = today
+
+        def run():
+            try:
+                refresh_market_caps(directory)
+            except Exception as e:
+                print(f"미국 시가총액 일괄 갱신 실패: {e}")
+
+        _refresh_thread = threading.Thread(target=run, name='market-cap-refresh', daemon=True)
+        _refresh_thread.start()
+
+
+def refresh_symbol_directory(path=DEFAULT_SYMBOLS_PATH):
+    """
+    나스닥 트레이더 전 종목 목록으로 종목 목록 갱신
+    시가총액은 스크리너로 일괄 갱신 (실패하면 기존에 조회해 둔 값 유지)
+    """
+    resp = http_client.get(NASDAQ_TRADED_URL, timeout=30)
+    resp.raise_for_status()
+
+    previous = SymbolDirectory.load(path)
+    records = parse_nasdaq_traded(resp.text)
+    for record in records:
+        known = previous.get(record['symbol'])
+        if known:
+            record['market_cap'] = known['market_cap']
+            record['market_cap_date'] = known['market_cap_date']
+
+    directory = SymbolDirectory(records, path=path)
+    try:
+        directory.update_market_caps(fetch_market_caps())
+    except Exception as e:
+        print(f"미국 시가총액 일괄 갱신 실패 (기존 값 유지): {e}")
+    directory._dirty = True
+    directory.save()
+    return directory
+
+
+_default_directory = None
+_default_directory_lock = threading.Lock()
+
+
+def get_symbol_directory():
+    """프로세스 공용 종목 목록"""
+    global _default_directory
+    with _default_directory_lock:
+        if _default_directory is None:
+            _default_directory = SymbolDirectory.load()
+        return _default_directory
+
+
+def lookup_symbol(symbol, directory=None):
+    """
+    종목 정보 조회 (목록에 없으면 yf.Ticker().info로 확인 후 목록에 추가)
+    반환: {'symbol', 'name', 'exchange', 'market_cap', 'market_cap_date'} (존재하지 않는 티커면 None)
+    """
+    if directory is None:
+        directory = get_symbol_directory()
+    record = directory.get(symbol)
+    if record is not None:
+        return record
+
+    info = yf.Ticker(symbol).info
+    name = info.get('longName') or info.get('shortName')
+    if not (info.get('symbol') or name):
+        return None
+
+    directory.add(symbol, name or symbol, info.get('exchange', ''), info.get('marketCap'))
+    directory.save()
+    return directory.get(symbol)
+
+
+if __name__ == '__main__':
+    # python symbol_directory.py : 미국 전 종목 목록과 시가총액 갱신
+    directory = refresh_symbol_directory()
+    print(f"미국 종목 목록 갱신 완료: {len(directory)}개 ({directory.path})")
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import calculate_rsi
+
+
+def reference_rsi(prices, window=14):
+    """기존 .iloc 루프 구현 (벡터화 이전 app.py의 calculate_rsi)"""
+    delta = prices.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+
+    # 첫 번째 평균은 단순 평균
+    avg_gain = gain.rolling(window=window).mean()
+    avg_loss = loss.rolling(window=window).mean()
+
+    # Wilder's Smoothing 적용
+    for i in range(window, len(gain)):
+        avg_gain.iloc[i] = (avg_gain.iloc[i-1] * (window-1) + gain.iloc[i]) / window
+        avg_loss.iloc[i] = (avg_loss.iloc[i-1] * (window-1) + loss.iloc[i]) / window
+
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def random_prices(shape, seed):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, shape), axis=0))
+
+
+def assert_same(actual, expected):
+    assert np.array_equal(np.asarray(actual), np.asarray(expected), equal_nan=True)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('window', [2, 14, 30])
+def test_matches_reference_1d(seed, window):
+    prices = pd.Series(random_prices(300, seed))
+    assert_same(calculate_rsi(prices, window), reference_rsi(prices, window))
+    assert_same(calculate_rsi(prices.to_numpy(), window), reference_rsi(prices, window))
+
+
+@pytest.mark.parametrize('window', [2, 14])
+def test_matches_reference_2d(window):
+    prices = pd.DataFrame(random_prices((250, 6), seed=42))
+    expected = pd.DataFrame({column: reference_rsi(prices[column], window) for column in prices})
+
+    result = calculate_rsi(prices, window)
+    assert isinstance(result, pd.DataFrame)
+    assert_same(result, expected)
+    assert_same(calculate_rsi(prices.to_numpy(), window), expected)
+
+
+@pytest.mark.parametrize('n', [1, 5, 13, 14, 15])
+def test_short_series(n):
+    prices = pd.Series(random_prices(n, seed=n))
+    assert_same(calculate_rsi(prices, 14), reference_rsi(prices, 14))
+
+
+def test_nan_in_middle():
+    values = random_prices(120, seed=7)
+    values[60] = np.nan
+    prices = pd.Series(values)
+    assert_same(calculate_rsi(prices, 14), reference_rsi(prices, 14))
+
+    frame = pd.DataFrame(random_prices((120, 3), seed=8))
+    frame.iloc[40, 1] = np.nan
+    expected = pd.DataFrame({column: reference_rsi(frame[column], 14) for column in frame})
+    assert_same(calculate_rsi(frame, 14), expected)
+
+
+def test_preserves_series_index():
+    prices = pd.Series(random_prices(40, seed=3), index=pd.date_range('2024-01-01', periods=40), name='AAPL')
+    result = calculate_rsi(prices)
+    assert result.index.equals(prices.index)
+    assert result.name == 'AAPL'
@@ -0,0 +1,25 @@
+import numpy as np
+
+from live_feed import LiveFeed, same_row
+
+
+def test_same_row_treats_nan_as_equal():
+    row = {'ticker': 'AAPL', 'rsi': float('nan'), 'stoch': {'k_value': np.float64('nan'), 'k_below_30': np.bool_(False)}}
+    copy = {'ticker': 'AAPL', 'rsi': float('nan'), 'stoch': {'k_value': np.float64('nan'), 'k_below_30': np.bool_(False)}}
+    assert same_row(row, copy)
+    assert not same_row(row, {**copy, 'rsi': 31.5})
+    assert not same_row(row, {**copy, 'stoch': {'k_value': 12.0, 'k_below_30': np.bool_(True)}})
+    assert not same_row(None, row)
+
+
+def test_poll_once_skips_unchanged_nan_rows():
+    polls = iter([
+        {'AAPL': {'rsi': float('nan')}, 'MSFT': {'rsi': 40.0}},
+        {'AAPL': {'rsi': float('nan')}, 'MSFT': {'rsi': 41.0}},
+        {'AAPL': {'rsi': 35.0}, 'MSFT': {'rsi': 41.0}},
+    ])
+    feed = LiveFeed(lambda: next(polls), lambda: 60)
+
+    assert set(feed.poll_once()) == {'AAPL', 'MSFT'}
+    assert feed.poll_once() == {'MSFT': {'rsi': 41.0}}
+    assert feed.poll_once() == {'AAPL': {'rsi': 35.0}}
@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data import RecordedDownloader, download_ohlcv_batch, get_us_ohlcv
+from price_store import PriceStore
+
+# 저장소에 포함된 기록 응답 (benchmarks/run.py --source record)
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+
+# 기록된 티커 목록 (Flask 분석 페이지 종목)
+FIXTURE_TICKERS = ["MSFT", "GOOG", "META", "AMZN", "AAPL", "TSLA", "NVDA", "AVGO", "ORCL",
+                   "PLTR", "IONQ", "RKLB", "TEM", "HIMS", "CRDO", "CLS", "MSTY"]
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def ohlcv(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({
+        'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+        'Volume': rng.integers(1_000, 10_000, len(dates)).astype(float),
+    }, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+class FakeYahoo:
+    """yf.download(group_by='ticker') 응답 형태를 흉내 내는 다운로더 (기록용)"""
+
+    def __init__(self, frames, failed=(), flat_single=False):
+        self.frames = frames
+        self.failed = set(failed)
+        self.flat_single = flat_single
+
+    def __call__(self, tickers, start=None, end=None, **kwargs):
+        dates = pd.bdate_range('2024-01-01', '2024-12-31', name='Date')
+        columns = {}
+        for ticker in tickers:
+            if ticker in self.failed:
+                # 조회 실패 종목은 전부 NaN인 컬럼으로 옴
+                columns[ticker] = pd.DataFrame(np.nan, index=dates, columns=FIELDS)
+            elif ticker in self.frames:
+                columns[ticker] = self.frames[ticker].reindex(dates)
+        if self.flat_single and len(tickers) == 1:
+            return columns[tickers[0]]
+        return pd.concat(columns, axis=1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / 'store'))
+
+
+def test_replay_committed_fixture(store):
+    raw = RecordedDownloader(FIXTURE_DIR)(FIXTURE_TICKERS)
+    start = raw.index[0]
+    downloader = RecordedDownloader(FIXTURE_DIR)
+
+    frames = get_us_ohlcv(FIXTURE_TICKERS, start, store=store, downloader=downloader)
+
+    assert list(frames) == FIXTURE_TICKERS
+    for ticker, df in frames.items():
+        expected = raw[ticker].dropna(how='all')
+        assert list(df.columns[:5]) == FIELDS
+        assert not df.isna().all(axis=1).any()
+        pd.testing.assert_frame_equal(df[FIELDS], expected[FIELDS], check_names=False, check_freq=False)
+
+    # 저장본이 있으면 델타 조회 결과를 붙여도 같은 값
+    again = get_us_ohlcv(FIXTURE_TICKERS, start, store=store, downloader=downloader)
+    for ticker, df in frames.items():
+        pd.testing.assert_frame_equal(again[ticker][FIELDS], df[FIELDS], check_freq=False)
+
+
+def test_replay_missing_and_failed_tickers(tmp_path, store):
+    dates = pd.bdate_range('2024-01-01', '2024-12-31')
+    source = FakeYahoo({'AAPL': ohlcv(dates, 1), 'MSFT': ohlcv(dates[100:], 2)}, failed={'DELISTED'})
+    tickers = ['AAPL', 'DELISTED', 'MSFT', 'NOSUCH']
+    fixtures = str(tmp_path / 'fixtures')
+    RecordedDownloader(fixtures, mode='record', downloader=source)(tickers)
+
+    frames = get_us_ohlcv(tickers, '2024-01-01', store=store, downloader=RecordedDownloader(fixtures))
+
+    # 응답에 없거나 전부 NaN인 종목은 제외, 상장일이 늦은 종목은 앞쪽 빈 행 제거
+    assert sorted(frames) == ['AAPL', 'MSFT']
+    pd.testing.assert_frame_equal(frames['AAPL'][FIELDS], ohlcv(dates, 1), check_names=False, check_freq=False)
+    assert frames['MSFT'].index[0] == dates[100]
+    assert len(frames['MSFT']) == len(dates) - 100
+
+
+def test_replay_single_ticker_flat_columns(tmp_path):
+    dates = pd.bdate_range('2024-01-01', '2024-12-31')
+    fixtures = str(tmp_path / 'fixtures')
+    RecordedDownloader(fixtures, mode='record', downloader=FakeYahoo({'AAPL': ohlcv(dates, 3)}, flat_single=True))(['AAPL'])
+
+    frames = download_ohlcv_batch(['AAPL'], start='2024-01-01', downloader=RecordedDownloader(fixtures))
+
+    assert list(frames) == ['AAPL']
+    pd.testing.assert_frame_equal(frames['AAPL'][FIELDS], ohlcv(dates, 3), check_names=False, check_freq=False)
+
+
+def test_replay_chunks(tmp_path):
+    dates = pd.bdate_range('2024-01-01', '2024-12-31')
+    tickers = [f'T{i}' for i in range(5)]
+    source = FakeYahoo({ticker: ohlcv(dates, i) for i, ticker in enumerate(tickers)})
+    fixtures = str(tmp_path / 'fixtures')
+    recorder = RecordedDownloader(fixtures, mode='record', downloader=source)
+    download_ohlcv_batch(tickers, start='2024-01-01', chunk_size=2, downloader=recorder)
+    assert recorder.calls == 3
+
+    replay = RecordedDownloader(fixtures)
+    frames = download_ohlcv_batch(tickers, start='2024-01-01', chunk_size=2, downloader=replay)
+
+    assert replay.calls == 3
+    assert list(frames) == tickers
+    for i, ticker in enumerate(tickers):
+        pd.testing.assert_frame_equal(frames[ticker][FIELDS], ohlcv(dates, i), check_names=False, check_freq=False)
+
+
+def test_replay_without_fixture_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        download_ohlcv_batch(['AAPL'], start='2024-01-01', downloader=RecordedDownloader(str(tmp_path)))
@@ -0,0 +1,42 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import response_encoding
+from response_encoding import dumps_json
+
+PAYLOAD = {
+    'results': [
+        {'ticker': 'AAPL', 'rsi': float('nan'), 'percent_b': 0.4601, 'volume': np.int64(1200)},
+        {'ticker': '삼성전자', 'rsi': np.float64('nan'), 'band_width': float('inf'), 'flag': np.bool_(True)},
+    ],
+    'close': np.array([1.5, np.nan, -np.inf, 2.25]),
+    'ratio': np.float32('nan'),
+    'as_of': pd.Timestamp('2025-01-02'),
+    'errors': [],
+    'partial': False,
+}
+
+
+def test_fallback_replaces_non_finite_with_null(monkeypatch):
+    monkeypatch.setattr(response_encoding, 'orjson', None)
+    encoded = dumps_json(PAYLOAD)
+
+    # 브라우저 JSON.parse처럼 NaN/Infinity 토큰을 거부하는 파서로 확인
+    def reject(token):
+        raise ValueError(token)
+
+    decoded = json.loads(encoded, parse_constant=reject)
+    assert decoded['results'][0]['rsi'] is None
+    assert decoded['results'][1]['band_width'] is None
+    assert decoded['close'] == [1.5, None, None, 2.25]
+    assert decoded['ratio'] is None
+
+
+@pytest.mark.skipif(response_encoding.orjson is None, reason="orjson 미설치")
+def test_fallback_matches_orjson(monkeypatch):
+    expected = dumps_json(PAYLOAD)
+    monkeypatch.setattr(response_encoding, 'orjson', None)
+    assert dumps_json(PAYLOAD) == expected
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from panel import Panel
+from scans import compute_panel_indicators, summarize_technical_indicators
+
+
+def random_ohlcv(dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({
+        'Open': close * 0.995,
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000, 10_000, len(dates)).astype(float),
+    }, index=dates)
+
+
+def test_mixed_calendars_match_per_ticker():
+    # 주말에도 거래되는 코인과 평일만 거래되는 주식이 섞인 관심 종목
+    frames = {
+        'AAPL': random_ohlcv(pd.bdate_range('2024-01-01', '2025-06-30'), seed=1),
+        'BTC-USD': random_ohlcv(pd.date_range('2024-01-01', '2025-06-29'), seed=2),
+        'MSTY': random_ohlcv(pd.bdate_range('2025-02-03', '2025-06-30'), seed=3),
+    }
+    indicators = compute_panel_indicators(Panel.from_frames(frames))
+
+    for ticker, df in frames.items():
+        expected = summarize_technical_indicators(df)
+        for column, value in expected.items():
+            assert np.isclose(indicators.loc[ticker, column], value, rtol=1e-9), (ticker, column)
+
+
+def test_missing_indicators_stay_nan():
+    dates = pd.bdate_range('2025-01-01', periods=60)
+    flat = random_ohlcv(dates, seed=4).assign(Close=50.0)
+    indicators = compute_panel_indicators(Panel.from_frames({'FLAT': flat, 'AAPL': random_ohlcv(dates, seed=5)}))
+
+    # 가격 변동이 없으면 RSI/%B를 계산할 수 없음 (0으로 채우지 않음)
+    assert np.isnan(indicators.loc['FLAT', 'rsi'])
+    assert np.isnan(indicators.loc['FLAT', 'percent_b'])
+    assert indicators.loc['FLAT', 'band_width'] == 0
+    assert np.isfinite(indicators.loc['AAPL']).all()
@@ -0,0 +1,119 @@
+import re
+import difflib
+from bisect import bisect_left, bisect_right
+
+# KRX 시장별 Yahoo Finance 티커 접미사
+KRX_YAHOO_SUFFIXES = {
+    'KOSPI': '.KS',
+    'KOSDAQ': '.KQ',
+}
+
+# 검색 결과 순위 (작을수록 먼저)
+_EXACT_SYMBOL, _SYMBOL_PREFIX, _NAME_PREFIX, _NAME_PART = range(4)
+
+_HANGUL = re.compile(r'[가-힣]')
+
+
+def _normalize(text):
+    return text.strip().casefold()
+
+
+class TickerSearchIndex:
+    """
+    티커/회사명 접두어 검색 인덱스
+    검색 키(티커, 회사명, 회사명의 각 단어)를 정렬된 배열로 보관하고 이진 탐색으로 범위 조회
+    한글 종목명은 중간 글자부터도 찾을 수 있도록 모든 접미사를 키로 추가 (예: "전자" -> 삼성전자)
+    접두어로 찾지 못하면 티커 유사도(difflib)로 보완
+    """
+
+    def __init__(self, entries):
+        """entries: [{'symbol', 'name', 'exchange'}] (앞에 있을수록 같은 순위에서 먼저 표시)"""
+        self.entries = list(entries)
+        self._symbols = {}
+
+        keys = []
+        for entry_id, entry in enumerate(self.entries):
+            symbol = _normalize(entry['symbol'])
+            name = _normalize(entry['name'] or '')
+            self._symbols.setdefault(symbol, entry_id)
+
+            keys.append((symbol, _SYMBOL_PREFIX, entry_id))
+            # 접미사 없는 한국 종목코드로도 검색 (005930 -> 005930.KS)
+            base_symbol = symbol.split('.')[0]
+            if base_symbol != symbol:
+                keys.append((base_symbol, _SYMBOL_PREFIX, entry_id))
+
+            if name:
+                keys.append((name, _NAME_PREFIX, entry_id))
+                for word in name.split()[1:]:
+                    keys.append((word, _NAME_PART, entry_id))
+                if _HANGUL.search(name):
+                    compact = name.replace(' ', '')
+                    for i in range(1, len(compact)):
+                        keys.append((compact[i:], _NAME_PART, entry_id))
+
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._matches = [(rank, entry_id) for _, rank, entry_id in keys]
+
+    @classmethod
+    def from_sources(cls, directory=None, krx_listing=None):
+        """
+        미국 종목 목록(SymbolDirectory)과 KRX 종목 목록(get_krx_market_caps 결과)으로 인덱스 생성
+        KRX 종목은 Yahoo Finance 티커(.KS/.KQ)로 변환하고 시가총액 순으로 정렬
+        """
+        entries = []
+        if directory is not None:
+            entries.extend(directory.get(symbol) for symbol in directory.symbols())
+        if krx_listing is not None and not krx_listing.empty:
+            listing = krx_listing.sort_values('market_cap', ascending=False)
+            for row in listing.itertuples(index=False):
+                suffix = KRX_YAHOO_SUFFIXES.get(row.market)
+                if suffix:
+                    entries.append({'symbol': f"{row.ticker}{suffix}", 'name': row.name, 'exchange': row.market})
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, symbol):
+        return _normalize(symbol) in self._symbols
+
+    def get(self, symbol):
+        entry_id = self._symbols.get(_normalize(symbol))
+        return None if entry_id is None else self.entries[entry_id]
+
+    def search(self, query, limit=10, fuzzy=True):
+        """
+        검색어로 시작하는 티커/회사명 검색
+        순위: 티커 일치 > 티커 접두어 > 회사명 접두어 > 회사명 중간 단어, 같은 순위는 등록 순서
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+
+        start = bisect_left(self._keys, query)
+        end = bisect_right(self._keys, query + '\uffff', lo=start)
+
+        best = {}
+        exact = self._symbols.get(query)
+        if exact is not None:
+            best[exact] = _EXACT_SYMBOL
+        for rank, entry_id in self._matches[start:end]:
+            if rank < best.get(entry_id, _NAME_PART + 1):
+                best[entry_id] = rank
+
+        ranked = sorted(best, key=lambda entry_id: (best[entry_id], entry_id))
+        results = [self.entries[entry_id] for entry_id in ranked[:limit]]
+
+        # 오타 보완: 접두어로 찾지 못하면 비슷한 티커 검색
+        if fuzzy and not results:
+            seen = set(ranked)
+            for symbol in difflib.get_close_matches(query, self._symbols, n=limit, cutoff=0.75):
+                entry_id = self._symbols[symbol]
+                if entry_id not in seen:
+                    results.append(self.entries[entry_id])
+                    seen.add(entry_id)
+                if len(results) >= limit:
+                    break
+        return results
@@ -0,0 +1,307 @@
+"""
+거래소 휴장일 달력 (KRX, NYSE)
+
+주말과 휴장일을 제외한 거래일을 로컬에서 판단해 휴장일 조회 요청을 줄인다.
+- NYSE: 규칙으로 계산되는 정규 휴장일
+- KRX: 음력 명절/선거일 등 규칙으로 계산할 수 없는 휴장일은 기본 목록을 두고,
+  실제 시세 응답(휴장일은 빈 결과/0 가격)으로 확인한 거래일/휴장일을 파일에 기록해 보완
+"""
+import os
+import json
+import threading
+from datetime import date, datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+# 응답으로 확인한 거래일/휴장일 저장 경로 (환경변수로 변경 가능)
+DEFAULT_CALENDAR_DIR = os.environ.get(
+    'STOCK_PORT_CALENDAR_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'calendar')
+)
+
+# 장 마감 후 일봉이 확정될 때까지의 여유 시간
+SETTLE_DELAY = timedelta(minutes=30)
+
+# KRX 휴장일 기본 목록 (양력 고정 공휴일 외: 설날/추석/부처님오신날/대체공휴일/선거일/임시공휴일)
+KRX_HOLIDAYS = {
+    # 2024
+    '20240209', '20240212', '20240410', '20240506', '20240515',
+    '20240916', '20240917', '20240918', '20241001',
+    # 2025
+    '20250127', '20250128', '20250129', '20250130', '20250303', '20250506', '20250603',
+    '20251006', '20251007', '20251008',
+    # 2026
+    '20260216', '20260217', '20260218', '20260302', '20260525', '20260603',
+    '20260817', '20260924', '20260925', '20261005',
+}
+
+# KRX 양력 고정 휴장일 (월, 일): 신정, 삼일절, 근로자의 날, 어린이날, 현충일, 광복절,
+# 개천절, 한글날, 성탄절, 연말 휴장일
+KRX_FIXED_HOLIDAYS = [(1, 1), (3, 1), (5, 1), (5, 5), (6, 6), (8, 15), (10, 3), (10, 9), (12, 25), (12, 31)]
+
+
+def _to_date(value):
+    """date/datetime/Timestamp/'YYYYMMDD' -> date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def _easter(year):
+    """부활절 (그레고리력, 익명 알고리즘)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """해당 월의 n번째 요일 (n=-1이면 마지막)"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """토요일 공휴일은 금요일, 일요일 공휴일은 월요일에 휴장"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year):
+    """NYSE 정규 휴장일"""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),             # 마틴 루터 킹 데이
+        _nth_weekday(year, 2, 0, 3),             # 대통령의 날
+        _easter(year) - timedelta(days=2),       # 성금요일
+        _nth_weekday(year, 5, 0, -1),            # 메모리얼 데이
+        _observed(date(year, 7, 4)),             # 독립기념일
+        _nth_weekday(year, 9, 0, 1),             # 노동절
+        _nth_weekday(year, 11, 3, 4),            # 추수감사절
+        _observed(date(year, 12, 25)),           # 성탄절
+    }
+    # 신정이 토요일이면 전년도 금요일에 휴장하지 않음
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    # 준틴스 (2022년부터)
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))
+    return holidays
+
+
+def krx_holidays(year):
+    """KRX 기본 휴장일 (양력 고정 휴장일 + 기본 목록)"""
+    holidays = {date(year, month, day) for month, day in KRX_FIXED_HOLIDAYS}
+    holidays.update(_to_date(d) for d in KRX_HOLIDAYS if d.startswith(str(year)))
+    return holidays
+
+
+class TradingCalendar:
+    """
+    거래소 거래일 달력
+    거래일 판단 순서: 응답으로 확인한 거래일 > 응답으로 확인한 휴장일 > 기본 휴장일 > 주말
+    """
+
+    def __init__(self, market, tz, open_time, close_time, holiday_rule, path=None):
+        self.market = market
+        self.tz = ZoneInfo(tz)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.path = path
+        self._holiday_rule = holiday_rule
+        self._rule_cache = {}
+        self._learned_holidays = set()
+        self._learned_sessions = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self._learned_holidays = {_to_date(d) for d in data.get('holidays', [])}
+            self._learned_sessions = {_to_date(d) for d in data.get('sessions', [])}
+        except Exception as e:
+            print(f"거래일 달력 읽기 실패 ({self.market}): {e}")
+
+    def _save(self):
+        """확인한 거래일/휴장일 저장 (임시 파일에 쓴 뒤 교체, 락 안에서 호출)"""
+        if not self.path:
+            return
+        data = {
+            'holidays': sorted(d.strftime('%Y%m%d') for d in self._learned_holidays),
+            'sessions': sorted(d.strftime('%Y%m%d') for d in self._learned_sessions),
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _rule_holidays(self, year):
+        holidays = self._rule_cache.get(year)
+        if holidays is None:
+            holidays = self._rule_cache[year] = self._holiday_rule(year)
+        return holidays
+
+    def today(self, now=None):
+        """거래소 시간대 기준 오늘"""
+        now = now or datetime.now(self.tz)
+        return now.astimezone(self.tz).date() if now.tzinfo else now.date()
+
+    def is_session(self, day):
+        day = _to_date(day)
+        if day in self._learned_sessions:
+            return True
+        if day in self._learned_holidays or day.weekday() >= 5:
+            return False
+        return day not in self._rule_holidays(day.year)
+
+    def previous_session(self, day, inclusive=True):
+        """day 이전(inclusive면 day 포함) 마지막 거래일"""
+        day = _to_date(day)
+        if not inclusive:
+            day -= timedelta(days=1)
+        while not self.is_session(day):
+            day -= timedelta(days=1)
+        return day
+
+    def next_session(self, day, inclusive=False):
+        """day 이후(inclusive면 day 포함) 첫 거래일"""
+        day = _to_date(day)
+        if not inclusive:
+            day += timedelta(days=1)
+        while not self.is_session(day):
+            day += timedelta(days=1)
+        return day
+
+    def sessions(self, start, end):
+        """start~end 거래일 목록"""
+        start, end = _to_date(start), _to_date(end)
+        days = []
+        day = start
+        while day <= end:
+            if self.is_session(day):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def open_at(self, day):
+        return datetime.combine(_to_date(day), self.open_time, tzinfo=self.tz)
+
+    def close_at(self, day):
+        return datetime.combine(_to_date(day), self.close_time, tzinfo=self.tz)
+
+    def latest_session(self, now=None):
+        """
+        시세가 있는 마지막 거래일
+        오늘이 거래일이어도 장 시작 전이면 직전 거래일
+        """
+        now = now or datetime.now(self.tz)
+        today = self.today(now)
+        if self.is_session(today) and now >= self.open_at(today):
+            return today
+        return self.previous_session(today, inclusive=False)
+
+    def is_open(self, now=None):
+        """정규장 진행 중인지"""
+        now = now or datetime.now(self.tz)
+        today = self.today(now)
+        return self.is_session(today) and self.open_at(today) <= now < self.close_at(today)
+
+    def next_open(self, now=None):
+        """now 이후 첫 장 시작 시각 (장중이면 다음 거래일 장 시작)"""
+        now = now or datetime.now(self.tz)
+        today = self.today(now)
+        if self.is_session(today) and now < self.open_at(today):
+            return self.open_at(today)
+        return self.open_at(self.next_session(today))
+
+    def is_settled(self, day, saved_at):
+        """day 봉이 장 마감 후 확정된 뒤 저장됐는지"""
+        return saved_at >= self.close_at(day) + SETTLE_DELAY
+
+    def is_final(self, last_bar_day, saved_at, now=None):
+        """
+        마지막 봉 이후로 새 거래일이 시작되지 않았고, 마지막 봉이 장 마감 후 확정된 뒤 저장됐는지
+        (True면 저장본을 그대로 써도 되므로 조회 생략)
+        """
+        now = now or datetime.now(self.tz)
+        if not self.is_settled(last_bar_day, saved_at):
+            return False
+        return now < self.open_at(self.next_session(last_bar_day))
+
+    def mark_holiday(self, day):
+        """응답으로 확인한 휴장일 기록 (지난 평일만)"""
+        day = _to_date(day)
+        if day.weekday() >= 5 or day >= self.today():
+            return
+        with self._lock:
+            if not self.is_session(day):
+                return
+            self._learned_sessions.discard(day)
+            if day not in self._rule_holidays(day.year):
+                self._learned_holidays.add(day)
+            self._save()
+
+    def mark_session(self, day):
+        """응답으로 확인한 거래일 기록 (기본 휴장일 규칙과 다를 때만)"""
+        day = _to_date(day)
+        with self._lock:
+            if self.is_session(day):
+                return
+            self._learned_holidays.discard(day)
+            if day.weekday() >= 5 or day in self._rule_holidays(day.year):
+                self._learned_sessions.add(day)
+            self._save()
+
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+# 시장 구분(가격 저장소 시장 폴더 등) -> 달력
+CALENDAR_ALIASES = {
+    'krx': 'krx',
+    'krx_daily': 'krx',
+    'us': 'nyse',
+    'nyse': 'nyse',
+}
+
+
+def _create_calendar(name, root):
+    if name == 'krx':
+        return TradingCalendar('krx', 'Asia/Seoul', dtime(9, 0), dtime(15, 30), krx_holidays,
+                               path=os.path.join(root, 'krx.json'))
+    return TradingCalendar('nyse', 'America/New_York', dtime(9, 30), dtime(16, 0), nyse_holidays,
+                           path=os.path.join(root, 'nyse.json'))
+
+
+def get_trading_calendar(market, root=DEFAULT_CALENDAR_DIR):
+    """프로세스 공용 거래일 달력 (알 수 없는 시장이면 None)"""
+    name = CALENDAR_ALIASES.get(market)
+    if name is None:
+        return None
+    with _calendars_lock:
+        calendar = _calendars.get(name)
+        if calendar is None:
+            calendar = _calendars[name] = _create_calendar(name, root)
+        return calendar
+
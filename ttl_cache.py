@@ -0,0 +1,133 @@
+import time
+import threading
+import functools
+from collections import OrderedDict
+
+
+class _Flight:
+    """진행 중인 계산 (같은 키의 동시 요청은 이 결과를 기다림)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    프로세스 내 TTL + LRU 캐시
+    - 항목은 ttl초 후 만료, maxsize 초과 시 가장 오래 사용하지 않은 항목 제거
+    - 같은 키에 대한 동시 계산은 한 번만 실행 (single-flight)
+    - hit/miss 등 카운터 제공
+    """
+
+    def __init__(self, maxsize=256, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'errors': 0}
+
+    def _get_valid(self, key, now):
+        """만료되지 않은 항목 반환 (락 안에서 호출)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._get_valid(key, time.monotonic())
+            return default if entry is None else entry[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key=None):
+        """key 항목 삭제 (None이면 전체 삭제)"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def get_or_compute(self, key, compute, cache_none=False, ttl=None):
+        """
+        캐시에 있으면 반환, 없으면 compute()로 계산 후 저장
+        같은 키를 동시에 요청하면 첫 요청만 계산하고 나머지는 그 결과를 공유
+        cache_none: None 결과(조회 실패)도 저장할지 여부
+        ttl: 저장 기간 (초 또는 결과를 받아 초를 반환하는 함수, 없으면 기본 ttl)
+        """
+        with self._lock:
+            entry = self._get_valid(key, time.monotonic())
+            if entry is not None:
+                self._stats['hits'] += 1
+                return entry[1]
+
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                leader = True
+                self._stats['misses'] += 1
+            else:
+                leader = False
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            if flight.result is not None or cache_none:
+                self.set(key, flight.result, ttl(flight.result) if callable(ttl) else ttl)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def stats(self):
+        """캐시 카운터 조회"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+            stats['in_flight'] = len(self._flights)
+        lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def memoize(cache, cache_none=False, ttl=None):
+    """
+    함수 이름 + 인자를 키로 cache.get_or_compute를 적용하는 데코레이터
+    ttl: 저장 기간 (초 또는 결과를 받아 초를 반환하는 함수)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (func.__name__,) + args
+            return cache.get_or_compute(key, lambda: func(*args), cache_none=cache_none, ttl=ttl)
+        wrapper.uncached = func
+        wrapper.cache_key = lambda *args: (func.__name__,) + args
+        return wrapper
+    return decorator
@@ -0,0 +1,265 @@
+"""
+관심 종목 목록 저장소 (로컬 SQLite)
+
+- 이름 붙은 관심 종목 목록을 Streamlit/Flask 프로세스와 모든 세션이 공유
+- 종목별 계산 결과를 (구분, 티커) 단위로 따로 캐시해 겹치는 종목이 있는 목록끼리 계산을 재사용
+"""
+import os
+import re
+import time
+import pickle
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+
+from price_store import ticker_calendar
+
+# 저장소 경로 (환경변수로 변경 가능)
+DEFAULT_WATCHLIST_DB = os.environ.get(
+    'STOCK_PORT_WATCHLIST_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'watchlists.sqlite3')
+)
+
+# 다른 프로세스가 쓰는 중일 때 기다리는 최대 시간 (초)
+BUSY_TIMEOUT = 30
+
+# 저장할 수 있는 티커 형식 (예: AAPL, BRK-B, 005930.KS, ^VIX, BTC-USD, GC=F)
+TICKER_PATTERN = re.compile(r'[A-Z0-9.\-^=]{1,15}')
+
+# 목록 이름 형식 (한글/영문/숫자/_/-/공백, 최대 40자, 앞뒤 공백 불가, URL 경로에도 쓰임)
+WATCHLIST_NAME_PATTERN = re.compile(r'[\w\-](?:[\w\- ]{0,38}[\w\-])?')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlists (
+    name TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS watchlist_tickers (
+    watchlist TEXT NOT NULL REFERENCES watchlists(name) ON DELETE CASCADE,
+    ticker TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (watchlist, ticker)
+);
+CREATE TABLE IF NOT EXISTS ticker_results (
+    namespace TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    as_of TEXT,
+    computed_at REAL NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (namespace, ticker)
+);
+"""
+
+
+def normalize_ticker(ticker):
+    """저장할 티커 정규화 (앞뒤 공백 제거 후 대문자, 형식이 맞지 않으면 ValueError)"""
+    if not isinstance(ticker, str) or not TICKER_PATTERN.fullmatch(ticker.strip().upper()):
+        raise ValueError(f"잘못된 티커 형식입니다: {ticker!r}")
+    return ticker.strip().upper()
+
+
+def validate_watchlist_name(name):
+    """목록 이름 검증 (앞뒤 공백 제거 후 반환, 비어 있거나 형식이 맞지 않으면 ValueError)"""
+    if not isinstance(name, str) or not WATCHLIST_NAME_PATTERN.fullmatch(name.strip()):
+        raise ValueError(f"잘못된 목록 이름입니다: {name!r} (한글/영문/숫자/_/-/공백, 최대 40자)")
+    return name.strip()
+
+
+class WatchlistStore:
+    """
+    관심 종목 목록 + 종목별 계산 결과 저장소
+    스레드마다 연결 하나를 재사용하고 작업마다 트랜잭션을 끝내므로 다른 스레드/프로세스가 저장한 내용이 바로 보임
+    (WAL 모드라 읽기는 쓰기를 기다리지 않음)
+    """
+
+    def __init__(self, path=DEFAULT_WATCHLIST_DB):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._local = threading.local()
+
+    @contextmanager
+    def _connect(self):
+        """트랜잭션 연결 (정상 종료 시 커밋, 예외 시 롤백)"""
+        conn = getattr(self._local, 'conn', None)
+        # fork된 자식 프로세스는 부모의 연결을 쓰지 않음
+        if conn is None or self._local.pid != os.getpid():
+            self._ensure_schema()
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            conn.execute("PRAGMA foreign_keys = ON")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        with conn:
+            yield conn
+
+    def _ensure_schema(self):
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)) as conn:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.executescript(_SCHEMA)
+            self._initialized = True
+
+    # 관심 종목 목록
+
+    def names(self):
+        """저장된 목록 이름 (이름순)"""
+        with self._connect() as conn:
+            return [name for (name,) in conn.execute("SELECT name FROM watchlists ORDER BY name")]
+
+    def get(self, name):
+        """목록 종목 (추가한 순서, 없는 목록이면 None)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT t.ticker FROM watchlists w "
+                "LEFT JOIN watchlist_tickers t ON t.watchlist = w.name "
+                "WHERE w.name = ? ORDER BY t.position",
+                (name,)
+            ).fetchall()
+        if not rows:
+            return None
+        return [ticker for (ticker,) in rows if ticker is not None]
+
+    def save(self, name, tickers):
+        """목록 전체 저장 (티커는 대문자로 통일, 중복 종목은 처음 위치만 유지, 잘못된 이름/티커면 ValueError)"""
+        name = validate_watchlist_name(name)
+        tickers = list(dict.fromkeys(normalize_ticker(ticker) for ticker in tickers))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO watchlists (name, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET updated_at = excluded.updated_at",
+                (name, time.time())
+            )
+            conn.execute("DELETE FROM watchlist_tickers WHERE watchlist = ?", (name,))
+            conn.executemany(
+                "INSERT INTO watchlist_tickers (watchlist, ticker, position) VALUES (?, ?, ?)",
+                [(name, ticker, i) for i, ticker in enumerate(tickers)]
+            )
+        return tickers
+
+    def ensure(self, name, default):
+        """목록 조회 (없으면 default로 만들어 저장)"""
+        tickers = self.get(name)
+        if tickers is None:
+            tickers = self.save(name, default)
+        return tickers
+
+    def add(self, name, ticker):
+        """목록 끝에 종목 추가 (이미 있으면 그대로, 잘못된 이름/티커면 ValueError)"""
+        name = validate_watchlist_name(name)
+        ticker = normalize_ticker(ticker)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO watchlists (name, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET updated_at = excluded.updated_at",
+                (name, time.time())
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO watchlist_tickers (watchlist, ticker, position) "
+                "SELECT ?, ?, COALESCE(MAX(position) + 1, 0) FROM watchlist_tickers WHERE watchlist = ?",
+                (name, ticker, name)
+            )
+
+    def remove(self, name, tickers):
+        """목록에서 종목 제거"""
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM watchlist_tickers WHERE watchlist = ? AND ticker = ?",
+                [(name, ticker) for ticker in tickers]
+            )
+            conn.execute("UPDATE watchlists SET updated_at = ? WHERE name = ?", (time.time(), name))
+
+    def delete(self, name):
+        """목록 삭제"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM watchlists WHERE name = ?", (name,))
+
+    # 종목별 계산 결과
+
+    def load_results(self, namespace, tickers, max_age, market=None):
+        """
+        저장된 종목별 결과 중 아직 유효한 것 {티커: 값}
+        유효: 계산 후 max_age초 이내, 또는 (종목 상장 거래소 달력 기준) 마지막 봉이 확정된 뒤 계산됐고 새 거래일이 없음
+        market: 기본 시장 (.KS/.KQ 등 접미사가 있는 종목은 해당 거래소 달력 사용)
+        """
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        with self._connect() as conn:
+            placeholders = ','.join('?' * len(tickers))
+            rows = conn.execute(
+                f"SELECT ticker, as_of, computed_at, value FROM ticker_results "
+                f"WHERE namespace = ? AND ticker IN ({placeholders})",
+                [namespace, *tickers]
+            ).fetchall()
+
+        now = time.time()
+        results = {}
+        for ticker, as_of, computed_at, value in rows:
+            fresh = now - computed_at < max_age
+            calendar = ticker_calendar(market, ticker) if market else None
+            if not fresh and calendar is not None and as_of:
+                fresh = calendar.is_final(as_of, datetime.fromtimestamp(computed_at, tz=timezone.utc))
+            if fresh:
+                try:
+                    results[ticker] = pickle.loads(value)
+                except Exception as e:
+                    print(f"종목별 결과 읽기 실패 ({namespace}/{ticker}): {e}")
+        return results
+
+    def save_results(self, namespace, results, as_of=None):
+        """
+        종목별 결과 저장 {티커: 값}
+        as_of(값): 결과의 마지막 봉 날짜 (YYYY-MM-DD, 확정 여부 판단용)
+        """
+        now = time.time()
+        rows = [
+            (namespace, ticker, as_of(value) if as_of else None, now, pickle.dumps(value))
+            for ticker, value in results.items()
+        ]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ticker_results (namespace, ticker, as_of, computed_at, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def clear_results(self, namespace=None):
+        """종목별 결과 삭제 (namespace가 없으면 전체)"""
+        with self._connect() as conn:
+            if namespace is None:
+                conn.execute("DELETE FROM ticker_results")
+            else:
+                conn.execute("DELETE FROM ticker_results WHERE namespace = ?", (namespace,))
+
+    def get_or_compute_results(self, namespace, tickers, compute_many, max_age, market=None, as_of=None):
+        """
+        종목별 결과 조회, 유효한 결과가 없는 종목만 compute_many(종목 목록)로 한 번에 계산해 저장
+        compute_many: {티커: 값} 반환 (실패한 종목은 빠질 수 있음)
+        반환: {티커: 값} (tickers 순서)
+        """
+        tickers = list(tickers)
+        results = self.load_results(namespace, tickers, max_age, market=market)
+        missing = [ticker for ticker in tickers if ticker not in results]
+        if missing:
+            computed = {ticker: value for ticker, value in compute_many(missing).items() if value}
+            self.save_results(namespace, computed, as_of=as_of)
+            results.update(computed)
+        return {ticker: results[ticker] for ticker in tickers if ticker in results}
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_watchlist_store():
+    """프로세스 공용 관심 종목 저장소"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = WatchlistStore()
+        return _default_store